@@ -0,0 +1,423 @@
+#!/usr/bin/python3
+import argparse
+import csv
+import gc
+import glob
+import json
+import math
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+V2_DIR = os.path.join(ROOT_DIR, "v2 - titles & content")
+# RejectionPattern, the HTML extractor and the referendum store live in v2
+if V2_DIR not in sys.path:
+    sys.path.insert(0, V2_DIR)
+
+REFERENDUM_DIR = os.path.join(V2_DIR, "referendum_data")
+BENCHMARKS = ["detect", "worst_case", "html_to_text", "vectorize", "predict", "cold_start"]
+PREDICT_BATCH_SIZES = [1, 32, 512]
+WORST_CASE_SIZES = [1024, 4096, 16384, 65536]
+BACKTRACKING_SIZES = [512, 1024, 2048]
+
+COLD_START_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import tensorflow as tf
+imported = time.perf_counter()
+model = tf.keras.models.load_model(sys.argv[1], compile=False)
+loaded = time.perf_counter()
+model.predict(tf.constant([["Please vote nay"]]), verbose=0)
+done = time.perf_counter()
+print(json.dumps({"import_s": imported - start, "load_s": loaded - imported, "first_predict_s": done - loaded}))
+"""
+
+LITE_COLD_START_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from lite_model import LiteModel
+imported = time.perf_counter()
+model = LiteModel(sys.argv[1])
+loaded = time.perf_counter()
+model.predict_proba(["Please vote nay"])
+done = time.perf_counter()
+print(json.dumps({"import_s": imported - start, "load_s": loaded - imported, "first_predict_s": done - loaded}))
+"""
+
+
+def measure(fn, repeats=7, warmup=1, min_seconds=0.2):
+    """
+    Seconds per fn() call, timeit-style.
+
+    After warmup calls, the number of calls per repeat is doubled until
+    one repeat takes at least min_seconds, then repeats timed runs are
+    taken with the garbage collector off. As with timeit, the fastest
+    repeat is the figure to compare (it is the one least disturbed by
+    other load); median/max show the spread.
+    """
+    for _ in range(warmup):
+        fn()
+
+    def run(loops):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            for _ in range(loops):
+                fn()
+            return time.perf_counter() - start
+        finally:
+            gc.enable()
+
+    loops = 1
+    while run(loops) < min_seconds and loops < 1 << 20:
+        loops *= 2
+    timings = [run(loops) / loops for _ in range(repeats)]
+    return {
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "max_s": max(timings),
+        "loops": loops,
+        "repeats": repeats
+    }
+
+
+def rate(timing, items):
+    """Items per second at the fastest repeat."""
+    return items / timing["min_s"]
+
+
+def load_referendums(data_dir=REFERENDUM_DIR):
+    csv.field_size_limit(sys.maxsize)
+    titles, contents = [], []
+    for csv_file in sorted(glob.glob(os.path.join(data_dir, "*_referendums.csv"))):
+        with open(csv_file, "r", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                titles.append(row["title"])
+                contents.append(row["content"])
+    return titles, contents
+
+
+def load_titles(csv_file=os.path.join(ROOT_DIR, "data.csv")):
+    with open(csv_file, "r", encoding="utf-8") as f:
+        return [row["title"] for row in csv.DictReader(f)]
+
+
+def load_bodies(data_dir=REFERENDUM_DIR):
+    """
+    Raw referendum bodies from the local referendum stores and JSON directories.
+
+    Those are not checked in, so without them the bodies are rebuilt from
+    the CSVs' titles and content excerpts as small HTML documents.
+    """
+    from referendum_store import ReferendumStore
+
+    bodies = []
+    for path in glob.glob(os.path.join(data_dir, "*", "referendums.store")):
+        with ReferendumStore(path) as store:
+            bodies.extend(data.get("content") or "" for _, data in store.items())
+    for path in glob.glob(os.path.join(data_dir, "*", "json", "referendum_*.json")):
+        with open(path, "r", encoding="utf-8") as f:
+            bodies.append(json.load(f).get("content") or "")
+    if bodies:
+        return bodies, "stored"
+
+    titles, contents = load_referendums(data_dir)
+    return [f"<h2>{t}</h2><p>{c}</p><p><a href='https://example.com'>{t}</a> &amp; <b>{c}</b></p>"
+            for t, c in zip(titles, contents)], "csv"
+
+
+def bench_detect(args):
+    from rejection_patterns import RejectionPattern
+
+    titles, contents = load_referendums()
+    detector = RejectionPattern()
+    single = measure(lambda: [detector.detect(t, c) for t, c in zip(titles, contents)], args.repeats)
+    batch = measure(lambda: detector.detect_many(titles, contents), args.repeats)
+    titles_only = measure(lambda: [detector.detect(t) for t in titles], args.repeats)
+    return {
+        "items": len(titles),
+        "detect_per_s": rate(single, len(titles)),
+        "detect_many_per_s": rate(batch, len(titles)),
+        "detect_title_only_per_s": rate(titles_only, len(titles)),
+        "prefilter_skip_rate": detector.prefilter_report()["skip_rate"],
+        "timings": {"detect": single, "detect_many": batch, "detect_title_only": titles_only}
+    }
+
+
+def literal_words(pattern):
+    """The words a match of pattern is built around: its literal runs, taking the first alternative of each branch."""
+    from rejection_patterns import sre_parse
+
+    def walk(items):
+        text = ""
+        for op, av in items:
+            if op is sre_parse.LITERAL:
+                text += chr(av)
+            elif op is sre_parse.SUBPATTERN:
+                text += walk(av[-1])
+            elif op is sre_parse.BRANCH:
+                text += walk(av[1][0])
+            elif op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+                text += " " + walk(av[1])
+            elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and av[0] >= 1:
+                text += walk(av[2])
+            else:
+                text += " "
+        return text
+
+    return walk(sre_parse.parse(pattern)).split()
+
+
+def adversarial_texts(pattern, size):
+    """
+    Inputs of size characters on which a backtracking engine retries pattern from every position.
+
+    The pattern's words are repeated without the last one, so every attempt
+    fails at the end; with it, so negative lookaheads fail at the end; and
+    without it but separated by long whitespace runs.
+    """
+    words = literal_words(pattern)
+    seeds = [" ".join(words[:-1]) + " ", " ".join(words) + " ", (" " * 256).join(words[:-1]) + " " * 256]
+    return [(seed * (size // len(seed) + 1))[:size] for seed in seeds if seed.strip()]
+
+
+def slowest_search(pattern, texts):
+    import re
+    compiled = re.compile(pattern)
+    timings = []
+    for text in texts:
+        start = time.perf_counter()
+        compiled.search(text)
+        timings.append(time.perf_counter() - start)
+    return max(timings)
+
+
+def backtracking_seconds(pattern, texts, timeout):
+    """Slowest re.search() of pattern over texts, run in a child process; None when it takes over timeout seconds."""
+    with multiprocessing.Pool(1) as pool:
+        job = pool.apply_async(slowest_search, (pattern, texts))
+        try:
+            return job.get(timeout)
+        except multiprocessing.TimeoutError:
+            return None
+
+
+def bench_worst_case(args):
+    """
+    re and LinearPattern on adversarial_texts() for every pattern LinearPattern rewrites, plus
+    RejectionPattern(linear=True).check_text() on all of them at the largest size.
+
+    re is only timed up to BACKTRACKING_SIZES, and gives up (null) after
+    --backtracking-timeout seconds. linear_growth is the exponent of time
+    against size between the smallest and largest input: 1 for linear.
+    """
+    from rejection_patterns import LinearPattern, RejectionPattern
+
+    detector = RejectionPattern(linear=True)
+    patterns = ([p for p, _, _ in detector.override_patterns] + detector.negative_patterns +
+                detector.strong_patterns + detector.medium_patterns + detector.content_patterns)
+    result = {"patterns": {}}
+    for pattern in patterns:
+        linear = LinearPattern(pattern)
+        if not linear.linear:
+            continue
+        row = {"linear_ms": {}, "backtracking_ms": {}}
+        for size in WORST_CASE_SIZES:
+            row["linear_ms"][str(size)] = max(
+                measure(lambda: linear.search(text), repeats=3, min_seconds=0.05)["min_s"]
+                for text in adversarial_texts(pattern, size)
+            ) * 1000.0
+        for size in BACKTRACKING_SIZES:
+            seconds = backtracking_seconds(pattern, adversarial_texts(pattern, size), args.backtracking_timeout)
+            row["backtracking_ms"][str(size)] = None if seconds is None else seconds * 1000.0
+        first, last = WORST_CASE_SIZES[0], WORST_CASE_SIZES[-1]
+        row["linear_growth"] = (math.log(row["linear_ms"][str(last)] / row["linear_ms"][str(first)]) /
+                                math.log(last / first))
+        result["patterns"][pattern] = row
+
+    texts = [text for pattern in result["patterns"] for text in adversarial_texts(pattern, WORST_CASE_SIZES[-1])]
+    timing = measure(lambda: [detector.check_text(text, is_content=True) for text in texts], repeats=3)
+    result["detector_check_text_ms"] = timing["min_s"] / len(texts) * 1000.0
+    result["detector_mb_per_s"] = sum(len(text) for text in texts) / 1e6 / timing["min_s"]
+    result["timings"] = {"detector_check_text": timing}
+    return result
+
+
+def bench_html_to_text(args):
+    from fetch_referendum_data import CONTENT_CHARS
+    from html_text import extract_text
+
+    bodies, source = load_bodies()
+    size_mb = sum(len(b.encode("utf-8")) for b in bodies) / 1e6
+    full = measure(lambda: [extract_text(b) for b in bodies], args.repeats)
+    budget = measure(lambda: [extract_text(b, max_chars=CONTENT_CHARS) for b in bodies], args.repeats)
+    return {
+        "items": len(bodies),
+        "source": source,
+        "bodies_per_s": rate(full, len(bodies)),
+        "mb_per_s": size_mb / full["min_s"],
+        "bodies_per_s_csv_budget": rate(budget, len(bodies)),
+        "timings": {"full": full, "csv_budget": budget}
+    }
+
+
+def load_keras_model(model_path):
+    import tensorflow as tf
+    return tf, tf.keras.models.load_model(model_path, compile=False)
+
+
+def bench_vectorize(args):
+    from lite_model import LiteModel
+
+    tf, model = load_keras_model(args.model)
+    titles = load_titles()
+    batch = tf.constant(titles)
+    vectorize = model.layers[0]
+    keras_timing = measure(lambda: vectorize(batch), args.repeats)
+    tokenizer = LiteModel(args.model).tokenizer
+    numpy_timing = measure(lambda: tokenizer.encode(titles), args.repeats)
+    return {
+        "items": len(titles),
+        "text_vectorization_per_s": rate(keras_timing, len(titles)),
+        "lite_tokenizer_per_s": rate(numpy_timing, len(titles)),
+        "timings": {"text_vectorization": keras_timing, "lite_tokenizer": numpy_timing}
+    }
+
+
+def bench_predict(args):
+    tf, model = load_keras_model(args.model)
+    titles = load_titles()
+    result = {}
+    for batch_size in PREDICT_BATCH_SIZES:
+        batch = tf.constant([[titles[i % len(titles)]] for i in range(batch_size)])
+        predict = measure(lambda: model.predict(batch, batch_size=batch_size, verbose=0), args.repeats)
+        call = measure(lambda: model(batch, training=False), args.repeats)
+        result[f"bs{batch_size}"] = {
+            "predict_ms": predict["min_s"] * 1000.0,
+            "call_ms": call["min_s"] * 1000.0,
+            "predict_titles_per_s": rate(predict, batch_size),
+            "timings": {"predict": predict, "call": call}
+        }
+    return result
+
+
+def bench_cold_start(args):
+    """Fresh interpreters, so nothing is shared with this process; the median of cold_repeats runs."""
+    result = {}
+    for name, script in (("keras", COLD_START_SCRIPT), ("lite", LITE_COLD_START_SCRIPT)):
+        runs = []
+        for _ in range(args.cold_repeats):
+            start = time.perf_counter()
+            output = subprocess.run([sys.executable, "-c", script, args.model], cwd=ROOT_DIR, check=True,
+                                    capture_output=True, text=True).stdout
+            phases = json.loads(output.strip().splitlines()[-1])
+            phases["total_s"] = time.perf_counter() - start
+            runs.append(phases)
+        result[name] = {phase: statistics.median(run[phase] for run in runs) for phase in runs[0]}
+        result[name]["runs"] = len(runs)
+    return result
+
+
+BENCHMARK_FUNCTIONS = {
+    "detect": bench_detect,
+    "worst_case": bench_worst_case,
+    "html_to_text": bench_html_to_text,
+    "vectorize": bench_vectorize,
+    "predict": bench_predict,
+    "cold_start": bench_cold_start
+}
+NEEDS_MODEL = {"vectorize", "predict", "cold_start"}
+
+
+def environment(args):
+    meta = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "model": args.model
+    }
+    try:
+        meta["git_commit"] = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+                                            capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        meta["git_commit"] = None
+    if os.path.exists(args.model):
+        from inference_cache import file_digest
+        meta["model_sha1"] = file_digest(args.model)[:12]
+    return meta
+
+
+def headline(results):
+    """Flattens the results to {metric: value}, keeping the figures worth comparing between runs."""
+    flat = {}
+
+    def walk(prefix, value):
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if key not in ("timings", "runs"):
+                    walk(f"{prefix}.{key}" if prefix else key, item)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[prefix] = value
+
+    walk("", results)
+    return flat
+
+
+def compare(baseline, current):
+    """Prints current/baseline ratios; for rates higher is better, for times (_s, _ms) lower is better."""
+    old, new = headline(baseline["results"]), headline(current["results"])
+    print(f"\n{'metric':<48} {'baseline':>12} {'current':>12} {'change':>9}")
+    for metric in sorted(set(old) & set(new)):
+        if metric.endswith(".items") or not old[metric]:
+            continue
+        change = new[metric] / old[metric] - 1.0
+        print(f"{metric:<48} {old[metric]:>12.4g} {new[metric]:>12.4g} {change:>+8.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark detection, preprocessing and inference hot paths")
+    parser.add_argument("benchmarks", nargs="*", metavar="BENCHMARK",
+                        help=f"Benchmarks to run (default all: {', '.join(BENCHMARKS)})")
+    parser.add_argument("--model", default=os.path.join(ROOT_DIR, "model.keras"), help="Trained model")
+    parser.add_argument("--repeats", type=int, default=7, help="Timed repeats per measurement")
+    parser.add_argument("--cold-repeats", type=int, default=3, help="Fresh processes for the cold start benchmark")
+    parser.add_argument("--backtracking-timeout", type=float, default=10.0,
+                        help="Seconds the worst case benchmark lets re run on one input size")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON file of an earlier run to compare against")
+    args = parser.parse_args()
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    report = {"environment": environment(args), "results": {}, "skipped": {}}
+    for name in args.benchmarks or BENCHMARKS:
+        if name in NEEDS_MODEL and not os.path.exists(args.model):
+            report["skipped"][name] = f"{args.model} not found"
+            print(f"{name}: skipped, {args.model} not found", file=sys.stderr)
+            continue
+        print(f"{name}...", file=sys.stderr)
+        start = time.perf_counter()
+        report["results"][name] = BENCHMARK_FUNCTIONS[name](args)
+        print(f"{name}: done in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    for metric, value in headline(report["results"]).items():
+        print(f"{metric:<48} {value:>12.4g}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
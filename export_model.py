@@ -0,0 +1,100 @@
+#!/usr/bin/python3
+import argparse
+import csv
+import os
+import numpy as np
+import tensorflow as tf
+
+from lite_model import LITE_MODEL_PATH, LiteModel
+
+
+def quantize_int8(weight):
+    """Symmetric int8 quantization with one scale per output channel (the last axis)."""
+    axes = tuple(range(weight.ndim - 1))
+    scale = np.abs(weight).max(axis=axes, keepdims=True) / 127.0
+    scale[scale == 0] = 1.0
+    return np.round(weight / scale).astype(np.int8), scale.astype(np.float32)
+
+
+def export_model(model_path, output_path, quantization):
+    """
+    Writes the vocabulary and weights of model.keras to an .npz artifact for lite_model.py.
+
+    Kernels and the embedding table are stored as int8 (with per-channel
+    scales), float16 or float32; biases stay float32. Embedding rows past
+    the vocabulary size can never be looked up and are dropped.
+    """
+    model = tf.keras.models.load_model(model_path, compile=False)
+    vectorize, embedding, conv, dense, output = [
+        next(layer for layer in model.layers if isinstance(layer, layer_type))
+        for layer_type in (tf.keras.layers.TextVectorization, tf.keras.layers.Embedding, tf.keras.layers.Conv1D)
+    ] + [layer for layer in model.layers if isinstance(layer, tf.keras.layers.Dense)]
+
+    vocabulary = vectorize.get_vocabulary()
+    weights = {
+        "embedding": embedding.get_weights()[0][:len(vocabulary)],
+        "conv_kernel": conv.get_weights()[0],
+        "conv_bias": conv.get_weights()[1],
+        "dense_kernel": dense.get_weights()[0],
+        "dense_bias": dense.get_weights()[1],
+        "output_kernel": output.get_weights()[0],
+        "output_bias": output.get_weights()[1]
+    }
+
+    artifact = {
+        "vocabulary": np.array(vocabulary),
+        "sequence_length": np.array(vectorize.get_config()["output_sequence_length"]),
+        "quantization": np.array(quantization)
+    }
+    for name, weight in weights.items():
+        weight = weight.astype(np.float32)
+        if name.endswith("_bias") or quantization == "float32":
+            artifact[name] = weight
+        elif quantization == "float16":
+            artifact[name] = weight.astype(np.float16)
+        else:
+            artifact[name], artifact[name + "_scale"] = quantize_int8(weight)
+
+    np.savez_compressed(output_path, **artifact)
+    print(f"Exported {model_path} ({quantization}) to {output_path}: {os.path.getsize(output_path) / 1024:.1f} KiB")
+    return model
+
+
+def check_parity(model, lite_path, csv_file="data.csv"):
+    """Compares the exported model's predictions with model.keras on every title in csv_file."""
+    with open(csv_file, "r", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    titles = [row["title"] for row in rows]
+    expected = np.array([int(row["label"]) for row in rows])
+
+    keras_probs = tf.nn.softmax(model.predict(tf.constant([[t] for t in titles]), batch_size=512, verbose=0)).numpy()
+    lite_probs = LiteModel(lite_path).predict_proba(titles)
+    keras_labels = keras_probs.argmax(axis=1)
+    lite_labels = lite_probs.argmax(axis=1)
+
+    print(f"Parity on {len(titles)} titles from {csv_file}:")
+    print(f"  Label agreement with model.keras: {np.mean(keras_labels == lite_labels):.4f} "
+          f"({np.sum(keras_labels != lite_labels)} differ)")
+    print(f"  Max |Prob(class1)| difference:   {np.abs(keras_probs[:, 1] - lite_probs[:, 1]).max():.6f}")
+    print(f"  Accuracy: model.keras {np.mean(keras_labels == expected):.4f}, "
+          f"exported {np.mean(lite_labels == expected):.4f}")
+    return np.mean(keras_labels == lite_labels)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export model.keras for the TensorFlow-free lite_model.py runtime")
+    parser.add_argument("--model", default="model.keras", help="Trained Keras model")
+    parser.add_argument("--output", default=LITE_MODEL_PATH, help="Exported .npz artifact")
+    parser.add_argument("--quantization", choices=["int8", "float16", "float32"], default="int8",
+                        help="Storage type for the embedding and kernels")
+    parser.add_argument("--check", action="store_true", help="Compare the export against model.keras on data.csv")
+    parser.add_argument("--data", default="data.csv", help="CSV file used by --check")
+    args = parser.parse_args()
+
+    model = export_model(args.model, args.output, args.quantization)
+    if args.check:
+        check_parity(model, args.output, args.data)
+
+
+if __name__ == "__main__":
+    main()
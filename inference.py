@@ -1,16 +1,142 @@
 #!/usr/bin/python3
+import argparse
+import csv
+import json
 import sys
 import numpy as np
 import tensorflow as tf
 
+from inference_cache import CachedClassifier
+
+CHUNK_SIZE = 4096
+BATCH_SIZE = 1024
+
+
+def read_titles(paths):
+    """
+    Streams (source, title) pairs from the given files, '-' meaning stdin.
+    CSV files are read from their 'title' column, anything else is one title per line.
+    """
+    csv.field_size_limit(sys.maxsize)
+    for path in paths:
+        f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8", newline="")
+        try:
+            if path.endswith(".csv"):
+                reader = csv.DictReader(f)
+                if "title" not in (reader.fieldnames or []):
+                    raise ValueError(f"{path} has no 'title' column")
+                for row in reader:
+                    yield path, row["title"] or ""
+            else:
+                for line in f:
+                    title = line.strip()
+                    if title:
+                        yield path, title
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+
+def chunked(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class KerasTitleModel:
+    """model.keras scored with model.predict, batch_size titles per forward pass."""
+    def __init__(self, model_path, batch_size=BATCH_SIZE):
+        self.model = tf.keras.models.load_model(model_path, compile=False)
+        self.batch_size = batch_size
+
+    def predict_proba(self, titles):
+        """Returns an (n, 2) array of class probabilities for a list of titles."""
+        input_tensor = tf.constant([[title] for title in titles], dtype=tf.string)
+        logits = self.model.predict(input_tensor, batch_size=self.batch_size, verbose=0)
+        return tf.nn.softmax(logits, axis=1).numpy()
+
+
+def classify_stream(classifier, paths, out, output_format="csv", chunk_size=CHUNK_SIZE):
+    """
+    Classifies every title in paths and writes one result per title to out.
+
+    Titles are read and scored chunk_size at a time, so memory use does not
+    grow with the input.
+
+    Returns:
+        int: Number of titles classified
+    """
+    writer = None
+    if output_format == "csv":
+        writer = csv.writer(out)
+        writer.writerow(["source", "title", "prob_class0", "prob_class1", "label"])
+
+    total = 0
+    for chunk in chunked(read_titles(paths), chunk_size):
+        probs = classifier.predict_proba([title for _, title in chunk])
+
+        for (source, title), (p0, p1) in zip(chunk, probs):
+            label = int(p1 > p0)
+            if writer:
+                writer.writerow([source, title, f"{p0:.6f}", f"{p1:.6f}", label])
+            else:
+                out.write(json.dumps({"source": source, "title": title, "prob_class0": float(p0),
+                                      "prob_class1": float(p1), "label": label}) + "\n")
+        total += len(chunk)
+        print(f"Classified {total} titles...", file=sys.stderr)
+    return total
+
+
 def main():
-    if len(sys.argv) < 2:
+    parser = argparse.ArgumentParser(description="Classify referendum titles with model.keras")
+    parser.add_argument("title", nargs="*", help="Referendum title to classify")
+    parser.add_argument("--batch", nargs="+", metavar="FILE",
+                        help="Classify every title in these files ('-' for stdin); .csv files use their title column")
+    parser.add_argument("--output", help="Write batch results here instead of stdout")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="csv", help="Batch output format")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Titles per forward pass")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Titles read into memory at once")
+    parser.add_argument("--model", default="model.keras", help="Path to the trained model")
+    parser.add_argument("--cache-file", help="SQLite file keeping batch results across runs (per model version)")
+    parser.add_argument("--no-cache", action="store_true", help="Score every batch title, even repeated ones")
+    args = parser.parse_args()
+
+    if not args.title and not args.batch:
         print("Usage: ./inference.py \"Your referendum title here\"")
+        print("       ./inference.py --batch titles_data/polkadot.txt [--format jsonl] [--output results.csv]")
         sys.exit(1)
 
-    input_text = " ".join(sys.argv[1:])
+    model_path = args.model
+    if args.batch:
+        print(f"Loading model from {model_path}...", file=sys.stderr)
+        if args.no_cache:
+            classifier = KerasTitleModel(model_path, args.batch_size)
+        else:
+            # Repeated titles (and, with --cache-file, titles seen in earlier runs) skip the model
+            classifier = CachedClassifier(lambda path: KerasTitleModel(path, args.batch_size), model_path,
+                                          cache_file=args.cache_file)
+        out = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+        try:
+            total = classify_stream(classifier, args.batch, out, args.format, args.chunk_size)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+            if not args.no_cache:
+                classifier.close()
+        print(f"Done. Classified {total} titles.", file=sys.stderr)
+        if not args.no_cache:
+            stats = classifier.snapshot()
+            print(f"Cache: {stats['cache_hits'] + stats['cache_disk_hits']} hits, {stats['cache_misses']} misses "
+                  f"(hit rate {stats['cache_hit_rate'] or 0:.1%})", file=sys.stderr)
+        return
+
+    input_text = " ".join(args.title)
 
-    model_path = "model.keras"
     print(f"Loading model from {model_path}...")
     model = tf.keras.models.load_model(model_path, compile=False)
     print("Model loaded.\n")
@@ -0,0 +1,332 @@
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from lite_model import WHITESPACE_RE, standardize
+
+CACHE_SIZE = 100000
+COMMIT_EVERY = 1000
+
+
+def normalize_title(title):
+    """
+    Cache key for a title: the vectorizer's lower_and_strip_punctuation and whitespace split.
+
+    Titles with the same key give the model the same token ids, e.g.
+    "SmallTipper" and " smalltipper! " share one cache entry.
+    """
+    return " ".join(t for t in WHITESPACE_RE.split(standardize(title or "")) if t)
+
+
+def file_digest(path):
+    """SHA-1 of a file's bytes, used as the version of a model or pattern module."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class FileVersion:
+    """
+    Tracks the digest of a file that results depend on, such as model.keras.
+
+    The file is stat()ed at most every check_interval seconds and only
+    re-hashed when its size or modification time changed.
+    """
+    def __init__(self, path, check_interval=1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._checked = 0.0
+        self._stat = None
+        self._digest = None
+
+    def current(self):
+        now = time.monotonic()
+        if self._digest is None or now - self._checked >= self.check_interval:
+            self._checked = now
+            st = os.stat(self.path)
+            stat = (st.st_size, st.st_mtime_ns)
+            if stat != self._stat:
+                self._stat = stat
+                self._digest = file_digest(self.path)
+        return self._digest
+
+
+class ResultCache:
+    """
+    Bounded LRU of JSON-serializable results keyed by (version, key), optionally persisted to SQLite.
+
+    Lookups go memory -> database -> compute, and only the keys missing
+    from both are computed, in one call. When the version changes the
+    in-memory entries are dropped and database rows of other versions are
+    deleted, so stale results are never served.
+    """
+    def __init__(self, version, max_entries=CACHE_SIZE, path=None):
+        """
+        Args:
+            version (FileVersion or str): What cached results depend on; a str never changes
+            max_entries (int): Entries kept in memory
+            path (str, optional): SQLite database file for persistence across runs
+        """
+        self._version = version
+        self.max_entries = max_entries
+        self.path = path
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._pending = {}
+        self._db = None
+        self._db_version = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS results "
+                             "(version TEXT, key TEXT, value TEXT NOT NULL, PRIMARY KEY (version, key))")
+            self._db.commit()
+        self.version = self._current_version()
+
+    def _current_version(self):
+        return self._version if isinstance(self._version, str) else self._version.current()
+
+    def check_version(self):
+        """Returns True (after invalidating) when the version changed since the last lookup."""
+        version = self._current_version()
+        with self.lock:
+            if version == self.version:
+                return False
+            self.version = version
+            self.entries.clear()
+            self._pending = {}
+            self.invalidations += 1
+        return True
+
+    def _from_db(self, keys):
+        if self._db is None:
+            return {}
+        if self._db_version != self.version:
+            # First lookup under this version: rows written for any other version are stale
+            self._db.execute("DELETE FROM results WHERE version != ?", (self.version,))
+            self._db.commit()
+            self._db_version = self.version
+        found = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = self._db.execute(
+                f"SELECT key, value FROM results WHERE version = ? AND key IN ({','.join('?' * len(chunk))})",
+                [self.version] + chunk
+            ).fetchall()
+            found.update((key, json.loads(value)) for key, value in rows)
+        return found
+
+    def lookup(self, keys, compute, cacheable=None):
+        """
+        Returns the result for every key, calling compute(missing_keys) -> list of
+        results once for the distinct keys that are not cached.
+
+        Computed results for which cacheable(result) is False are returned but not stored.
+        """
+        self.check_version()
+        results, missing = {}, []
+        with self.lock:
+            for key in keys:
+                if key in results:
+                    continue
+                value = self.entries.get(key)
+                if value is not None:
+                    self.entries.move_to_end(key)
+                    results[key] = value
+                else:
+                    results[key] = None
+                    missing.append(key)
+            self.hits += len(keys) - len(missing)
+
+            stored = self._from_db(missing) if missing else {}
+            self.disk_hits += len(stored)
+            self.misses += len(missing) - len(stored)
+
+        computed = [key for key in missing if key not in stored]
+        values = compute(computed) if computed else []
+
+        with self.lock:
+            for key, value in stored.items():
+                results[key] = value
+                self.entries[key] = value
+            for key, value in zip(computed, values):
+                results[key] = value
+                if cacheable is not None and not cacheable(value):
+                    continue
+                self.entries[key] = value
+                if self._db is not None:
+                    self._pending[key] = json.dumps(value)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            if len(self._pending) >= COMMIT_EVERY:
+                self._commit()
+        return [results[key] for key in keys]
+
+    def _commit(self):
+        if self._db is not None and self._pending:
+            self._db.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+                                 [(self.version, key, value) for key, value in self._pending.items()])
+            self._db.commit()
+            self._pending = {}
+
+    def commit(self):
+        """Writes newly computed results to the database."""
+        with self.lock:
+            self._commit()
+
+    def close(self):
+        self.commit()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def snapshot(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "cache_hits": self.hits,
+            "cache_disk_hits": self.disk_hits,
+            "cache_misses": self.misses,
+            "cache_hit_rate": (self.hits + self.disk_hits) / lookups if lookups else None,
+            "cache_entries": len(self.entries),
+            "cache_invalidations": self.invalidations,
+            "cache_version": self.version[:12]
+        }
+
+
+class CachedClassifier:
+    """
+    Title classifier behind a ResultCache keyed by normalize_title() and the model file's digest.
+
+    Cache misses are scored on the first original title seen for each key;
+    titles sharing a key have the same token ids, so the cached
+    probabilities are the ones the model gives every one of them. When the
+    model file changes, the cache is invalidated and the model reloaded with load().
+    """
+    def __init__(self, load, model_path, method="predict_proba", max_entries=CACHE_SIZE, cache_file=None):
+        """
+        Args:
+            load (callable): Loads the model from model_path, e.g. LiteModel or TitleClassifier
+            model_path (str): Model file whose digest versions the cache
+            method (str): Model method returning (n, 2) probabilities for a list of titles
+            max_entries (int): Titles kept in memory
+            cache_file (str, optional): SQLite file to persist results across runs
+        """
+        self.load = load
+        self.model_path = model_path
+        self.method = method
+        self.cache = ResultCache(FileVersion(model_path), max_entries, cache_file)
+        self.model = load(model_path)
+        self.model_version = self.cache.version
+        self.reload_lock = threading.Lock()
+
+    def _score(self, titles):
+        def compute(keys):
+            with self.reload_lock:
+                if self.model_version != self.cache.version:
+                    self.model = self.load(self.model_path)
+                    self.model_version = self.cache.version
+                model = self.model
+            return getattr(model, self.method)([titles[key] for key in keys]).tolist()
+        return compute
+
+    def predict_proba(self, titles):
+        """Returns an (n, 2) array of class probabilities for a list of titles."""
+        keys = [normalize_title(t) for t in titles]
+        originals = {}
+        for key, title in zip(keys, titles):
+            originals.setdefault(key, title)
+        probs = self.cache.lookup(keys, self._score(originals))
+        return np.array(probs, dtype=np.float32).reshape(len(titles), 2)
+
+    predict = predict_proba
+
+    def snapshot(self):
+        return self.cache.snapshot()
+
+    def close(self):
+        self.cache.close()
+
+
+class CachedDetector:
+    """
+    RejectionPattern.detect()/detect_many() behind a ResultCache versioned by the pattern module's digest.
+
+    The regex tiers are case and punctuation sensitive ("NAY", "vote nay:"),
+    so detector results are keyed by the stripped title and a hash of the
+    stripped content rather than by normalize_title(). Results of checks that
+    ran out of the detector's time budget are not cached.
+    """
+    def __init__(self, detector, max_entries=CACHE_SIZE, cache_file=None):
+        module = sys.modules[type(detector).__module__]
+        self.detector = detector
+        self.cache = ResultCache(FileVersion(module.__file__), max_entries, cache_file)
+        budget_exceeded = getattr(module, "BUDGET_EXCEEDED", None)
+        self._timed_out = budget_exceeded[2] if budget_exceeded else None
+        # Columns are turned into text the way rejection_patterns does it (NaN, None -> ""),
+        # so the cache stores what the wrapped detector would return
+        self._to_str_list = getattr(module, "_to_str_list", list)
+
+    def _cacheable(self, row):
+        return row[2] != self._timed_out
+
+    @staticmethod
+    def key(title, content):
+        content = (content or "").strip()
+        return (title or "").strip() + "\0" + (hashlib.sha1(content.encode("utf-8")).hexdigest() if content else "")
+
+    def _detect(self, pairs):
+        def compute(keys):
+            detected = self.detector.detect_many([pairs[key][0] for key in keys], [pairs[key][1] for key in keys])
+            explanations = detected["explanations"]
+            return [[bool(is_nay), float(confidence), explanations[code]] for is_nay, confidence, code
+                    in zip(detected["is_nay_request"], detected["confidence"], detected["explanation_code"])]
+        return compute
+
+    def detect(self, title, content=""):
+        """Same result dict as RejectionPattern.detect()."""
+        key = self.key(title, content)
+        is_nay, confidence, explanation = self.cache.lookup([key], self._detect({key: (title, content)}),
+                                                            self._cacheable)[0]
+        return {"is_nay_request": is_nay, "confidence": confidence, "explanation": explanation}
+
+    def detect_many(self, titles, contents=None):
+        """Same columnar result as RejectionPattern.detect_many()."""
+        titles = self._to_str_list(titles)
+        contents = self._to_str_list(contents) if contents is not None else [""] * len(titles)
+        if len(contents) != len(titles):
+            raise ValueError(f"Got {len(titles)} titles but {len(contents)} contents")
+
+        keys = [self.key(t, c) for t, c in zip(titles, contents)]
+        rows = self.cache.lookup(keys, self._detect(dict(zip(keys, zip(titles, contents)))), self._cacheable)
+
+        explanation_codes = {}
+        codes = [explanation_codes.setdefault(explanation, len(explanation_codes)) for _, _, explanation in rows]
+        return {
+            "is_nay_request": np.array([row[0] for row in rows], dtype=bool),
+            "confidence": np.array([row[1] for row in rows], dtype=np.float64),
+            "explanation_code": np.array(codes, dtype=np.int32),
+            "explanations": list(explanation_codes)
+        }
+
+    def keyword_hits(self, text):
+        return self.detector.keyword_hits(text)
+
+    def snapshot(self):
+        return self.cache.snapshot()
+
+    def close(self):
+        self.cache.close()
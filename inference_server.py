@@ -0,0 +1,320 @@
+#!/usr/bin/python3
+import argparse
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import tensorflow as tf
+
+from inference_cache import CACHE_SIZE, CachedClassifier
+from numpy_model import padded_width, sequence_lengths
+
+DEFAULT_PORT = 8501
+MAX_BATCH_SIZE = 64
+MAX_WAIT_MS = 2.0
+
+
+class LatencyStats:
+    """
+    Rolling request latency record.
+    Keeps the most recent `window` samples and reports percentiles over them.
+    """
+    def __init__(self, window=10000):
+        self.window = window
+        self.samples = []
+        self.total = 0
+        self.lock = threading.Lock()
+
+    def record(self, seconds):
+        with self.lock:
+            self.total += 1
+            self.samples.append(seconds)
+            if len(self.samples) > self.window:
+                del self.samples[:len(self.samples) - self.window]
+
+    def snapshot(self):
+        with self.lock:
+            samples = np.array(self.samples, dtype=np.float64) * 1000.0
+            total = self.total
+        if len(samples) == 0:
+            return {"requests": total, "p50_ms": None, "p99_ms": None, "mean_ms": None}
+        return {
+            "requests": total,
+            "p50_ms": float(np.percentile(samples, 50)),
+            "p99_ms": float(np.percentile(samples, 99)),
+            "mean_ms": float(samples.mean())
+        }
+
+
+class TitleClassifier:
+    """
+    Loads model.keras once and scores titles with direct model calls,
+    skipping the per-call setup that model.predict does.
+
+    Titles are vectorized separately and the remaining layers run on ids
+    trimmed to the batch's padded_width(), which gives the same output as
+    the full output_sequence_length padding at a fraction of the work.
+    """
+    def __init__(self, model_path="model.keras"):
+        self.model_path = model_path
+        self.model = tf.keras.models.load_model(model_path, compile=False)
+        self.vectorize = self.model.layers[0]
+        self.int_model = tf.keras.Sequential(self.model.layers[1:])
+        self.lock = threading.Lock()
+
+    def warmup(self, batch_sizes=(1, 8, 64)):
+        # Trace the graph for the common batch shapes before the first real request
+        for bs in batch_sizes:
+            self.predict(["warmup title"] * bs)
+
+    def predict(self, titles):
+        """Returns an (n, 2) array of class probabilities for a list of titles."""
+        ids = self.vectorize(tf.constant(titles, dtype=tf.string)).numpy()
+        width = padded_width(sequence_lengths(ids), ids.shape[1]).max()
+        with self.lock:
+            logits = self.int_model(ids[:, :width], training=False)
+        return tf.nn.softmax(logits, axis=1).numpy()
+
+
+class MicroBatcher:
+    """
+    Request queue in front of the classifier.
+
+    Concurrent submit() calls are coalesced into one forward pass of up to
+    max_batch_size titles. A batch is sent as soon as it is full, or
+    max_wait_ms after its first request arrived, whichever comes first.
+    The classifier attribute may be replaced while running; the next batch uses the new one.
+    """
+    def __init__(self, classifier, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+        self.classifier = classifier
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.requests = queue.Queue()
+        self.batches = 0
+        self.batched_titles = 0
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, titles):
+        """Queues a list of titles; the returned Future resolves to their (n, 2) probabilities."""
+        if self.closed:
+            raise RuntimeError("MicroBatcher is closed")
+        future = Future()
+        if not titles:
+            future.set_result(np.zeros((0, 2)))
+        else:
+            self.requests.put((titles, future))
+        return future
+
+    def predict(self, titles):
+        return self.submit(titles).result()
+
+    def _collect(self):
+        """Blocks for the first request, then gathers more until the batch is full or the wait runs out."""
+        batch = [self.requests.get()]
+        if batch[0] is None:
+            return batch
+        size = len(batch[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self.requests.get(timeout=remaining) if remaining > 0 else self.requests.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+            if item is None:
+                break
+            size += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            # close() queues None after the last request
+            closed = batch[-1] is None
+            if closed:
+                batch.pop()
+            if batch:
+                self._predict(batch)
+            if closed:
+                return
+
+    def _predict(self, batch):
+        titles = [t for request_titles, _ in batch for t in request_titles]
+        try:
+            probs = self.classifier.predict(titles)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.batched_titles += len(titles)
+        offset = 0
+        for request_titles, future in batch:
+            future.set_result(probs[offset:offset + len(request_titles)])
+            offset += len(request_titles)
+
+    def close(self):
+        """Answers the requests already queued, then stops the batching thread."""
+        if not self.closed:
+            self.closed = True
+            self.requests.put(None)
+            self.thread.join()
+
+    def snapshot(self):
+        return {
+            "batches": self.batches,
+            "mean_batch_size": self.batched_titles / self.batches if self.batches else None,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0
+        }
+
+
+class ModelLoader:
+    """
+    Loads and warms up a TitleClassifier, behind one long-lived MicroBatcher when batching.
+
+    Used as CachedClassifier's load(): a reload swaps the model behind the
+    same batcher instead of starting another batching thread.
+    """
+    def __init__(self, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS, model_class=TitleClassifier):
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.model_class = model_class
+        self.batcher = None
+
+    def __call__(self, model_path):
+        print(f"Loading model from {model_path}...")
+        classifier = self.model_class(model_path)
+        classifier.warmup()
+        print("Model loaded and warmed up.")
+        if self.max_batch_size <= 1:
+            return classifier
+        if self.batcher is None:
+            self.batcher = MicroBatcher(classifier, self.max_batch_size, self.max_wait_ms)
+            print(f"Micro-batching up to {self.max_batch_size} titles, waiting at most {self.max_wait_ms} ms")
+        else:
+            self.batcher.classifier = classifier
+        return self.batcher
+
+    def close(self):
+        if self.batcher is not None:
+            self.batcher.close()
+
+
+class InferenceHTTPServer(ThreadingHTTPServer):
+    # The socketserver default backlog of 5 resets connections under concurrent load
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def make_handler(classifier, stats):
+    class InferenceHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, body):
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                body = stats.snapshot()
+                model = classifier
+                if isinstance(model, CachedClassifier):
+                    body.update(model.snapshot())
+                    model = model.model
+                if isinstance(model, MicroBatcher):
+                    body.update(model.snapshot())
+                self._send_json(200, body)
+            elif self.path == "/health":
+                self._send_json(200, {"status": "ok"})
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/classify":
+                self._send_json(404, {"error": "not found"})
+                return
+
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if not isinstance(body, dict):
+                    raise ValueError("expected a JSON object")
+                if "titles" in body:
+                    titles = body["titles"]
+                elif "title" in body:
+                    titles = [body["title"]]
+                else:
+                    raise ValueError("expected 'title' or 'titles'")
+                if not isinstance(titles, list) or not all(isinstance(t, str) for t in titles):
+                    raise ValueError("titles must be strings")
+            except ValueError as e:
+                self._send_json(400, {"error": str(e)})
+                return
+
+            start = time.perf_counter()
+            try:
+                probs = classifier.predict(titles) if titles else np.zeros((0, 2))
+            except Exception as e:
+                # Includes errors the MicroBatcher hands back for the whole batch
+                self._send_json(500, {"error": f"classification failed: {e}"})
+                return
+            stats.record(time.perf_counter() - start)
+
+            self._send_json(200, {
+                "probabilities": probs.tolist(),
+                "labels": [int(np.argmax(p)) for p in probs]
+            })
+
+        def log_message(self, format, *args):
+            pass
+
+    return InferenceHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve SSCModel title classification over localhost HTTP")
+    parser.add_argument("--model", default="model.keras", help="Path to the trained model")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to bind")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on")
+    parser.add_argument("--max-batch-size", type=int, default=MAX_BATCH_SIZE,
+                        help="Most titles coalesced into one forward pass (1 disables batching)")
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS,
+                        help="Longest a request waits for others to share its batch")
+    parser.add_argument("--cache-size", type=int, default=CACHE_SIZE,
+                        help="Normalized titles whose results are kept in memory (0 disables the cache)")
+    parser.add_argument("--cache-file", help="SQLite file keeping results across restarts (per model version)")
+    args = parser.parse_args()
+
+    load = ModelLoader(args.max_batch_size, args.max_wait_ms)
+    if args.cache_size > 0:
+        # Invalidated and reloaded when the model file changes
+        classifier = CachedClassifier(load, args.model, "predict", args.cache_size, args.cache_file)
+    else:
+        classifier = load(args.model)
+
+    server = InferenceHTTPServer((args.host, args.port), make_handler(classifier, LatencyStats()))
+    print(f"Serving on http://{args.host}:{args.port} (POST /classify, GET /stats)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if isinstance(classifier, CachedClassifier):
+            classifier.close()
+        load.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/python3
+import re
+import sys
+import numpy as np
+
+from numpy_model import NumpyForward, load_keras_weights
+
+LITE_MODEL_PATH = "model_lite.npz"
+
+# Same character class as Keras' DEFAULT_STRIP_REGEX used by lower_and_strip_punctuation
+STRIP_PUNCTUATION_RE = re.compile(r'[!"#$%&()\*\+,-\./:;<=>?@\[\\\]^_`{|}~\']')
+# tf.strings.split() splits on runs of ASCII whitespace only
+WHITESPACE_RE = re.compile(r'[ \t\n\v\f\r]+')
+
+WEIGHT_NAMES = ["embedding", "conv_kernel", "conv_bias", "dense_kernel", "dense_bias", "output_kernel", "output_bias"]
+
+
+def standardize(text):
+    """Python equivalent of TextVectorization(standardize="lower_and_strip_punctuation")."""
+    return STRIP_PUNCTUATION_RE.sub("", text.lower())
+
+
+class Tokenizer:
+    """
+    Maps titles to the int sequences TextVectorization(output_mode="int") produces:
+    index 0 is padding, index 1 is [UNK], sequences are cut or zero-padded to sequence_length.
+    """
+    def __init__(self, vocabulary, sequence_length):
+        self.sequence_length = sequence_length
+        self.index = {token: i for i, token in enumerate(vocabulary) if i > 1}
+
+    def encode(self, titles):
+        ids = np.zeros((len(titles), self.sequence_length), dtype=np.int32)
+        for row, title in enumerate(titles):
+            tokens = [t for t in WHITESPACE_RE.split(standardize(title)) if t][:self.sequence_length]
+            ids[row, :len(tokens)] = [self.index.get(t, 1) for t in tokens]
+        return ids
+
+
+def dequantize(artifact, name):
+    """Returns a float32 weight from the artifact, undoing int8 or float16 quantization."""
+    if name + "_scale" in artifact:
+        return artifact[name].astype(np.float32) * artifact[name + "_scale"]
+    return artifact[name].astype(np.float32)
+
+
+class LiteModel:
+    """
+    TensorFlow-free runtime for the artifact written by export_model.py.
+    Runs the SSCModel forward pass with NumPy:
+    embedding -> Conv1D(k=3, relu) -> global max pool -> Dense(relu) -> Dense.
+    A model.keras path is also accepted and read directly (needs h5py).
+    """
+    def __init__(self, path=LITE_MODEL_PATH):
+        if path.endswith(".keras"):
+            self.quantization = "float32"
+            weights, vocabulary, sequence_length = load_keras_weights(path)
+        else:
+            with np.load(path) as artifact:
+                self.quantization = str(artifact["quantization"])
+                vocabulary, sequence_length = artifact["vocabulary"].tolist(), int(artifact["sequence_length"])
+                weights = {name: dequantize(artifact, name) for name in WEIGHT_NAMES}
+        self.tokenizer = Tokenizer(vocabulary, sequence_length)
+        self.forward = NumpyForward(weights)
+
+    def predict_proba(self, titles):
+        """Returns an (n, 2) array of class probabilities for a list of titles."""
+        return self.forward.predict_proba(self.tokenizer.encode(titles))
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: ./lite_model.py \"Your referendum title here\"")
+        sys.exit(1)
+
+    probs = LiteModel().predict_proba([" ".join(sys.argv[1:])])[0]
+    print(f"Prob(class0)={probs[0]:.4f}, Prob(class1)={probs[1]:.4f}")
+    if np.argmax(probs) == 1:
+        print("Model prediction: This title indicates a 'vote nay' request.")
+    else:
+        print("Model prediction: This title does NOT indicate a 'vote nay' request.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+import argparse
+import csv
+import json
+import random
+import threading
+import time
+import urllib.request
+
+import numpy as np
+
+DEFAULT_PORT = 8501  # inference_server.DEFAULT_PORT, not imported to keep TensorFlow out of the client
+
+
+def load_titles(csv_file="data.csv"):
+    with open(csv_file, "r", encoding="utf-8") as f:
+        return [row["title"] for row in csv.DictReader(f) if row.get("title")]
+
+
+def post_json(url, body):
+    request = urllib.request.Request(url, data=json.dumps(body).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=60) as response:
+        return json.loads(response.read())
+
+
+def run_client(url, titles, requests_per_client, titles_per_request, latencies, seed):
+    rng = random.Random(seed)
+    for _ in range(requests_per_client):
+        batch = [rng.choice(titles) for _ in range(titles_per_request)]
+        start = time.perf_counter()
+        result = post_json(url + "/classify", {"titles": batch})
+        latencies.append(time.perf_counter() - start)
+        assert len(result["probabilities"]) == len(batch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic load generator for inference_server.py")
+    parser.add_argument("--url", default=f"http://127.0.0.1:{DEFAULT_PORT}", help="Inference server URL")
+    parser.add_argument("--data", default="data.csv", help="CSV file to draw titles from")
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=100, help="Requests sent by each client")
+    parser.add_argument("--titles-per-request", type=int, default=1, help="Titles in each request")
+    args = parser.parse_args()
+
+    titles = load_titles(args.data)
+    latencies = []
+    threads = [
+        threading.Thread(target=run_client,
+                         args=(args.url, titles, args.requests, args.titles_per_request, latencies, seed))
+        for seed in range(args.clients)
+    ]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000.0
+    total_titles = len(latencies) * args.titles_per_request
+    print(f"Sent {len(latencies)} requests ({total_titles} titles) from {args.clients} clients in {elapsed:.2f}s")
+    print(f"Throughput: {len(latencies) / elapsed:.1f} requests/s, {total_titles / elapsed:.1f} titles/s")
+    print(f"Client latency: p50={np.percentile(latencies_ms, 50):.2f} ms, "
+          f"p99={np.percentile(latencies_ms, 99):.2f} ms")
+
+    with urllib.request.urlopen(args.url + "/stats", timeout=10) as response:
+        print(f"Server stats: {json.loads(response.read())}")
+
+
+if __name__ == "__main__":
+    main()
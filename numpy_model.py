@@ -0,0 +1,134 @@
+import io
+import json
+import zipfile
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Groups Keras gives each layer type in model.weights.h5; repeats get a _1, _2, ... suffix
+H5_LAYER_GROUPS = {"Embedding": "embedding", "Conv1D": "conv1d", "Dense": "dense"}
+
+
+def load_keras_weights(model_path="model.keras"):
+    """
+    Reads the vocabulary and weights straight out of a saved model.keras archive, without TensorFlow.
+
+    Returns:
+        tuple: (weights dict as used by NumpyForward, vocabulary list, sequence length)
+    """
+    import h5py
+
+    with zipfile.ZipFile(model_path) as archive:
+        config = json.loads(archive.read("config.json"))
+        weights_file = io.BytesIO(archive.read("model.weights.h5"))
+        vocab_file = next(name for name in archive.namelist() if name.endswith("text_vectorization/vocabulary.txt"))
+        vocabulary = archive.read(vocab_file).decode("utf-8").split("\n")
+        if vocabulary[-1] == "" and len(vocabulary) > 1:
+            vocabulary.pop()
+
+    layers = config["config"]["layers"]
+    vectorize = next(layer["config"] for layer in layers if layer["class_name"] == "TextVectorization")
+
+    groups, seen = [], {}
+    for layer in layers:
+        group = H5_LAYER_GROUPS.get(layer["class_name"])
+        if group:
+            count = seen.get(group, 0)
+            seen[group] = count + 1
+            groups.append(group if count == 0 else f"{group}_{count}")
+
+    with h5py.File(weights_file, "r") as h5:
+        embedding, conv, dense, output = [[h5[f"layers/{g}/vars/{i}"][()] for i in range(len(h5[f"layers/{g}/vars"]))]
+                                          for g in groups]
+
+    weights = {
+        "embedding": embedding[0],
+        "conv_kernel": conv[0], "conv_bias": conv[1],
+        "dense_kernel": dense[0], "dense_bias": dense[1],
+        "output_kernel": output[0], "output_bias": output[1]
+    }
+    return weights, vocabulary, vectorize["output_sequence_length"]
+
+
+def sequence_lengths(ids):
+    """Number of tokens in each row of a zero-padded id matrix (TextVectorization never emits 0 for a token)."""
+    return np.count_nonzero(ids, axis=1)
+
+
+def padded_width(lengths, full_width, kernel_size=3):
+    """
+    Shortest padding that gives the same prediction as padding to full_width.
+
+    With "valid" convolution and a global max pool, the output only depends
+    on the set of distinct windows. Padding a sequence of length L to at
+    least L + kernel_size keeps the windows that overlap the end and at
+    least one all-padding window, which is every distinct window the fully
+    padded sequence has. Widths are rounded up to powers of two so batches
+    group into a few buckets.
+    """
+    needed = np.asarray(lengths) + kernel_size
+    width = np.left_shift(1, np.ceil(np.log2(np.maximum(needed, 1))).astype(np.int64))
+    return np.minimum(width, full_width)
+
+
+class NumpyForward:
+    """
+    Vectorized NumPy forward pass of the SSCModel architecture on batches of token ids.
+
+    Weights are held as contiguous float32 arrays. The Conv1D runs as one
+    im2col matrix multiply over all windows of the batch, and bias + ReLU
+    are applied after the global max pool: both are monotonic per channel,
+    so relu(max(conv) + b) == max(relu(conv + b)) at a fraction of the work.
+    """
+    def __init__(self, weights):
+        def f32(name):
+            return np.ascontiguousarray(weights[name], dtype=np.float32)
+
+        self.embedding = f32("embedding")
+        kernel = f32("conv_kernel")  # (kernel_size, channels_in, channels_out)
+        self.kernel_size = kernel.shape[0]
+        # sliding_window_view puts the window axis last, so flatten the kernel as (channels_in, kernel_size)
+        self.conv_kernel = np.ascontiguousarray(kernel.transpose(1, 0, 2).reshape(-1, kernel.shape[2]))
+        self.conv_bias = f32("conv_bias")
+        self.dense_kernel = f32("dense_kernel")
+        self.dense_bias = f32("dense_bias")
+        self.output_kernel = f32("output_kernel")
+        self.output_bias = f32("output_bias")
+
+    def logits(self, ids, length_aware=True):
+        """
+        Returns (n, 2) logits for an (n, sequence_length) int array of token ids.
+
+        With length_aware, rows are grouped by padded_width() and each group
+        runs on its trimmed ids, so short titles skip most of the padding.
+        """
+        if not length_aware:
+            return self._logits(ids)
+        widths = padded_width(sequence_lengths(ids), ids.shape[1], self.kernel_size)
+        if len(ids) and (widths == widths[0]).all():
+            return self._logits(ids[:, :widths[0]])
+
+        logits = np.empty((len(ids), self.output_bias.shape[0]), dtype=np.float32)
+        for width in np.unique(widths):
+            rows = np.flatnonzero(widths == width)
+            logits[rows] = self._logits(ids[rows, :width])
+        return logits
+
+    def _logits(self, ids):
+        x = self.embedding.take(ids, axis=0)                           # (n, length, channels)
+        windows = sliding_window_view(x, self.kernel_size, axis=1)     # (n, steps, channels, kernel_size)
+        n, steps = windows.shape[:2]
+        conv = windows.reshape(n * steps, -1) @ self.conv_kernel        # im2col
+        pooled = conv.reshape(n, steps, -1).max(axis=1)
+        pooled += self.conv_bias
+        np.maximum(pooled, 0, out=pooled)
+        hidden = pooled @ self.dense_kernel
+        hidden += self.dense_bias
+        np.maximum(hidden, 0, out=hidden)
+        logits = hidden @ self.output_kernel
+        logits += self.output_bias
+        return logits
+
+    def predict_proba(self, ids, length_aware=True):
+        logits = self.logits(ids, length_aware)
+        exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return exp / exp.sum(axis=1, keepdims=True)
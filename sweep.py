@@ -0,0 +1,236 @@
+#!/usr/bin/python3
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import tensorflow as tf
+
+from train import (DEFAULT_CONFIG, SPLIT_CONFIG, TrainingSummaryCallback, build_model, load_corpus,
+                   make_callbacks, make_dataset, make_vectorizer_config, tokenize_corpus)
+
+SWEEP_DIR = "sweep_results"
+
+DEFAULT_SEARCH_SPACE = {
+    "embed_dim": [16, 32, 64],
+    "conv_filters": [16, 32, 64],
+    "class_weights": [[1.0, 2.0], [1.0, 3.0]],
+    "batch_size": [64, 512],
+    "learning_rate": [5e-4, 1e-3, 3e-3]
+}
+
+LEADERBOARD_FIELDS = [
+    "trial", "status", "val_loss", "val_accuracy", "epochs", "params", "size_kib",
+    "latency_b1_ms", "latency_b32_ms", "train_seconds"
+]
+
+
+def expand_search_space(space, trials=None, seed=42):
+    """
+    Turns {param: [values]} into a list of full trial configs.
+    Without trials the whole grid is run, otherwise a random sample of that many points.
+    """
+    names = sorted(space)
+    grid = [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+    if trials and trials < len(grid):
+        grid = random.Random(seed).sample(grid, trials)
+    return [{**DEFAULT_CONFIG, **point} for point in grid]
+
+
+class MedianPruningCallback(tf.keras.callbacks.Callback):
+    """
+    Stops a trial whose best val_loss at a milestone epoch is worse than the median
+    the other trials reported at the same milestone.
+
+    Reports go through a multiprocessing Manager dict shared by all workers,
+    keyed by (milestone epoch, trial id).
+    """
+    def __init__(self, trial_id, reports, every=10, min_trials=3):
+        super().__init__()
+        self.trial_id = trial_id
+        self.reports = reports
+        self.every = every
+        self.min_trials = min_trials
+        self.best = float("inf")
+        self.pruned = False
+
+    def on_epoch_end(self, epoch, logs=None):
+        val_loss = (logs or {}).get("val_loss")
+        if val_loss is not None:
+            self.best = min(self.best, val_loss)
+        milestone = epoch + 1
+        if milestone % self.every:
+            return
+
+        self.reports[(milestone, self.trial_id)] = self.best
+        others = [loss for (m, trial), loss in self.reports.items() if m == milestone and trial != self.trial_id]
+        if len(others) >= self.min_trials and self.best > statistics.median(others):
+            self.pruned = True
+            self.model.stop_training = True
+
+
+def init_worker(threads):
+    # Must run before the worker's first TensorFlow op
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(threads)
+
+
+def measure_latency(model, ids, repeats=50):
+    """Median milliseconds of a direct model call on ids."""
+    model(ids, training=False)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model(ids, training=False)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000.0
+
+
+def run_trial(trial_id, config, data_file, epochs, patience, reports, prune_every, prune_min_trials):
+    """Trains one configuration and returns its leaderboard row."""
+    texts, labels = load_corpus(data_file)
+    # Served from the token cache the parent filled before starting the pool
+    _, (train_ids, y_train), (val_ids, y_val) = tokenize_corpus(
+        texts, labels, make_vectorizer_config(config), SPLIT_CONFIG, verbose=0
+    )
+    train_ds = make_dataset(train_ids, y_train, config["batch_size"])
+    val_ds = make_dataset(val_ids, y_val, config["batch_size"])
+
+    model = build_model(config)
+    pruner = MedianPruningCallback(trial_id, reports, prune_every, prune_min_trials)
+    summary = TrainingSummaryCallback(epochs, verbose=0)
+    callbacks = make_callbacks(config["learning_rate"], patience, verbose=0) + [pruner]
+
+    start = time.perf_counter()
+    model.fit(train_ds, validation_data=val_ds, epochs=epochs, callbacks=callbacks + [summary], verbose=0)
+    train_seconds = time.perf_counter() - start
+    val_loss, val_acc = model.evaluate(val_ds, verbose=0)
+
+    params = model.count_params()
+    return {
+        "trial": trial_id,
+        "status": "pruned" if pruner.pruned else "complete",
+        "val_loss": round(float(val_loss), 5),
+        "val_accuracy": round(float(val_acc), 5),
+        "epochs": summary.epochs_run,
+        "params": params,
+        "size_kib": round(params * 4 / 1024, 1),
+        "latency_b1_ms": round(measure_latency(model, val_ids[:1]), 3),
+        "latency_b32_ms": round(measure_latency(model, val_ids[:32]), 3),
+        "train_seconds": round(train_seconds, 1),
+        "config": config
+    }
+
+
+def failed_trial(trial_id, config, error):
+    """Leaderboard row for a trial whose worker raised error."""
+    return {**{field: None for field in LEADERBOARD_FIELDS}, "trial": trial_id, "status": "failed",
+            "error": f"{type(error).__name__}: {error}", "config": config}
+
+
+def write_leaderboard(results, output_dir):
+    """
+    Writes leaderboard.csv/.json ranked by val_loss (completed trials first) and best_config.json.
+
+    Failed trials are listed unranked after the others. Returns the ranked trials.
+    """
+    ranked = sorted((r for r in results if r["status"] != "failed"),
+                    key=lambda r: (r["status"] != "complete", r["val_loss"]))
+    failed = sorted((r for r in results if r["status"] == "failed"), key=lambda r: r["trial"])
+    os.makedirs(output_dir, exist_ok=True)
+
+    with open(os.path.join(output_dir, "leaderboard.json"), "w", encoding="utf-8") as f:
+        json.dump(ranked + failed, f, indent=2)
+
+    param_names = sorted(DEFAULT_CONFIG)
+    with open(os.path.join(output_dir, "leaderboard.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["rank"] + LEADERBOARD_FIELDS + param_names)
+        for rank, result in list(enumerate(ranked, 1)) + [("", result) for result in failed]:
+            writer.writerow([rank] + [result[field] for field in LEADERBOARD_FIELDS] +
+                            [json.dumps(result["config"][name]) for name in param_names])
+
+    if ranked and ranked[0]["status"] == "complete":
+        with open(os.path.join(output_dir, "best_config.json"), "w", encoding="utf-8") as f:
+            json.dump(ranked[0]["config"], f, indent=2)
+    return ranked
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a parallel hyperparameter sweep for SSCModel")
+    parser.add_argument("--space", help="JSON file mapping hyperparameters to lists of values")
+    parser.add_argument("--trials", type=int, help="Randomly sample this many points instead of the full grid")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for --trials sampling")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="Trials trained in parallel")
+    parser.add_argument("--threads", type=int, help="TensorFlow threads per worker (default cores / workers)")
+    parser.add_argument("--epochs", type=int, default=200, help="Maximum epochs per trial")
+    parser.add_argument("--patience", type=int, default=20, help="Early stopping patience per trial")
+    parser.add_argument("--prune-every", type=int, default=10, help="Epochs between pruning checks")
+    parser.add_argument("--prune-min-trials", type=int, default=3,
+                        help="Reports needed at a milestone before trials are pruned")
+    parser.add_argument("--data", default="data.csv", help="Labeled titles")
+    parser.add_argument("--output", default=SWEEP_DIR, help="Directory for the leaderboard")
+    args = parser.parse_args()
+
+    space = DEFAULT_SEARCH_SPACE
+    if args.space:
+        with open(args.space, "r", encoding="utf-8") as f:
+            space = json.load(f)
+    configs = expand_search_space(space, args.trials, args.seed)
+    threads = args.threads or max(1, (os.cpu_count() or 1) // args.workers)
+
+    # Tokenize once per distinct vectorizer config; trials then load it from the token cache
+    texts, labels = load_corpus(args.data)
+    for vectorizer in {json.dumps(make_vectorizer_config(c), sort_keys=True) for c in configs}:
+        tokenize_corpus(texts, labels, json.loads(vectorizer), SPLIT_CONFIG)
+
+    print(f"Running {len(configs)} trials on {args.workers} workers with {threads} TensorFlow threads each")
+    context = multiprocessing.get_context("spawn")
+    results = []
+    start = time.perf_counter()
+    with context.Manager() as manager:
+        reports = manager.dict()
+        with ProcessPoolExecutor(max_workers=args.workers, mp_context=context,
+                                 initializer=init_worker, initargs=(threads,)) as executor:
+            futures = {
+                executor.submit(run_trial, trial_id, config, args.data, args.epochs, args.patience,
+                                reports, args.prune_every, args.prune_min_trials): trial_id
+                for trial_id, config in enumerate(configs)
+            }
+            for future in as_completed(futures):
+                trial_id = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # A crashed trial (or worker) is recorded, the others keep running
+                    result = failed_trial(trial_id, configs[trial_id], e)
+                    results.append(result)
+                    print(f"Trial {trial_id:>3}   failed: {result['error']}")
+                    continue
+                results.append(result)
+                print(f"Trial {result['trial']:>3} {result['status']:>8} after {result['epochs']:>3} epochs: "
+                      f"val_loss={result['val_loss']:.4f} val_accuracy={result['val_accuracy']:.4f} "
+                      f"({result['train_seconds']:.0f}s)")
+
+    ranked = write_leaderboard(results, args.output)
+    failed = len(results) - len(ranked)
+    print(f"\nSweep finished in {time.perf_counter() - start:.0f}s. Leaderboard written to {args.output}/")
+    if failed:
+        print(f"{failed} trials failed and are not ranked")
+    for rank, result in enumerate(ranked[:5], 1):
+        print(f"{rank}. trial {result['trial']} val_loss={result['val_loss']:.4f} "
+              f"val_accuracy={result['val_accuracy']:.4f} params={result['params']} "
+              f"latency_b1={result['latency_b1_ms']:.2f}ms")
+    if ranked and ranked[0]["status"] == "complete":
+        print(f"Train the best configuration with: python3 train.py --config {args.output}/best_config.json")
+
+
+if __name__ == "__main__":
+    main()
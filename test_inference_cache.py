@@ -0,0 +1,189 @@
+import importlib.util
+import os
+import sys
+import numpy as np
+
+from inference_cache import CachedClassifier, CachedDetector, FileVersion, ResultCache, normalize_title
+
+# CachedDetector finds this in the detector's module, as it does in rejection_patterns
+BUDGET_EXCEEDED = (False, 0.0, "Time budget exceeded")
+
+
+class StubModel:
+    """Scores by title length; records every batch it was asked for."""
+    def __init__(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            self.offset = float(f.read())
+        self.calls = []
+
+    def predict_proba(self, titles):
+        self.calls.append(list(titles))
+        p1 = np.array([min(len(t) / 100.0 + self.offset, 1.0) for t in titles])
+        return np.stack([1.0 - p1, p1], axis=1)
+
+
+class StubDetector:
+    def __init__(self):
+        self.calls = 0
+
+    def detect_many(self, titles, contents):
+        self.calls += len(titles)
+        is_nay = np.array(["NAY" in t for t in titles])
+        return {"is_nay_request": is_nay, "confidence": np.where(is_nay, 0.95, 0.9),
+                "explanation_code": is_nay.astype(np.int32), "explanations": ["none", "nay"]}
+
+
+class StubTimedDetector(StubDetector):
+    """Like rejection_patterns: titles containing 'slow' run out of the time budget."""
+    def detect_many(self, titles, contents):
+        self.calls += len(titles)
+        slow = np.array(["slow" in t for t in titles])
+        return {"is_nay_request": np.zeros(len(titles), dtype=bool), "confidence": np.where(slow, 0.0, 0.9),
+                "explanation_code": slow.astype(np.int32), "explanations": ["none", BUDGET_EXCEEDED[2]]}
+
+
+def write_model(path, offset):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(str(offset))
+    # Make sure the change is visible even on filesystems with coarse mtimes
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_normalize_title():
+    assert normalize_title("  SmallTipper ") == normalize_title("smalltipper!") == "smalltipper"
+    assert normalize_title("Vote  NAY,\tplease") == "vote nay please"
+    assert normalize_title("Café – refund") == "café – refund"
+    assert normalize_title(None) == normalize_title("") == ""
+
+
+def test_lru_eviction_and_hit_rate():
+    cache = ResultCache("v1", max_entries=2)
+    computed = []
+
+    def compute(keys):
+        computed.extend(keys)
+        return [len(k) for k in keys]
+
+    assert cache.lookup(["a", "bb", "a"], compute) == [1, 2, 1]
+    assert computed == ["a", "bb"]
+    assert cache.lookup(["ccc"], compute) == [3]     # evicts "a"
+    assert cache.lookup(["bb", "a"], compute) == [2, 1]
+    assert computed == ["a", "bb", "ccc", "a"]
+    snapshot = cache.snapshot()
+    assert snapshot["cache_entries"] == 2
+    assert snapshot["cache_hits"] + snapshot["cache_misses"] == 6
+
+
+def test_persistence_across_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResultCache("v1", path=path)
+    cache.lookup(["x", "y"], lambda keys: [[k, 1.5] for k in keys])
+    cache.close()
+
+    cache = ResultCache("v1", path=path)
+    assert cache.lookup(["x", "y"], lambda keys: 1 / 0) == [["x", 1.5], ["y", 1.5]]
+    assert cache.snapshot()["cache_disk_hits"] == 2
+    cache.close()
+
+    # Another version never sees the old rows
+    cache = ResultCache("v2", path=path)
+    assert cache.lookup(["x"], lambda keys: ["new"]) == ["new"]
+    cache.close()
+
+
+def test_classifier_invalidated_when_model_changes(tmp_path):
+    model_path = str(tmp_path / "model.keras")
+    write_model(model_path, 0.0)
+    classifier = CachedClassifier(StubModel, model_path)
+    classifier.cache._version = FileVersion(model_path, check_interval=0.0)
+
+    first = classifier.predict_proba(["SmallTipper", "smalltipper!", "Big Spender"])
+    assert np.allclose(first[0], first[1])
+    # The model scores the original titles, not the cache keys
+    assert classifier.model.calls == [["SmallTipper", "Big Spender"]]
+    classifier.predict_proba(["SMALLTIPPER"])
+    assert classifier.snapshot()["cache_hits"] == 2
+
+    write_model(model_path, 0.5)
+    second = classifier.predict_proba(["SmallTipper"])
+    assert classifier.model.offset == 0.5
+    assert np.isclose(second[0, 1], first[0, 1] + 0.5)
+    assert classifier.snapshot()["cache_invalidations"] == 1
+
+
+def test_classifier_matches_uncached(tmp_path):
+    model_path = str(tmp_path / "model.keras")
+    write_model(model_path, 0.0)
+    titles = ["Café refund", "Caf refund", "Référendum", "Rfrendum", "Café refund"]
+    cached = CachedClassifier(StubModel, model_path).predict_proba(titles)
+    assert np.allclose(cached, StubModel(model_path).predict_proba(titles))
+
+
+def test_detector_cache_keeps_case():
+    stub = StubDetector()
+    detector = CachedDetector(stub)
+    result = detector.detect_many(["Vote NAY", "vote nay", "Vote NAY"], ["", "", ""])
+    assert result["is_nay_request"].tolist() == [True, False, True]
+    assert [result["explanations"][c] for c in result["explanation_code"]] == ["nay", "none", "nay"]
+    assert stub.calls == 2
+    assert detector.detect("Vote NAY")["confidence"] == 0.95
+    assert stub.calls == 2
+
+
+def load_rejection_patterns():
+    module = sys.modules.get("rejection_patterns")
+    if module is None:
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "v2 - titles & content",
+                            "rejection_patterns.py")
+        spec = importlib.util.spec_from_file_location("rejection_patterns", path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["rejection_patterns"] = module
+        spec.loader.exec_module(module)
+    return module
+
+
+def test_detector_cache_matches_detector_on_missing_cells():
+    detector = load_rejection_patterns().RejectionPattern()
+    titles = np.array(["nan", float("nan"), None, "Please vote nay"], dtype=object)
+    contents = np.array([float("nan"), "nan", b"reject this", None], dtype=object)
+    expected = detector.detect_many(titles, contents)
+
+    seen = []
+    detect_many = detector.detect_many
+    detector.detect_many = lambda t, c: seen.append((list(t), list(c))) or detect_many(t, c)
+    result = CachedDetector(detector).detect_many(titles, contents)
+
+    # Missing cells reach the detector as "" and bytes are decoded, as in RejectionPattern.detect_many()
+    assert seen == [(["nan", "", "", "Please vote nay"], ["", "nan", "reject this", ""])]
+    assert result["confidence"].tolist() == expected["confidence"].tolist()
+    assert ([result["explanations"][c] for c in result["explanation_code"]] ==
+            [expected["explanations"][c] for c in expected["explanation_code"]])
+
+
+def test_detector_cache_skips_timeouts():
+    stub = StubTimedDetector()
+    detector = CachedDetector(stub)
+    for _ in range(2):
+        result = detector.detect_many(["slow one", "fast one"], ["", ""])
+        assert result["confidence"].tolist() == [0.0, 0.9]
+    # The timed-out title is computed again, the other one comes from the cache
+    assert stub.calls == 3
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    test_normalize_title()
+    test_lru_eviction_and_hit_rate()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_persistence_across_instances(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_classifier_invalidated_when_model_changes(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_classifier_matches_uncached(Path(tmp))
+    test_detector_cache_keeps_case()
+    test_detector_cache_matches_detector_on_missing_cells()
+    test_detector_cache_skips_timeouts()
+    print("PASS: inference cache")
@@ -0,0 +1,156 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+
+from inference_cache import CachedClassifier, FileVersion
+from inference_server import InferenceHTTPServer, LatencyStats, MicroBatcher, ModelLoader, make_handler
+from test_inference_cache import StubModel, write_model
+
+
+class StubClassifier(StubModel):
+    """TitleClassifier stand-in: StubModel scores behind predict(), plus warmup()."""
+    def warmup(self):
+        pass
+
+    def predict(self, titles):
+        return self.predict_proba(titles)
+
+
+class EchoClassifier:
+    """Scores "title <i>" as [i, -i]; records every batch and can be made slow or failing."""
+    def __init__(self, delay=0.0, error=None):
+        self.delay = delay
+        self.error = error
+        self.batches = []
+
+    def predict(self, titles):
+        self.batches.append(list(titles))
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return np.array([[float(t.split()[-1]), -float(t.split()[-1])] for t in titles])
+
+
+def test_reload_keeps_one_batcher(tmp_path):
+    model_path = str(tmp_path / "model.keras")
+    write_model(model_path, 0.0)
+    load = ModelLoader(max_batch_size=8, max_wait_ms=1.0, model_class=StubClassifier)
+    classifier = CachedClassifier(load, model_path, "predict")
+    classifier.cache._version = FileVersion(model_path, check_interval=0.0)
+    batcher = classifier.model
+    threads = threading.active_count()
+
+    first = classifier.predict(["SmallTipper"])
+    write_model(model_path, 0.5)
+    second = classifier.predict(["SmallTipper"])
+
+    # The new model answers through the same batcher, without another thread
+    assert classifier.model is batcher and isinstance(batcher, MicroBatcher)
+    assert batcher.classifier.offset == 0.5
+    assert np.isclose(second[0, 1], first[0, 1] + 0.5)
+    assert threading.active_count() == threads
+
+    load.close()
+    assert not batcher.thread.is_alive()
+    classifier.close()
+
+
+def test_close_answers_queued_requests():
+    batcher = MicroBatcher(EchoClassifier(), max_batch_size=4, max_wait_ms=50.0)
+    futures = [batcher.submit([f"title {i}"]) for i in range(10)]
+    batcher.close()
+    assert [future.result(timeout=0)[0, 0] for future in futures] == list(range(10))
+    assert not batcher.thread.is_alive()
+    try:
+        batcher.submit(["late"])
+        assert False, "submit() after close() should fail"
+    except RuntimeError:
+        pass
+
+
+def test_batches_coalesce_in_order():
+    # The first request occupies the classifier while the others queue up behind it
+    classifier = EchoClassifier(delay=0.05)
+    batcher = MicroBatcher(classifier, max_batch_size=8, max_wait_ms=1.0)
+    first = batcher.submit(["title 0"])
+    while not classifier.batches:
+        time.sleep(0.001)
+    futures = [batcher.submit([f"title {i}", f"title {i + 100}"]) for i in range(1, 7)]
+    results = [future.result(timeout=5) for future in futures]
+    first.result(timeout=5)
+    batcher.close()
+
+    assert [len(batch) for batch in classifier.batches] == [1, 8, 4]
+    assert all(result[:, 0].tolist() == [i, i + 100] for i, result in enumerate(results, start=1))
+    assert batcher.snapshot()["batches"] == 3 and batcher.snapshot()["mean_batch_size"] == 13 / 3
+
+
+def test_errors_reach_every_request_in_the_batch():
+    classifier = EchoClassifier(error=ValueError("model exploded"))
+    batcher = MicroBatcher(classifier, max_batch_size=8, max_wait_ms=20.0)
+    futures = [batcher.submit([f"title {i}"]) for i in range(3)]
+    for future in futures:
+        try:
+            future.result(timeout=5)
+            assert False, "the classifier error should be forwarded"
+        except ValueError as e:
+            assert str(e) == "model exploded"
+
+    # The batching thread keeps serving later requests
+    classifier.error = None
+    assert batcher.predict(["title 7"])[0, 0] == 7
+    batcher.close()
+
+
+def post(url, body):
+    request = urllib.request.Request(url + "/classify", data=json.dumps(body).encode("utf-8"), method="POST")
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+def test_handler():
+    classifier = MicroBatcher(EchoClassifier(), max_batch_size=8, max_wait_ms=1.0)
+    stats = LatencyStats()
+    server = InferenceHTTPServer(("127.0.0.1", 0), make_handler(classifier, stats))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}"
+    try:
+        assert post(url, {"titles": ["title 2", "title -1"]}) == (200, {
+            "probabilities": [[2.0, -2.0], [-1.0, 1.0]], "labels": [0, 1]
+        })
+        assert post(url, {"title": "title 3"})[1]["labels"] == [0]
+        assert post(url, {"titles": []}) == (200, {"probabilities": [], "labels": []})
+        assert post(url, {"titles": "title 1"}) == (400, {"error": "titles must be strings"})
+        assert post(url, ["title 1"]) == (400, {"error": "expected a JSON object"})
+
+        classifier.classifier.error = RuntimeError("out of memory")
+        assert post(url, {"title": "title 1"}) == (500, {"error": "classification failed: out of memory"})
+
+        with urllib.request.urlopen(url + "/stats", timeout=5) as response:
+            snapshot = json.load(response)
+        # Failed requests are not counted as served, and empty ones never reach the batcher
+        assert snapshot["requests"] == 3 and snapshot["batches"] == 2
+    finally:
+        server.shutdown()
+        server.server_close()
+        classifier.close()
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_reload_keeps_one_batcher(Path(tmp))
+    test_close_answers_queued_requests()
+    test_batches_coalesce_in_order()
+    test_errors_reach_every_request_in_the_batch()
+    test_handler()
+    print("PASS: inference server")
@@ -0,0 +1,95 @@
+import csv
+import os
+import time
+import numpy as np
+import pytest
+import tensorflow as tf
+
+from inference_server import TitleClassifier
+from lite_model import LiteModel
+from numpy_model import NumpyForward, load_keras_weights, sequence_lengths
+
+MODEL_PATH = os.environ.get("SSC_MODEL", "model.keras")
+
+pytestmark = pytest.mark.skipif(not os.path.exists(MODEL_PATH), reason=f"{MODEL_PATH} not trained yet")
+
+
+def load_titles(csv_file="data.csv"):
+    with open(csv_file, "r", encoding="utf-8") as f:
+        return [row["title"] for row in csv.DictReader(f)]
+
+
+def keras_probabilities(model, titles):
+    logits = model.predict(tf.constant([[t] for t in titles]), batch_size=512, verbose=0)
+    return tf.nn.softmax(logits, axis=1).numpy()
+
+
+def test_weights_match_keras():
+    model = tf.keras.models.load_model(MODEL_PATH, compile=False)
+    weights, vocabulary, sequence_length = load_keras_weights(MODEL_PATH)
+    assert vocabulary == model.layers[0].get_vocabulary()
+    assert sequence_length == model.layers[0].get_config()["output_sequence_length"]
+    assert np.array_equal(weights["embedding"], model.layers[1].get_weights()[0])
+    assert np.array_equal(weights["output_bias"], model.layers[-1].get_weights()[1])
+
+
+def test_forward_matches_keras():
+    model = tf.keras.models.load_model(MODEL_PATH, compile=False)
+    titles = load_titles() + ["", "Please vote NAY!!!", "x " * 300]
+    ids = model.layers[0](tf.constant(titles)).numpy()
+
+    forward = NumpyForward(load_keras_weights(MODEL_PATH)[0])
+    expected = keras_probabilities(model, titles)
+    assert np.allclose(forward.predict_proba(ids), expected, atol=1e-5)
+    assert np.allclose(LiteModel(MODEL_PATH).predict_proba(titles), expected, atol=1e-5)
+
+
+def test_length_aware_matches_padded():
+    titles = load_titles() + ["", "!!!", "vote nay", " ".join(f"w{i}" for i in range(127)), "x " * 300]
+    lite = LiteModel(MODEL_PATH)
+    ids = lite.tokenizer.encode(titles)
+    padded = lite.forward.predict_proba(ids, length_aware=False)
+    assert np.allclose(lite.forward.predict_proba(ids), padded, atol=1e-6)
+
+    classifier = TitleClassifier(MODEL_PATH)
+    expected = keras_probabilities(classifier.model, titles)
+    for i in range(0, len(titles), 64):
+        assert np.allclose(classifier.predict(titles[i:i + 64]), expected[i:i + 64], atol=1e-6)
+
+
+def benchmark(repeats=20):
+    model = tf.keras.models.load_model(MODEL_PATH, compile=False)
+    classifier = TitleClassifier(MODEL_PATH)
+    lite = LiteModel(MODEL_PATH)
+    titles = load_titles()
+
+    lengths = sequence_lengths(lite.tokenizer.encode(titles))
+    p50, p90, p99 = np.percentile(lengths, [50, 90, 99])
+    print(f"Token lengths in data.csv: p50={p50:.0f}, p90={p90:.0f}, p99={p99:.0f}, max={lengths.max()} "
+          f"of {lite.tokenizer.sequence_length}")
+
+    for batch_size in (1, 32, 512):
+        batch = titles[:batch_size]
+        ids = lite.tokenizer.encode(batch)
+        full = tf.constant([[t] for t in batch])
+        timings = {}
+        for name, run in (("model.predict", lambda: keras_probabilities(model, batch)),
+                          ("keras call padded", lambda: model(full, training=False)),
+                          ("keras call trimmed", lambda: classifier.predict(batch)),
+                          ("numpy padded", lambda: lite.forward.predict_proba(ids, length_aware=False)),
+                          ("numpy length-aware", lambda: lite.forward.predict_proba(ids)),
+                          ("numpy tokenize+forward", lambda: lite.predict_proba(batch))):
+            run()
+            start = time.perf_counter()
+            for _ in range(repeats):
+                run()
+            timings[name] = (time.perf_counter() - start) / repeats * 1000.0
+        print(f"batch {batch_size:>3}: " + ", ".join(f"{name} {ms:.3f} ms" for name, ms in timings.items()))
+
+
+if __name__ == "__main__":
+    test_weights_match_keras()
+    test_forward_matches_keras()
+    test_length_aware_matches_padded()
+    print("PASS: NumPy forward pass matches model.predict")
+    benchmark()
@@ -0,0 +1,76 @@
+import csv
+import json
+from types import SimpleNamespace
+
+from sweep import DEFAULT_CONFIG, MedianPruningCallback, failed_trial, write_leaderboard
+
+
+def trial(trial_id, status, val_loss):
+    return {"trial": trial_id, "status": status, "val_loss": val_loss, "val_accuracy": 0.9, "epochs": 10,
+            "params": 1000, "size_kib": 3.9, "latency_b1_ms": 1.0, "latency_b32_ms": 2.0, "train_seconds": 5.0,
+            "config": {**DEFAULT_CONFIG, "embed_dim": trial_id}}
+
+
+def test_write_leaderboard(tmp_path):
+    results = [trial(0, "pruned", 0.1), trial(1, "complete", 0.4),
+               failed_trial(2, {**DEFAULT_CONFIG, "embed_dim": 2}, MemoryError("out of memory")),
+               trial(3, "complete", 0.3)]
+    ranked = write_leaderboard(results, str(tmp_path))
+
+    # Completed trials rank first, pruned ones after them, failed ones not at all
+    assert [r["trial"] for r in ranked] == [3, 1, 0]
+    with open(tmp_path / "leaderboard.csv", "r", encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [(row["rank"], row["trial"], row["status"]) for row in rows] == [
+        ("1", "3", "complete"), ("2", "1", "complete"), ("3", "0", "pruned"), ("", "2", "failed")
+    ]
+    assert rows[-1]["val_loss"] == ""
+    with open(tmp_path / "leaderboard.json", "r", encoding="utf-8") as f:
+        assert json.load(f)[-1]["error"] == "MemoryError: out of memory"
+    with open(tmp_path / "best_config.json", "r", encoding="utf-8") as f:
+        assert json.load(f)["embed_dim"] == 3
+
+
+def test_no_best_config_without_a_completed_trial(tmp_path):
+    results = [trial(0, "pruned", 0.1), failed_trial(1, DEFAULT_CONFIG, RuntimeError("worker died"))]
+    assert [r["trial"] for r in write_leaderboard(results, str(tmp_path))] == [0]
+    assert not (tmp_path / "best_config.json").exists()
+
+
+def run_epochs(pruner, val_losses):
+    model = SimpleNamespace(stop_training=False)
+    pruner.set_model(model)
+    for epoch, val_loss in enumerate(val_losses):
+        pruner.on_epoch_end(epoch, {"val_loss": val_loss})
+    return model.stop_training
+
+
+def test_pruning_rule():
+    # Three other trials reported best losses 0.2, 0.3 and 0.5 at epoch 2: the median is 0.3
+    reports = {(2, 1): 0.2, (2, 2): 0.3, (2, 3): 0.5}
+
+    # The best loss so far counts, not the last one
+    pruner = MedianPruningCallback(0, reports, every=2, min_trials=3)
+    assert not run_epochs(pruner, [0.25, 0.6]) and not pruner.pruned
+    assert reports[(2, 0)] == 0.25
+
+    pruner = MedianPruningCallback(4, reports, every=2, min_trials=3)
+    assert run_epochs(pruner, [0.5, 0.35]) and pruner.pruned
+
+    # A trial beating the median is kept, and too few reports at a milestone never prune
+    pruner = MedianPruningCallback(5, {(4, 1): 0.1}, every=2, min_trials=1)
+    assert not run_epochs(pruner, [0.05, 0.05, 0.9, 0.9])
+    pruner = MedianPruningCallback(5, {(4, 1): 0.1}, every=2, min_trials=2)
+    assert not run_epochs(pruner, [0.5, 0.5, 0.9, 0.9])
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_write_leaderboard(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_no_best_config_without_a_completed_trial(Path(tmp))
+    test_pruning_rule()
+    print("PASS: sweep leaderboard and pruning")
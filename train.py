@@ -1,6 +1,11 @@
 #!/usr/bin/python3
+import argparse
 import csv
+import hashlib
+import json
+import math
 import os
+import time
 import numpy as np
 import tensorflow as tf
 from sklearn.model_selection import train_test_split
@@ -10,26 +15,38 @@ def clean_text(txt):
     txt = txt.encode("ascii", errors="ignore").decode()
     return txt
 
-def custom_weighted_loss(y_true, y_pred_logits):
-    y_true_onehot = tf.one_hot(tf.cast(y_true, tf.int32), depth=2)
+# Hyperparameters of the standard training run; a sweep or --config file overrides any of them
+DEFAULT_CONFIG = {
+    "max_tokens": 10000,
+    "output_seq_length": 128,
+    "embed_dim": 32,
+    "conv_filters": 32,
+    "dense_units": 16,
+    "dropout": 0.2,
+    "class_weights": [1.0, 2.0],
+    "batch_size": 512,
+    "learning_rate": 5e-5
+}
 
-    ce_per_sample = tf.nn.softmax_cross_entropy_with_logits(
-        labels=y_true_onehot,
-        logits=y_pred_logits
-    )
+def make_weighted_loss(class_weights):
+    def custom_weighted_loss(y_true, y_pred_logits):
+        y_true_onehot = tf.one_hot(tf.cast(y_true, tf.int32), depth=2)
 
-    class_weights = tf.constant([1.0, 2.0])
-    sample_weights = tf.reduce_sum(class_weights * y_true_onehot, axis=1)
+        ce_per_sample = tf.nn.softmax_cross_entropy_with_logits(
+            labels=y_true_onehot,
+            logits=y_pred_logits
+        )
 
-    weighted_ce = ce_per_sample * sample_weights
-    return tf.reduce_mean(weighted_ce)
+        sample_weights = tf.reduce_sum(tf.constant(class_weights, dtype=tf.float32) * y_true_onehot, axis=1)
 
-def main():
-    learning_rate = 5e-5
-    batch_size = 512
-    epochs = 600
+        weighted_ce = ce_per_sample * sample_weights
+        return tf.reduce_mean(weighted_ce)
+    return custom_weighted_loss
 
-    data_file = "data.csv"
+custom_weighted_loss = make_weighted_loss(DEFAULT_CONFIG["class_weights"])
+
+def load_corpus(data_file="data.csv"):
+    """Reads and cleans the labeled titles, returning (texts, labels as an int32 array)."""
     texts, labels = [], []
 
     with open(data_file, "r", encoding="utf-8") as f:
@@ -46,81 +63,257 @@ def main():
             texts.append(txt)
             labels.append(label_val)
 
-    labels = np.array(labels, dtype="int32")
-    if len(texts) == 0:
-        print("No valid data found after cleaning. Exiting.")
-        return
+    return texts, np.array(labels, dtype="int32")
 
-    unique_labels, counts = np.unique(labels, return_counts=True)
-    print(f"Total loaded samples: {len(texts)}")
-    print("Label distribution:", dict(zip(unique_labels, counts)))
+TOKEN_CACHE_DIR = "token_cache"
 
-    X_train, X_val, y_train, y_val = train_test_split(
-        texts, labels, test_size=0.2, random_state=42, stratify=labels
-    )
-    print("X_train size:", len(X_train), " y_train size:", len(y_train))
-    print("X_val size:", len(X_val), " y_val size:", len(y_val))
+def token_cache_key(texts, labels, vectorizer_config, split_config):
+    """Hash of the cleaned corpus, the labels, the vectorizer config and the train/val split."""
+    h = hashlib.sha1()
+    h.update(json.dumps([vectorizer_config, split_config], sort_keys=True).encode("utf-8"))
+    h.update("\n".join(texts).encode("utf-8"))
+    h.update(np.asarray(labels, dtype="int32").tobytes())
+    return h.hexdigest()
 
-    max_tokens = 10000
-    output_seq_length = 128
+def tokenize_corpus(texts, labels, vectorizer_config, split_config, cache_dir=TOKEN_CACHE_DIR, verbose=1):
+    """
+    Splits the corpus, adapts a TextVectorization layer on the training titles and
+    vectorizes both splits once into int32 token matrices.
 
-    vectorize_layer = tf.keras.layers.TextVectorization(
-        max_tokens=max_tokens,
-        output_sequence_length=output_seq_length,
-        standardize="lower_and_strip_punctuation"
-    )
+    The vocabulary and matrices are cached in cache_dir under token_cache_key(),
+    so later runs on the same data and config skip adapt() and tokenization.
+
+    Returns:
+        tuple: (vectorize_layer, (train_ids, y_train), (val_ids, y_val))
+    """
+    key = token_cache_key(texts, labels, vectorizer_config, split_config)
+    cache_file = os.path.join(cache_dir, f"{key}.npz")
+    vectorize_layer = tf.keras.layers.TextVectorization(**vectorizer_config)
+
+    if os.path.exists(cache_file):
+        with np.load(cache_file) as cached:
+            vectorize_layer.set_vocabulary(cached["vocabulary"].tolist())
+            if verbose:
+                print(f"Loaded tokenized corpus from {cache_file}")
+            return vectorize_layer, (cached["train_ids"], cached["y_train"]), (cached["val_ids"], cached["y_val"])
+
+    X_train, X_val, y_train, y_val = train_test_split(texts, labels, stratify=labels, **split_config)
     vectorize_layer.adapt(X_train)
+    train_ids = vectorize_layer(tf.constant(X_train)).numpy().astype("int32")
+    val_ids = vectorize_layer(tf.constant(X_val)).numpy().astype("int32")
 
-    def make_dataset(text_list, label_arr, bs):
-        ds = tf.data.Dataset.from_tensor_slices((text_list, label_arr))
-        ds = ds.shuffle(len(text_list), seed=42)
-        ds = ds.batch(bs)
-        ds = ds.prefetch(tf.data.AUTOTUNE)
-        return ds
+    os.makedirs(cache_dir, exist_ok=True)
+    temp_file = cache_file + ".tmp.npz"
+    np.savez(temp_file, vocabulary=np.array(vectorize_layer.get_vocabulary()),
+             train_ids=train_ids, y_train=y_train, val_ids=val_ids, y_val=y_val)
+    os.replace(temp_file, cache_file)
+    if verbose:
+        print(f"Cached tokenized corpus to {cache_file}")
+    return vectorize_layer, (train_ids, y_train), (val_ids, y_val)
 
-    train_ds = make_dataset(X_train, y_train, batch_size)
-    val_ds = make_dataset(X_val, y_val, batch_size)
+def make_vectorizer_config(config):
+    return {
+        "max_tokens": config["max_tokens"],
+        "output_sequence_length": config["output_seq_length"],
+        "standardize": "lower_and_strip_punctuation"
+    }
 
-    embed_dim = 32
+SPLIT_CONFIG = {"test_size": 0.2, "random_state": 42}
+
+def make_dataset(token_ids, label_arr, bs):
+    ds = tf.data.Dataset.from_tensor_slices((token_ids, label_arr))
+    ds = ds.cache()
+    ds = ds.shuffle(len(token_ids), seed=42)
+    ds = ds.batch(bs)
+    ds = ds.prefetch(tf.data.AUTOTUNE)
+    return ds
+
+def token_length_report(token_ids):
+    """Prints the distribution of real (non-padding) tokens per title."""
+    lengths = np.count_nonzero(token_ids, axis=1)
+    p50, p90, p99 = np.percentile(lengths, [50, 90, 99])
+    print(f"Token lengths: p50={p50:.0f}, p90={p90:.0f}, p99={p99:.0f}, max={lengths.max()} "
+          f"of {token_ids.shape[1]}; {1 - lengths.sum() / token_ids.size:.1%} of positions are padding")
+    return lengths
+
+def make_bucketed_dataset(token_ids, label_arr, bs, kernel_size=3):
+    """
+    Like make_dataset(), but batches titles of similar length and pads each batch
+    only as far as its bucket needs instead of to the full sequence length.
+
+    Each title is padded to at least its length + kernel_size, which keeps
+    every distinct Conv1D window of the fully padded sequence (see
+    numpy_model.padded_width), so the loss is unchanged per title.
+    """
+    full_width = token_ids.shape[1]
+    lengths = np.count_nonzero(token_ids, axis=1).astype("int32")
+    boundaries = [b for b in (8, 16, 32, 64) if b < full_width] + [full_width + 1]
+
+    ds = tf.data.Dataset.from_tensor_slices((token_ids, lengths, label_arr))
+    ds = ds.map(lambda ids, length, label: (ids[:length], label))
+    ds = ds.cache()
+    ds = ds.shuffle(len(token_ids), seed=42)
+    ds = ds.bucket_by_sequence_length(
+        element_length_func=lambda ids, label: tf.minimum(tf.shape(ids)[0] + kernel_size, full_width),
+        bucket_boundaries=boundaries,
+        bucket_batch_sizes=[bs] * (len(boundaries) + 1),
+        pad_to_bucket_boundary=True
+    )
+    ds = ds.prefetch(tf.data.AUTOTUNE)
+    return ds
+
+def build_model(config):
+    """The SSCModel layers on token ids; the string input is re-attached by export_string_model()."""
     model = tf.keras.Sequential([
-        tf.keras.Input(shape=(1,), dtype=tf.string),
-        vectorize_layer,
-        tf.keras.layers.Embedding(input_dim=max_tokens, output_dim=embed_dim),
-        tf.keras.layers.Conv1D(filters=32, kernel_size=3, activation="relu"),
+        # Any length: the layers are length-agnostic, so batches can be bucketed by title length
+        tf.keras.Input(shape=(None,), dtype=tf.int32),
+        tf.keras.layers.Embedding(input_dim=config["max_tokens"], output_dim=config["embed_dim"]),
+        tf.keras.layers.Conv1D(filters=config["conv_filters"], kernel_size=3, activation="relu"),
         tf.keras.layers.GlobalMaxPooling1D(),
-        tf.keras.layers.Dense(16, activation="relu"),
-        tf.keras.layers.Dropout(0.2),
+        tf.keras.layers.Dense(config["dense_units"], activation="relu"),
+        tf.keras.layers.Dropout(config["dropout"]),
         tf.keras.layers.Dense(2, activation=None)
     ])
 
     model.compile(
-        loss=custom_weighted_loss,
-        optimizer=tf.keras.optimizers.Adam(learning_rate=learning_rate, clipnorm=1.0),
+        loss=make_weighted_loss(config["class_weights"]),
+        optimizer=tf.keras.optimizers.Adam(learning_rate=config["learning_rate"], clipnorm=1.0),
         metrics=["accuracy"]
     )
+    return model
 
-    model.summary()
+def make_callbacks(learning_rate, patience=0, warmup_epochs=0, plateau_patience=0, verbose=1):
+    callbacks = [EpochNanCallback()]
+    if warmup_epochs > 0:
+        callbacks.append(WarmupCallback(learning_rate, warmup_epochs))
+    if plateau_patience > 0:
+        callbacks.append(tf.keras.callbacks.ReduceLROnPlateau(
+            monitor="val_loss", factor=0.5, patience=plateau_patience, min_lr=learning_rate / 20, verbose=verbose
+        ))
+    if patience > 0:
+        # val_loss is the custom weighted loss on the validation split
+        callbacks.append(tf.keras.callbacks.EarlyStopping(
+            monitor="val_loss", patience=patience, min_delta=1e-4, restore_best_weights=True, verbose=verbose
+        ))
+    return callbacks
 
-    class DebugNanCallback(tf.keras.callbacks.Callback):
-        def on_train_batch_end(self, batch, logs=None):
-            loss_val = logs.get("loss", None)
-            if loss_val is None:
-                return
-            if tf.math.is_nan(loss_val):
-                print(f"NaN detected at batch {batch}. Stopping training.")
+def export_string_model(vectorize_layer, int_model):
+    """Re-attaches the string input and TextVectorization in front of the trained int model's layers."""
+    return tf.keras.Sequential([
+        tf.keras.Input(shape=(1,), dtype=tf.string),
+        vectorize_layer,
+        *int_model.layers
+    ])
+
+class WarmupCallback(tf.keras.callbacks.Callback):
+    """Ramps the learning rate linearly up to target_lr over the first warmup_epochs epochs."""
+    def __init__(self, target_lr, warmup_epochs):
+        super().__init__()
+        self.target_lr = target_lr
+        self.warmup_epochs = warmup_epochs
+
+    def on_epoch_begin(self, epoch, logs=None):
+        if epoch < self.warmup_epochs:
+            self.model.optimizer.learning_rate.assign(self.target_lr * (epoch + 1) / self.warmup_epochs)
+
+class EpochNanCallback(tf.keras.callbacks.Callback):
+    """Stops training when an epoch ends with a NaN loss; checks plain floats once per epoch."""
+    def on_epoch_end(self, epoch, logs=None):
+        logs = logs or {}
+        for key in ("loss", "val_loss"):
+            value = logs.get(key)
+            if value is not None and math.isnan(value):
+                print(f"NaN {key} detected at epoch {epoch + 1}. Stopping training.")
                 self.model.stop_training = True
+                return
+
+class TrainingSummaryCallback(tf.keras.callbacks.Callback):
+    """Reports how many epochs ran against the budget and the wall-clock time saved by stopping early."""
+    def __init__(self, max_epochs, verbose=1):
+        super().__init__()
+        self.max_epochs = max_epochs
+        self.verbose = verbose
+        self.epochs_run = 0
+
+    def on_train_begin(self, logs=None):
+        self.start_time = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.epochs_run = epoch + 1
+
+    def on_train_end(self, logs=None):
+        if not self.verbose:
+            return
+        elapsed = time.perf_counter() - self.start_time
+        per_epoch = elapsed / max(self.epochs_run, 1)
+        saved_epochs = self.max_epochs - self.epochs_run
+        print(f"\nTrained {self.epochs_run}/{self.max_epochs} epochs in {elapsed:.1f}s ({per_epoch:.2f}s/epoch).")
+        if saved_epochs > 0:
+            print(f"Stopped early: saved {saved_epochs} epochs, about {saved_epochs * per_epoch:.1f}s.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the SSCModel title classifier")
+    parser.add_argument("--epochs", type=int, default=600, help="Maximum number of epochs")
+    parser.add_argument("--config", help="JSON file overriding hyperparameters, e.g. a sweep's best_config.json")
+    parser.add_argument("--learning-rate", type=float, help="Peak learning rate (default 5e-5)")
+    parser.add_argument("--patience", type=int, default=0,
+                        help="Stop after this many epochs without val_loss improvement (default 0, off)")
+    parser.add_argument("--warmup-epochs", type=int, default=0,
+                        help="Epochs of linear learning rate warmup (default 0, off)")
+    parser.add_argument("--plateau-patience", type=int, default=0,
+                        help="Halve the learning rate after this many epochs without improvement (default 0, off)")
+    parser.add_argument("--no-bucketing", action="store_true",
+                        help="Pad every title to output_seq_length instead of batching by length")
+    args = parser.parse_args()
+
+    config = dict(DEFAULT_CONFIG)
+    if args.config:
+        with open(args.config, "r", encoding="utf-8") as f:
+            config.update(json.load(f))
+    if args.learning_rate is not None:
+        config["learning_rate"] = args.learning_rate
+    epochs = args.epochs
+
+    texts, labels = load_corpus("data.csv")
+    if len(texts) == 0:
+        print("No valid data found after cleaning. Exiting.")
+        return
+
+    unique_labels, counts = np.unique(labels, return_counts=True)
+    print(f"Total loaded samples: {len(texts)}")
+    print("Label distribution:", dict(zip(unique_labels, counts)))
+
+    vectorize_layer, (train_ids, y_train), (val_ids, y_val) = tokenize_corpus(
+        texts, labels, make_vectorizer_config(config), SPLIT_CONFIG
+    )
+    print("X_train size:", len(train_ids), " y_train size:", len(y_train))
+    print("X_val size:", len(val_ids), " y_val size:", len(y_val))
+
+    token_length_report(np.concatenate([train_ids, val_ids]))
+    dataset_fn = make_dataset if args.no_bucketing else make_bucketed_dataset
+    train_ds = dataset_fn(train_ids, y_train, config["batch_size"])
+    # Padded validation gives the same losses and avoids a retrace per bucket shape on every evaluation
+    val_ds = make_dataset(val_ids, y_val, config["batch_size"])
+
+    # Trained on token ids; the string input is re-attached for model.keras
+    model = build_model(config)
+    model.summary()
+
+    callbacks = make_callbacks(config["learning_rate"], args.patience, args.warmup_epochs,
+                               args.plateau_patience)
+    callbacks.append(TrainingSummaryCallback(epochs))
 
     history = model.fit(
         train_ds,
         validation_data=val_ds,
         epochs=epochs,
-        callbacks=[DebugNanCallback()]
+        callbacks=callbacks
     )
 
     val_loss, val_acc = model.evaluate(val_ds, verbose=0)
     print(f"\nValidation Loss: {val_loss:.4f}, Validation Accuracy: {val_acc:.4f}")
 
-    model.save("model.keras")
+    export_string_model(vectorize_layer, model).save("model.keras")
     print(f"Saved model to model.keras.")
 
 if __name__ == "__main__":
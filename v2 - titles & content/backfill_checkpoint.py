@@ -0,0 +1,174 @@
+import csv
+import json
+import os
+
+CHECKPOINT_EVERY = 25  # Referendums per fsync'd CSV batch
+
+
+class BackfillCheckpoint:
+    """
+    Crash-safe progress tracking for a referendum backfill.
+
+    Rows are appended to the network CSV in batches that are flushed and
+    fsync'd before a small JSON manifest is atomically replaced. The manifest
+    records which IDs were fetched, which were missing (404 or empty) and
+    which failed, plus the CSV size it covers, so a restarted run knows what
+    is done without re-reading the whole CSV.
+    """
+
+    def __init__(self, csv_file, manifest_file, headers):
+        """
+        Loads the manifest, reconciling it with the CSV on disk.
+
+        Args:
+            csv_file (str): Network CSV that rows are appended to
+            manifest_file (str): JSON manifest path
+            headers (list): CSV column names
+        """
+        self.csv_file = csv_file
+        self.manifest_file = manifest_file
+        self.headers = headers
+
+        self.fetched = set()
+        self.missing = set()
+        self.failed = set()
+        self.csv_size = 0
+
+        self._load()
+
+    def _load(self):
+        manifest = None
+        if os.path.exists(self.manifest_file):
+            try:
+                with open(self.manifest_file, "r", encoding="utf-8") as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable checkpoint {self.manifest_file}: {e}")
+
+        size = os.path.getsize(self.csv_file) if os.path.exists(self.csv_file) else 0
+
+        if manifest is not None and manifest.get("csv_size", 0) <= size:
+            self.fetched = set(manifest.get("fetched", []))
+            self.missing = set(manifest.get("missing", []))
+            self.failed = set(manifest.get("failed", []))
+            # Rows appended after the last checkpoint (a crash between the CSV
+            # fsync and the manifest write, or another tool appending) are
+            # picked up by reading only the CSV tail.
+            tail_ids, csv_size = self._read_records(manifest.get("csv_size", 0))
+            self.fetched |= tail_ids
+        else:
+            # No usable manifest: rebuild it from the CSV once
+            self.fetched, csv_size = self._read_records(0)
+            if manifest is not None:
+                self.missing = set(manifest.get("missing", []))
+
+        if csv_size < size:
+            self._truncate_csv(csv_size)
+
+        self.failed -= self.fetched
+        if self.fetched or self.missing or self.failed:
+            print(f"Checkpoint: {len(self.fetched)} fetched, {len(self.missing)} missing, "
+                  f"{len(self.failed)} failed referendums")
+
+        self.csv_size = csv_size
+        self._save()
+
+    def _read_records(self, offset):
+        """
+        Returns the referendum IDs of CSV rows starting at byte offset, which
+        must be a record boundary, and the offset just past the last complete
+        record.
+
+        A crash can cut the last record anywhere, including right after a
+        newline inside a quoted multi-line title, so records are found by
+        parsing rather than by looking for the last newline.
+        """
+        ids = set()
+        if not os.path.exists(self.csv_file):
+            return ids, 0
+
+        with open(self.csv_file, "rb") as f:
+            f.seek(offset)
+            read = {"line": "", "position": offset, "eof": False}
+
+            def lines():
+                for line in iter(f.readline, b""):
+                    read["line"] = line
+                    read["position"] += len(line)
+                    yield line.decode("utf-8", errors="replace")
+                read["eof"] = True
+
+            end = offset
+            fieldnames = self.headers if offset else None
+            reader = csv.reader(lines())
+            while True:
+                try:
+                    record = next(reader)
+                except (StopIteration, csv.Error):
+                    break
+                # A record is complete once its line ends; hitting the end of
+                # the file inside a quoted field leaves a torn one
+                if read["eof"] or not read["line"].endswith(b"\n"):
+                    break
+                end = read["position"]
+                if fieldnames is None:
+                    fieldnames = record
+                    continue
+                row = dict(zip(fieldnames, record))
+                if row.get("id") and row["id"].isdigit():
+                    ids.add(int(row["id"]))
+        return ids, end
+
+    def _truncate_csv(self, size):
+        """Drops a partially written last record left by a crash."""
+        with open(self.csv_file, "rb+") as f:
+            f.truncate(size)
+            f.flush()
+            os.fsync(f.fileno())
+        print(f"Removed a partially written row from {self.csv_file}")
+
+    def _save(self):
+        manifest = {
+            "csv_size": self.csv_size,
+            "fetched": sorted(self.fetched),
+            "missing": sorted(self.missing),
+            "failed": sorted(self.failed)
+        }
+        temp_file = self.manifest_file + ".tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.manifest_file)
+
+    def done_ids(self, skip_missing=True):
+        """IDs a resumed run can skip: fetched ones, plus known-missing ones unless skip_missing is False."""
+        return self.fetched | self.missing if skip_missing else set(self.fetched)
+
+    def commit(self, rows, fetched_ids=(), missing_ids=(), failed_ids=()):
+        """
+        Durably appends a batch of rows and records the outcome of each ID.
+
+        Args:
+            rows (list): Labelled CSV rows to append
+            fetched_ids (iterable): IDs whose rows are in this batch
+            missing_ids (iterable): IDs that returned 404 or no data
+            failed_ids (iterable): IDs that could not be fetched
+        """
+        if rows:
+            file_exists = os.path.exists(self.csv_file) and os.path.getsize(self.csv_file) > 0
+            with open(self.csv_file, "a" if file_exists else "w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=self.headers)
+                if not file_exists:
+                    writer.writeheader()
+                writer.writerows(rows)
+                f.flush()
+                os.fsync(f.fileno())
+            self.csv_size = os.path.getsize(self.csv_file)
+
+        self.fetched.update(fetched_ids)
+        self.missing.update(missing_ids)
+        self.missing -= self.fetched
+        self.failed.update(failed_ids)
+        self.failed -= self.fetched | self.missing
+        self._save()
@@ -0,0 +1,209 @@
+import argparse
+import csv
+import glob
+import os
+import sys
+import time
+
+import numpy as np
+
+from rejection_patterns import BUDGET_EXCEEDED, RejectionPattern
+
+# The title model, its NumPy runtime and the caches live in the repository root. They are
+# imported when first needed, from there when run as a script, or from a caller's sys.path.
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_PATH = os.path.join(ROOT_DIR, "model.keras")
+STAGES = ["regex", "model"]
+
+
+class CascadeClassifier:
+    """
+    Two-stage 'vote nay' classifier: RejectionPattern first, the neural title model only when needed.
+
+    Every referendum goes through detect_many(). Regex hits at or above
+    positive_threshold are answered as nay straight away. Regex misses are
+    answered as not-nay when none of the weak keywords ('nay', 'reject',
+    'error', ...) appear in the title or content; they then get
+    clean_negative_confidence, otherwise ambiguous_negative_confidence.
+    Misses at or above negative_threshold are final. Checks that ran out of
+    a budgeted detector's time say nothing either way and always go to the
+    model. Everything else is
+    sent, in one batch, to the model, and its Prob(class1) is compared
+    with model_threshold.
+    """
+
+    clean_negative_confidence = 0.9
+    ambiguous_negative_confidence = 0.5
+
+    def __init__(self, model_path=MODEL_PATH, detector=None, positive_threshold=0.9, negative_threshold=0.9,
+                 model_threshold=0.5, cache_size=0, cache_dir=None):
+        """
+        Args:
+            model_path (str): model.keras, or a model_lite.npz written by export_model.py
+            detector (RejectionPattern, optional): Shared detector instance
+            positive_threshold (float): Regex confidence needed to answer 'nay' without the model
+            negative_threshold (float): Regex negative confidence needed to answer 'not nay' without the model
+            model_threshold (float): Prob(class1) at which the model answers 'nay'
+            cache_size (int): When > 0, detector and model results are cached in LRUs of this size,
+                invalidated when rejection_patterns.py or the model file changes
+            cache_dir (str, optional): Directory for the caches' SQLite files, to keep them across runs
+        """
+        self.detector = detector or RejectionPattern()
+        self.cache_size = cache_size
+        self.cache_dir = cache_dir
+        if cache_size:
+            from inference_cache import CachedDetector
+            self.detector = CachedDetector(self.detector, cache_size, self._cache_file("detector"))
+        self.model_path = model_path
+        self._model = None
+        self.positive_threshold = positive_threshold
+        self.negative_threshold = negative_threshold
+        self.model_threshold = model_threshold
+        self.routed = {stage: 0 for stage in STAGES}
+
+    @property
+    def model(self):
+        # Loaded on first use, so batches the regex resolves never pay for it
+        if self._model is None:
+            from lite_model import LiteModel
+            if self.cache_size:
+                from inference_cache import CachedClassifier
+                self._model = CachedClassifier(LiteModel, self.model_path, max_entries=self.cache_size,
+                                               cache_file=self._cache_file("model"))
+            else:
+                self._model = LiteModel(self.model_path)
+        return self._model
+
+    def _cache_file(self, name):
+        return os.path.join(self.cache_dir, f"cascade_{name}_cache.sqlite") if self.cache_dir else None
+
+    def cache_report(self):
+        """Hit-rate snapshots of the detector and model caches (empty when caching is off)."""
+        report = {}
+        if self.cache_size:
+            for name, stage in (("regex", self.detector), ("model", self._model)):
+                if stage is not None:
+                    report[name] = stage.snapshot()
+        return report
+
+    def classify(self, titles, contents=None):
+        """
+        Classifies a batch of referendums.
+
+        Args:
+            titles (list): Referendum titles
+            contents (list, optional): Referendum contents, same length as titles
+
+        Returns:
+            dict: Columnar results containing:
+                - is_nay_request (np.ndarray of bool)
+                - confidence (np.ndarray of float): regex confidence, or the model's
+                  probability of the predicted class
+                - stage (np.ndarray of int): index into STAGES of the stage that answered
+        """
+        titles = list(titles)
+        contents = list(contents) if contents is not None else [""] * len(titles)
+        regex = self.detector.detect_many(titles, contents)
+
+        is_nay = regex["is_nay_request"].copy()
+        confidence = regex["confidence"].copy()
+        timed_out_code = [i for i, explanation in enumerate(regex["explanations"]) if explanation == BUDGET_EXCEEDED[2]]
+        timed_out = np.isin(regex["explanation_code"], timed_out_code)
+        for i in np.flatnonzero(~is_nay & ~timed_out):
+            text = f"{titles[i] or ''}\n{contents[i] or ''}"
+            keywords = self.detector.keyword_hits(text)
+            confidence[i] = self.ambiguous_negative_confidence if keywords else self.clean_negative_confidence
+
+        resolved = np.where(is_nay, confidence >= self.positive_threshold, confidence >= self.negative_threshold)
+        resolved &= ~timed_out
+        stage = np.where(resolved, STAGES.index("regex"), STAGES.index("model")).astype(np.int32)
+
+        ambiguous = np.flatnonzero(~resolved)
+        if len(ambiguous):
+            probs = self.model.predict_proba([titles[i] or "" for i in ambiguous])[:, 1]
+            is_nay[ambiguous] = probs >= self.model_threshold
+            confidence[ambiguous] = np.where(probs >= self.model_threshold, probs, 1.0 - probs)
+
+        self.routed["regex"] += len(titles) - len(ambiguous)
+        self.routed["model"] += len(ambiguous)
+        return {"is_nay_request": is_nay, "confidence": confidence, "stage": stage}
+
+    def routing_report(self):
+        """Fraction of everything classified so far that each stage answered."""
+        total = sum(self.routed.values())
+        return {stage: count / total if total else 0.0 for stage, count in self.routed.items()}
+
+
+def load_labeled_titles(csv_file):
+    with open(csv_file, "r", encoding="utf-8") as f:
+        rows = [row for row in csv.DictReader(f) if row["label"] in ("0", "1")]
+    return [row["title"] for row in rows], [""] * len(rows), np.array([row["label"] == "1" for row in rows])
+
+
+def load_referendum_csvs(data_dir):
+    csv.field_size_limit(sys.maxsize)
+    titles, contents, labels = [], [], []
+    for csv_file in sorted(glob.glob(os.path.join(data_dir, "*_referendums.csv"))):
+        with open(csv_file, "r", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                titles.append(row["title"])
+                contents.append(row["content"])
+                labels.append(row["is_nay_request"] == "1")
+    return titles, contents, np.array(labels, dtype=bool)
+
+
+def evaluate(cascade, name, titles, contents, labels):
+    """Prints routing fractions, timing and agreement of the cascade and of each stage alone."""
+    cascade.model  # Load outside the timings
+    cascade.routed = {stage: 0 for stage in STAGES}
+    start = time.perf_counter()
+    result = cascade.classify(titles, contents)
+    cascade_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    model_only = cascade.model.predict_proba(titles)[:, 1] >= cascade.model_threshold
+    model_time = time.perf_counter() - start
+    start = time.perf_counter()
+    regex_only = cascade.detector.detect_many(titles, contents)["is_nay_request"]
+    regex_time = time.perf_counter() - start
+
+    routing = cascade.routing_report()
+    print(f"\n{name}: {len(titles)} referendums")
+    print(f"  Routed: regex {routing['regex']:.1%}, model {routing['model']:.1%}")
+    print(f"  Time: cascade {cascade_time * 1000:.1f} ms, regex on everything {regex_time * 1000:.1f} ms, "
+          f"model on everything {model_time * 1000:.1f} ms")
+    for label, predicted in (("cascade", result["is_nay_request"]), ("regex only", regex_only),
+                             ("model only", model_only)):
+        tp = np.sum(predicted & labels)
+        precision = tp / max(np.sum(predicted), 1)
+        recall = tp / max(np.sum(labels), 1)
+        print(f"  {label:>10}: agreement {np.mean(predicted == labels):.4f}, "
+              f"precision {precision:.4f}, recall {recall:.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the regex + model cascade")
+    parser.add_argument("--model", default=MODEL_PATH, help="model.keras or model_lite.npz")
+    parser.add_argument("--data", default=os.path.join(ROOT_DIR, "data.csv"), help="Labeled titles")
+    parser.add_argument("--referendum-dir", default="referendum_data", help="Directory of *_referendums.csv")
+    parser.add_argument("--positive-threshold", type=float, default=0.9)
+    parser.add_argument("--negative-threshold", type=float, default=0.9)
+    parser.add_argument("--model-threshold", type=float, default=0.5)
+    parser.add_argument("--cache-size", type=int, default=0, help="Cache detector and model results (0: off)")
+    parser.add_argument("--cache-dir", help="Keep the caches in SQLite files here across runs")
+    args = parser.parse_args()
+
+    cascade = CascadeClassifier(args.model, positive_threshold=args.positive_threshold,
+                                negative_threshold=args.negative_threshold, model_threshold=args.model_threshold,
+                                cache_size=args.cache_size, cache_dir=args.cache_dir)
+    evaluate(cascade, f"{args.data} labels", *load_labeled_titles(args.data))
+    evaluate(cascade, f"{args.referendum_dir} is_nay_request", *load_referendum_csvs(args.referendum_dir))
+    for stage, snapshot in cascade.cache_report().items():
+        print(f"\n{stage} cache: hit rate {snapshot['cache_hit_rate'] or 0:.1%} "
+              f"({snapshot['cache_hits']} memory, {snapshot['cache_disk_hits']} disk, {snapshot['cache_misses']} misses)")
+        (cascade.detector if stage == "regex" else cascade.model).close()
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, ROOT_DIR)
+    main()
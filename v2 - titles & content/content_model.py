@@ -0,0 +1,267 @@
+import argparse
+import csv
+import glob
+import hashlib
+import os
+import sys
+import time
+from collections import OrderedDict
+
+import numpy as np
+import tensorflow as tf
+from sklearn.model_selection import train_test_split
+
+from html_text import extract_text
+from referendum_store import ReferendumStore, store_path
+
+# train.py (title-only model) and data.csv live in the repository root
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CONTENT_MODEL_PATH = "content_model.keras"
+TITLE_TOKENS = 32        # data.csv titles are at most ~30 tokens
+CONTENT_TOKENS = 64      # Fixed budget of body tokens per referendum
+CONTENT_CHARS = 2000     # Body text extracted from stored HTML before tokenizing
+MAX_TOKENS = 20000
+
+
+def clean_text(txt):
+    """Cleans text the way train.py does for the title-only model."""
+    txt = txt.strip()
+    txt = txt.encode("ascii", errors="ignore").decode()
+    return txt
+
+
+def load_examples(data_dir="referendum_data", titles_csv=None, content_chars=CONTENT_CHARS):
+    """
+    Collects (ref_key, title, content, label) training examples.
+
+    Rows come from the *_referendums.csv files, labeled by their is_nay_request
+    column. When a network's referendum store exists, the body text is taken
+    from the stored HTML (up to content_chars) instead of the CSV's short
+    excerpt. Titles from titles_csv (data.csv) are added with empty content.
+    """
+    csv.field_size_limit(sys.maxsize)
+    examples = []
+    for csv_file in sorted(glob.glob(os.path.join(data_dir, "*_referendums.csv"))):
+        network = os.path.basename(csv_file)[:-len("_referendums.csv")]
+        path = store_path(data_dir, network)
+        store = ReferendumStore(path) if os.path.exists(path) else None
+        try:
+            with open(csv_file, "r", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    content = row["content"]
+                    data = store.get(int(row["id"])) if store else None
+                    if data:
+                        content = extract_text(data.get("content") or "", max_chars=content_chars)
+                    examples.append((f"{network}/{row['id']}", clean_text(row["title"]), clean_text(content),
+                                     int(row["is_nay_request"] == "1")))
+        finally:
+            if store:
+                store.close()
+
+    if titles_csv:
+        with open(titles_csv, "r", encoding="utf-8") as f:
+            for i, row in enumerate(csv.DictReader(f)):
+                if row["label"] in ("0", "1") and clean_text(row["title"]):
+                    examples.append((f"titles/{i}", clean_text(row["title"]), "", int(row["label"])))
+    return examples
+
+
+def build_model(vocabulary_size, content_tokens, embed_dim=32, filters=32):
+    """
+    Two-input model on token ids. Title and content share the embedding but have
+    their own Conv1D + global max pool; content_tokens=0 gives the title-only model.
+    """
+    embedding = tf.keras.layers.Embedding(vocabulary_size, embed_dim, name="embedding")
+    title_ids = tf.keras.Input(shape=(None,), dtype=tf.int32, name="title_ids")
+    inputs, encoded = [title_ids], []
+
+    title_conv = tf.keras.layers.Conv1D(filters, 3, activation="relu", name="title_conv")(embedding(title_ids))
+    encoded.append(tf.keras.layers.GlobalMaxPooling1D(name="title_pool")(title_conv))
+
+    if content_tokens:
+        content_ids = tf.keras.Input(shape=(None,), dtype=tf.int32, name="content_ids")
+        inputs.append(content_ids)
+        content_conv = tf.keras.layers.Conv1D(filters, 3, activation="relu", name="content_conv")(
+            embedding(content_ids))
+        encoded.append(tf.keras.layers.GlobalMaxPooling1D(name="content_pool")(content_conv))
+
+    x = tf.keras.layers.Concatenate(name="concat")(encoded) if len(encoded) > 1 else encoded[0]
+    x = tf.keras.layers.Dense(16, activation="relu", name="hidden")(x)
+    x = tf.keras.layers.Dropout(0.2, name="dropout")(x)
+    outputs = tf.keras.layers.Dense(2, name="logits")(x)
+    return tf.keras.Model(inputs, outputs)
+
+
+def make_vectorizer(vocabulary, sequence_length, name):
+    layer = tf.keras.layers.TextVectorization(
+        max_tokens=MAX_TOKENS, output_sequence_length=sequence_length,
+        standardize="lower_and_strip_punctuation", name=name
+    )
+    layer.set_vocabulary(vocabulary)
+    return layer
+
+
+def export_string_model(int_model, vocabulary, content_tokens):
+    """
+    Rebuilds the trained int model's graph behind string inputs and TextVectorization,
+    as train.py does, reusing its layers (and weights) by name.
+    """
+    layer = int_model.get_layer
+    title = tf.keras.Input(shape=(1,), dtype=tf.string, name="title")
+    inputs = [title]
+    title_ids = make_vectorizer(vocabulary, TITLE_TOKENS, "title_vectorizer")(title)
+    encoded = [layer("title_pool")(layer("title_conv")(layer("embedding")(title_ids)))]
+    if content_tokens:
+        content = tf.keras.Input(shape=(1,), dtype=tf.string, name="content")
+        inputs.append(content)
+        content_ids = make_vectorizer(vocabulary, content_tokens, "content_vectorizer")(content)
+        encoded.append(layer("content_pool")(layer("content_conv")(layer("embedding")(content_ids))))
+
+    x = layer("concat")(encoded) if len(encoded) > 1 else encoded[0]
+    outputs = layer("logits")(layer("dropout")(layer("hidden")(x)))
+    return tf.keras.Model(inputs, outputs)
+
+
+class ContentAwareClassifier:
+    """
+    Scores (referendum id, title, content) with a saved content model at bounded cost.
+
+    Content is cut to a fixed token budget, and its pooled content vector is
+    cached per referendum id and content hash, so re-checking an open
+    referendum only runs the title branch and the dense head.
+    """
+
+    def __init__(self, model_path=CONTENT_MODEL_PATH, cache_size=10000):
+        model = tf.keras.models.load_model(model_path, compile=False)
+        self.title_vectorizer = model.get_layer("title_vectorizer")
+        self.content_vectorizer = model.get_layer("content_vectorizer")
+        self.layers = {layer.name: layer for layer in model.layers}
+        self.cache_size = cache_size
+        self.content_cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _encode(self, branch, ids):
+        embedded = self.layers["embedding"](ids)
+        return self.layers[f"{branch}_pool"](self.layers[f"{branch}_conv"](embedded)).numpy()
+
+    def content_vectors(self, ref_ids, contents):
+        keys = [(ref_id, hashlib.sha1(content.encode("utf-8")).hexdigest()) for ref_id, content in zip(ref_ids, contents)]
+        missing = [i for i, key in enumerate(keys) if key not in self.content_cache]
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            ids = self.content_vectorizer(tf.constant([contents[i] for i in missing]))
+            for i, vector in zip(missing, self._encode("content", ids)):
+                self.content_cache[keys[i]] = vector
+        vectors = []
+        for key in keys:
+            self.content_cache.move_to_end(key)
+            vectors.append(self.content_cache[key])
+        while len(self.content_cache) > self.cache_size:
+            self.content_cache.popitem(last=False)
+        return np.stack(vectors)
+
+    def predict_proba(self, ref_ids, titles, contents):
+        """Returns an (n, 2) array of class probabilities."""
+        titles = [clean_text(t or "") for t in titles]
+        contents = [clean_text(c or "") for c in contents]
+        title_vectors = self._encode("title", self.title_vectorizer(tf.constant(titles)))
+        x = np.concatenate([title_vectors, self.content_vectors(ref_ids, contents)], axis=1)
+        logits = self.layers["logits"](self.layers["hidden"](x))
+        return tf.nn.softmax(logits, axis=1).numpy()
+
+
+def train_and_evaluate(name, train_ids, y_train, val_ids, y_val, vocabulary_size, content_tokens, args):
+    """Trains one variant and returns (int model, validation metrics)."""
+    from train import make_callbacks, make_weighted_loss
+    model = build_model(vocabulary_size, content_tokens)
+    model.compile(loss=make_weighted_loss([1.0, 2.0]),
+                  optimizer=tf.keras.optimizers.Adam(learning_rate=args.learning_rate, clipnorm=1.0),
+                  metrics=["accuracy"])
+    inputs = (lambda ids: ids) if content_tokens else (lambda ids: ids[0])
+    model.fit(inputs(train_ids), y_train, validation_data=(inputs(val_ids), y_val), epochs=args.epochs,
+              batch_size=64, callbacks=make_callbacks(args.learning_rate, args.patience, verbose=0), verbose=0)
+
+    predicted = np.argmax(model.predict(inputs(val_ids), batch_size=512, verbose=0), axis=1)
+    tp = np.sum((predicted == 1) & (y_val == 1))
+    precision = tp / max(np.sum(predicted == 1), 1)
+    recall = tp / max(np.sum(y_val == 1), 1)
+    metrics = {
+        "accuracy": np.mean(predicted == y_val),
+        "f1": 2 * precision * recall / max(precision + recall, 1e-9),
+        "recall": recall
+    }
+    print(f"{name:>14}: accuracy {metrics['accuracy']:.4f}, recall {metrics['recall']:.4f}, f1 {metrics['f1']:.4f}")
+    return model, metrics
+
+
+def time_call(fn, repeats=50):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train a title + content model and compare it with title-only")
+    parser.add_argument("--data-dir", default="referendum_data", help="Directory of *_referendums.csv and stores")
+    parser.add_argument("--titles-csv", default=os.path.join(ROOT_DIR, "data.csv"),
+                        help="Extra labeled titles without content ('' to skip)")
+    parser.add_argument("--content-tokens", type=int, default=CONTENT_TOKENS, help="Body tokens per referendum")
+    parser.add_argument("--content-chars", type=int, default=CONTENT_CHARS,
+                        help="Body characters extracted from stored HTML")
+    parser.add_argument("--epochs", type=int, default=300)
+    parser.add_argument("--patience", type=int, default=20)
+    parser.add_argument("--learning-rate", type=float, default=1e-3)
+    parser.add_argument("--output", default=CONTENT_MODEL_PATH)
+    args = parser.parse_args()
+    if args.content_tokens < 1:
+        # The title-only variant is always trained alongside for comparison
+        parser.error("--content-tokens must be at least 1")
+
+    examples = load_examples(args.data_dir, args.titles_csv or None, args.content_chars)
+    keys, titles, contents, labels = (list(column) for column in zip(*examples))
+    labels = np.array(labels, dtype="int32")
+    print(f"Loaded {len(examples)} examples, {labels.sum()} nay requests")
+
+    train_idx, val_idx = train_test_split(np.arange(len(labels)), test_size=0.2, random_state=42, stratify=labels)
+    vectorizer = tf.keras.layers.TextVectorization(max_tokens=MAX_TOKENS, standardize="lower_and_strip_punctuation")
+    vectorizer.adapt([titles[i] for i in train_idx] + [contents[i] for i in train_idx if contents[i]])
+    vocabulary = vectorizer.get_vocabulary()
+
+    title_vectorizer = make_vectorizer(vocabulary, TITLE_TOKENS, "title_vectorizer")
+    content_vectorizer = make_vectorizer(vocabulary, args.content_tokens, "content_vectorizer")
+    title_ids = title_vectorizer(tf.constant(titles)).numpy()
+    content_ids = content_vectorizer(tf.constant(contents)).numpy()
+
+    def split(idx):
+        return [title_ids[idx], content_ids[idx]], labels[idx]
+
+    (train_ids, y_train), (val_ids, y_val) = split(train_idx), split(val_idx)
+    print(f"Validation split: {len(val_idx)} examples")
+    title_model, _ = train_and_evaluate("title only", train_ids, y_train, val_ids, y_val, len(vocabulary), 0, args)
+    content_model, _ = train_and_evaluate("title+content", train_ids, y_train, val_ids, y_val, len(vocabulary),
+                                          args.content_tokens, args)
+
+    export_string_model(content_model, vocabulary, args.content_tokens).save(args.output)
+    print(f"Saved model to {args.output}")
+
+    classifier = ContentAwareClassifier(args.output)
+    i = int(val_idx[0])
+    title_only = export_string_model(title_model, vocabulary, 0)
+    one_title = tf.constant([[titles[i]]])
+    print("Latency for one referendum:")
+    print(f"  title only:                 {time_call(lambda: title_only(one_title, training=False)):.2f} ms")
+    classifier.content_cache.clear()
+    print(f"  title+content, uncached:    "
+          f"{time_call(lambda: (classifier.content_cache.clear(), classifier.predict_proba([keys[i]], [titles[i]], [contents[i]]))):.2f} ms")
+    print(f"  title+content, cached body: "
+          f"{time_call(lambda: classifier.predict_proba([keys[i]], [titles[i]], [contents[i]])):.2f} ms")
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, ROOT_DIR)
+    main()
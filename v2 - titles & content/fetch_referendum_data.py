@@ -2,150 +2,330 @@
 import os
 import csv
 import json
+import asyncio
 import time
-import requests
 import argparse
-from bs4 import BeautifulSoup
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 import re
-from rejection_patterns import RejectionPattern
+from html_text import HtmlTextCache, extract_text
+from rejection_patterns import SCAN_BUDGET, BodyScanner, RejectionPattern, merge_pattern_reports
+from backfill_checkpoint import CHECKPOINT_EVERY, BackfillCheckpoint
+from referendum_store import ReferendumStore, migrate_json_dir, store_path
+from referendum_fetcher import API_URL, CONCURRENCY, REQUESTS_PER_SECOND, ReferendumFetcher, TokenBucket
+from referendum_pipeline import MAX_PENDING, QUEUE_SIZE, STAGES, ReferendumPipeline
 
 NETWORKS = ["polkadot", "kusama", "moonbeam"]
 OUTPUT_DIR = "referendum_data"
-REQUEST_DELAY = 0.5  # Delay between API requests in seconds
-MAX_RETRIES = 3      # Maximum number of retries for failed requests
-
-
-def html_to_text(html_content):
-    """Convert HTML content to plain text."""
-    if not html_content:
-        return ""
-    soup = BeautifulSoup(html_content, "html.parser")
-    text = soup.get_text(separator=" ", strip=True)
-    return re.sub(r'\s+', ' ', text).strip()
-
-
-def fetch_referendum_details(ref_id, network="polkadot", retries=MAX_RETRIES):
-    """Fetch details for a specific referendum from Polkassembly API."""
-    url = "https://api.polkassembly.io/api/v1/posts/on-chain-post"
-    params = {
-        "postId": ref_id,
-        "proposalType": "referendums_v2"
-    }
-    headers = {
-        "x-network": network
-    }
-
-    for attempt in range(retries):
-        try:
-            response = requests.get(url, headers=headers, params=params)
-            response.raise_for_status()
-            data = response.json()
-
-            if not data:
-                print(f"Referendum {ref_id} not found or has no data")
-                return None
-
-            return data
-        except requests.exceptions.RequestException as e:
-            if attempt < retries - 1:
-                print(f"Error fetching referendum {ref_id}, retrying ({attempt + 1}/{retries}): {e}")
-                time.sleep(1 + attempt)  # Exponential backoff
-            else:
-                print(f"Failed to fetch referendum {ref_id} after {retries} attempts: {e}")
-                return None
-
-
-def download_referendum_data(start_id=1, end_id=1500, network="polkadot", output_dir=OUTPUT_DIR):
-    """Download details for referendums and save to CSV file."""
+CONTENT_CHARS = 100  # Characters of referendum body text kept in the CSV (and all the detector sees without body scanning)
+TEXT_CACHE_FILE = "html_text_cache.sqlite"
+SCAN_REPORT_BUDGETS = [1024, 4096, SCAN_BUDGET, None]
+
+# Columns of the network CSVs
+CSV_HEADERS = ["id", "title", "content", "is_nay_request", "confidence", "explanation", "status", "created_at", "proposer"]
+
+_text_cache = None
+_scan_bodies = False
+_scan_budget = SCAN_BUDGET
+_instrument = False
+
+
+def html_to_text(html_content, max_chars=None, paragraphs=False):
+    """Convert HTML content to plain text, stopping after max_chars characters if given."""
+    if _text_cache is not None:
+        return _text_cache.html_to_text(html_content, max_chars, paragraphs)
+    return extract_text(html_content, max_chars, paragraphs)
+
+
+def open_text_cache(output_dir):
+    """Cache extracted body text in output_dir so unchanged bodies are never parsed twice across runs."""
+    global _text_cache
+    if _text_cache is None:
+        _text_cache = HtmlTextCache(os.path.join(output_dir, TEXT_CACHE_FILE))
+
+
+def commit_text_cache():
+    if _text_cache is not None:
+        _text_cache.commit()
+
+
+def configure_detector(scan_bodies=False, scan_budget=SCAN_BUDGET, instrument=False):
+    """
+    Sets up the detector used for new rows.
+
+    Args:
+        scan_bodies (bool): Scan whole bodies through a BodyScanner; otherwise the
+            detector only sees the CSV's first CONTENT_CHARS
+        scan_budget (int, optional): Characters scanned per body; None means no limit
+        instrument (bool): Count and time every pattern, for a pattern report
+    """
+    global _scan_bodies, _scan_budget, _instrument, _worker_detector
+    _scan_bodies = scan_bodies
+    _scan_budget = scan_budget
+    _instrument = instrument
+    _worker_detector = None
+
+
+def make_detector():
+    """The nay detector for the current configuration."""
+    if not _scan_bodies:
+        return RejectionPattern(instrument=_instrument)
+    return BodyScanner(RejectionPattern(linear=True, instrument=_instrument), budget=_scan_budget)
+
+
+def take_pattern_report(detector):
+    """The detector's pattern report since the last call, or None when not instrumenting."""
+    if not _instrument:
+        return None
+    report = detector.pattern_report()
+    detector.reset_stats()
+    return report
+
+
+def save_pattern_report(report, path):
+    """Writes a pattern report to path as JSON and prints how often each tier ended the checks."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    patterns = [pattern for tier in report["tiers"].values() for pattern in tier["patterns"]]
+    never = sum(1 for pattern in patterns if pattern["matches"] == 0)
+    print(f"\nSaved pattern report to {path}: {report['texts']} texts checked, "
+          f"{never} of {len(patterns)} patterns never matched")
+    for name, tier in report["tiers"].items():
+        print(f"  {name:>8}: {tier['calls']:>7} searches, hit {tier['hit_rate']:.1%}, "
+              f"answered by one scan {tier['combined_reject_rate']:.1%}, {tier['seconds'] * 1000:.1f} ms")
+
+
+def init_worker(output_dir, scan_bodies, scan_budget, instrument):
+    open_text_cache(output_dir)
+    configure_detector(scan_bodies, scan_budget, instrument)
+
+
+def download_referendum_data(start_id=1, end_id=1500, network="polkadot", output_dir=OUTPUT_DIR,
+                             concurrency=CONCURRENCY, rate=REQUESTS_PER_SECOND, api_url=API_URL,
+                             recheck_missing=False, pattern_report=None, workers=1, queue_size=QUEUE_SIZE,
+                             max_pending=MAX_PENDING):
+    """
+    Download details for referendums, appending to the CSV in checkpointed batches.
+
+    Runs as a ReferendumPipeline: concurrent fetches, parsing and detection in
+    `workers` processes, and one writer storing raw data and rows in ID order.
+    queue_size and max_pending set how far fetching may run ahead of the later
+    stages. With pattern_report (a path) and an instrumented detector
+    (configure_detector()), per-pattern counts and timings of the run are
+    saved there as JSON.
+    """
     # Set up directories
     os.makedirs(output_dir, exist_ok=True)
 
     # Create output CSV file
     csv_file = os.path.join(output_dir, f"{network}_referendums.csv")
+    manifest_file = os.path.join(output_dir, f"{network}_checkpoint.json")
+
+    # Raw API responses go to the network's compact referendum store
+    store = ReferendumStore(store_path(output_dir, network))
+
+    # The checkpoint knows which IDs are already in the CSV or known to be missing
+    checkpoint = BackfillCheckpoint(csv_file, manifest_file, CSV_HEADERS)
+    done_ids = checkpoint.done_ids(skip_missing=not recheck_missing)
+
+    pending = [ref_id for ref_id in range(start_id, end_id + 1) if ref_id not in done_ids]
+    print(f"Skipping {end_id - start_id + 1 - len(pending)} already processed referendums")
+
+    batch = {"rows": [], "fetched": [], "missing": [], "failed": []}
+    added = 0
+    pattern_totals = None
+
+    def flush():
+        nonlocal added, batch
+        # Raw data must be durable before the checkpoint says the IDs are done
+        store.flush()
+        checkpoint.commit(batch["rows"], batch["fetched"], batch["missing"], batch["failed"])
+        added += len(batch["rows"])
+        batch = {"rows": [], "fetched": [], "missing": [], "failed": []}
+
+    def write(ref_id, status, data, result):
+        # Called by the pipeline's single writer, in ID order
+        nonlocal pattern_totals
+        if status == "fetched":
+            # Save raw JSON data
+            store.put(ref_id, data)
+            row, report = result
+            if report is not None:
+                pattern_totals = merge_pattern_reports([pattern_totals, report])
+            if row is None:
+                # Stored but not in the CSV, so the next run retries it
+                status = "failed"
+            else:
+                batch["rows"].append(row)
+        batch[status].append(ref_id)
+        if len(batch["fetched"]) + len(batch["missing"]) + len(batch["failed"]) >= CHECKPOINT_EVERY:
+            flush()
+
+    def progress(written, total, pipeline):
+        depths = pipeline.queue_depths()
+        print(f"\rWritten {written}/{total} referendums "
+              f"(queued for processing {depths['process']}, for writing {depths['write']})...", end="")
+
+    with store, ReferendumFetcher(network, concurrency=concurrency, rate=rate, api_url=api_url) as fetcher:
+        async def run():
+            limiter = TokenBucket(fetcher.rate)
+            semaphore = asyncio.Semaphore(fetcher.concurrency)
+
+            async def fetch(ref_id):
+                return await fetcher.fetch(ref_id, limiter, semaphore)
+
+            pipeline = ReferendumPipeline(fetch, label_records, write, fetch_workers=fetcher.concurrency,
+                                          cpu_workers=workers, queue_size=queue_size, max_pending=max_pending,
+                                          initializer=init_worker,
+                                          initargs=(output_dir, _scan_bodies, _scan_budget, _instrument),
+                                          progress=progress)
+            await pipeline.run(pending)
+            return pipeline
+
+        pipeline = asyncio.run(run())
+        flush()
+
+    if added:
+        print(f"\nAdded {added} new records to {csv_file}")
+    else:
+        print(f"\nNo new records to add to {csv_file}")
+    if checkpoint.failed:
+        print(f"{len(checkpoint.failed)} referendums failed and will be retried on the next run")
+    print_pipeline_report(pipeline.report())
+    if pattern_report and pattern_totals:
+        save_pattern_report(pattern_totals, pattern_report)
+
+
+def label_records(chunk):
+    """
+    Builds and labels the CSV rows of a chunk of downloaded referendums with
+    process_chunk(); runs in the download's worker processes.
+
+    Returns one (row, report) pair per referendum: row is None if it could not
+    be built, and the chunk's pattern report (None when not instrumenting) comes
+    with the first pair only, so the writer merges it once.
+    """
+    rows, report = process_chunk([(data.get("post_id"), data) for data in chunk])
+    return list(zip(rows, [report] + [None] * (len(rows) - 1)))
+
+
+def print_pipeline_report(report):
+    """Prints a ReferendumPipeline.report(): per-stage throughput, busy and blocked time, queue depths."""
+    print(f"Pipeline: {report['elapsed_seconds']:.1f} s, reorder buffer up to {report['max_reorder_buffer']}")
+    for stage in STAGES:
+        stats = report[stage]
+        print(f"  {stage:>7}: {stats['items']:>5} items, {stats['items_per_second']:.1f}/s, "
+              f"busy {stats['busy_seconds']:.1f} s, waited for the next stage {stats['blocked_seconds']:.1f} s, "
+              f"next queue depth mean {stats['mean_queue_depth']:.1f} max {stats['max_queue_depth']}")
+
+
+def build_row(data):
+    """
+    Build a CSV row (without detection results) from a referendum's API data.
+
+    When bodies are scanned, the whole body text (paragraphs on separate lines)
+    is kept under "body" for label_rows(), which removes it again.
+    """
+    # Extract data
+    title = data.get("title", "")
+    body = None
+    if not _scan_bodies:
+        content = html_to_text(data.get("content", ""), max_chars=CONTENT_CHARS)
+    else:
+        body = html_to_text(data.get("content", ""), paragraphs=True)
+        content = body[:CONTENT_CHARS].replace("\n", " ")
+
+    row = {
+        "id": str(data.get("post_id", "")),
+        "title": title,
+        "content": content[:CONTENT_CHARS],
+        "status": data.get("status", ""),
+        "created_at": data.get("created_at", ""),
+        "proposer": data.get("proposer", "")
+    }
+    if body is not None:
+        row["body"] = body
+    return row
 
-    # Create JSON directory for raw data
-    json_dir = os.path.join(output_dir, network, "json")
-    os.makedirs(json_dir, exist_ok=True)
 
-    # Initialize the nay vote detector
-    detector = RejectionPattern()
+def load_json_file(file_path):
+    """Read a stored referendum JSON file."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
 
-    # Check if the CSV exists and has data
-    existing_ids = set()
-    if os.path.exists(csv_file):
-        with open(csv_file, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row.get("id") and row["id"].isdigit():
-                    existing_ids.add(int(row["id"]))
-        print(f"Found {len(existing_ids)} existing records in {csv_file}")
 
-    # Headers for the CSV file
-    headers = ["id", "title", "content", "is_nay_request", "confidence", "explanation", "status", "created_at", "proposer"]
+def label_rows(detector, rows):
+    """Apply the nay vote detector to a list of CSV rows in one batch call."""
+    results = detector.detect_many(
+        [row["title"] for row in rows],
+        [row.pop("body", row["content"]) for row in rows]
+    )
+    for i, row in enumerate(rows):
+        row["is_nay_request"] = "1" if results["is_nay_request"][i] else "0"
+        row["confidence"] = str(float(results["confidence"][i]))
+        row["explanation"] = results["explanations"][results["explanation_code"][i]]
+    return rows
 
-    # Collection of new rows to append
-    new_rows = []
 
-    for ref_id in range(start_id, end_id + 1):
-        if ref_id in existing_ids:
-            print(f"\rSkipping referendum {ref_id} (already processed)...", end="")
-            continue
-
-        print(f"\rFetching referendum {ref_id}/{end_id}...", end="")
-
-        data = fetch_referendum_details(ref_id, network)
-        if not data:
-            time.sleep(REQUEST_DELAY)
-            continue
+_worker_detector = None
 
-        # Save raw JSON data
-        json_file = os.path.join(json_dir, f"referendum_{ref_id}.json")
-        with open(json_file, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
 
-        # Extract basic data
-        title = data.get("title", "")
-        content = html_to_text(data.get("content", ""))
+def process_chunk(items, load=None):
+    """
+    Build and label rows for a chunk of (ref_id, source) items; runs in a worker process when --workers > 1.
 
-        # Apply NayVoteDetector
-        result = detector.detect(title, content[:100])
+    load(source) returns the referendum's API data, e.g. load_json_file() for
+    JSON file paths; without it the sources are the data (store records).
+    Returns one labelled row per item, None where it could not be built, and
+    the chunk's pattern report (None when not instrumenting).
+    """
+    global _worker_detector
+    if _worker_detector is None:
+        _worker_detector = make_detector()
 
-        row = {
-            "id": str(data.get("post_id", "")),
-            "title": title,
-            "content": content[:100],  # Limit to 200 characters as requested
-            "is_nay_request": "1" if result["is_nay_request"] else "0",
-            "confidence": str(result["confidence"]),
-            "explanation": result["explanation"],
-            "status": data.get("status", ""),
-            "created_at": data.get("created_at", ""),
-            "proposer": data.get("proposer", "")
-        }
+    rows = []
+    for ref_id, source in items:
+        try:
+            rows.append(build_row(load(source) if load else source))
+        except Exception as e:
+            rows.append(None)
+            print(f"\nError processing referendum {ref_id}: {e}")
 
-        new_rows.append(row)
+    commit_text_cache()
+    label_rows(_worker_detector, [row for row in rows if row is not None])
+    return rows, take_pattern_report(_worker_detector)
 
-        # Be nice to the API
-        time.sleep(REQUEST_DELAY)
 
-    # Write all new rows to the CSV file
-    if new_rows:
-        file_exists = os.path.exists(csv_file) and os.path.getsize(csv_file) > 0
+def migrate_json_files(network="polkadot", json_dir=None, output_dir=OUTPUT_DIR):
+    """One-shot import of a network's referendum_<id>.json files into its referendum store."""
+    if json_dir is None:
+        json_dir = os.path.join(output_dir, network, "json")
 
-        with open(csv_file, "a" if file_exists else "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=headers)
+    if not os.path.exists(json_dir):
+        print(f"Error: JSON directory {json_dir} does not exist.")
+        return
 
-            if not file_exists:
-                writer.writeheader()
+    path = store_path(output_dir, network)
+    with ReferendumStore(path) as store:
+        imported = migrate_json_dir(json_dir, store)
+        print(f"Imported {imported} JSON files into {path} ({len(store)} referendums stored)")
 
-            writer.writerows(new_rows)
 
-        print(f"\nAdded {len(new_rows)} new records to {csv_file}")
-    else:
-        print(f"\nNo new records to add to {csv_file}")
+def process_json_files(network="polkadot", json_dir=None, output_dir=OUTPUT_DIR, workers=1, pattern_report=None):
+    """
+    Process stored referendums to create a CSV file, optionally across several worker processes.
 
+    Reads the network's referendum store, or a directory of referendum_<id>.json
+    files when json_dir is given or no store exists yet. With pattern_report (a path)
+    and an instrumented detector (configure_detector()), per-pattern counts and
+    timings summed over all workers are saved there as JSON.
+    """
+    path = store_path(output_dir, network)
+    if json_dir is None and os.path.exists(path):
+        process_store(network, path, output_dir, workers, pattern_report)
+        return
 
-def process_json_files(network="polkadot", json_dir=None, output_dir=OUTPUT_DIR):
-    """Process existing JSON files to create a CSV file."""
     if json_dir is None:
         json_dir = os.path.join(output_dir, network, "json")
 
@@ -153,24 +333,11 @@ def process_json_files(network="polkadot", json_dir=None, output_dir=OUTPUT_DIR)
         print(f"Error: JSON directory {json_dir} does not exist.")
         return
 
-    # Initialize the nay vote detector
-    detector = RejectionPattern()
-
     # Create output CSV file
     csv_file = os.path.join(output_dir, f"{network}_referendums.csv")
 
     # Check if the CSV exists and has data
-    existing_ids = set()
-    if os.path.exists(csv_file):
-        with open(csv_file, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row.get("id") and row["id"].isdigit():
-                    existing_ids.add(int(row["id"]))
-        print(f"Found {len(existing_ids)} existing records in {csv_file}")
-
-    # Headers for the CSV file
-    headers = ["id", "title", "content", "is_nay_request", "confidence", "explanation", "status", "created_at", "proposer"]
+    existing_ids = read_existing_ids(csv_file)
 
     # Find all JSON files
     json_files = [f for f in os.listdir(json_dir) if f.endswith('.json')]
@@ -178,62 +345,195 @@ def process_json_files(network="polkadot", json_dir=None, output_dir=OUTPUT_DIR)
 
     print(f"Found {total_files} JSON files in {json_dir}")
 
-    # Collection of new rows to append
-    new_rows = []
-
-    for i, json_file in enumerate(json_files):
+    # Collect the files still to process, ordered by referendum ID
+    pending = []
+    for json_file in json_files:
         # Extract referendum ID from filename
-        ref_id = None
         match = re.search(r'referendum_(\d+)\.json', json_file)
-        if match:
-            ref_id = int(match.group(1))
-        else:
+        if not match:
             print(f"Skipping file with invalid name format: {json_file}")
             continue
 
+        ref_id = int(match.group(1))
         if ref_id in existing_ids:
-            print(f"\rSkipping referendum {ref_id} (already in CSV)...", end="")
             continue
 
-        print(f"\rProcessing file {i + 1}/{total_files}: {json_file}...", end="")
+        pending.append((ref_id, os.path.join(json_dir, json_file)))
 
-        # Read JSON file
-        file_path = os.path.join(json_dir, json_file)
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-
-            # Extract data
-            title = data.get("title", "")
-            content = html_to_text(data.get("content", ""))
-
-            # Apply NayVoteDetector
-            result = detector.detect(title, content[:100])
-
-            # Extract basic data
-            row = {
-                "id": str(data.get("post_id", "")),
-                "title": title,
-                "content": content[:100],  # Limit to 200 characters as requested
-                "is_nay_request": "1" if result["is_nay_request"] else "0",
-                "confidence": str(result["confidence"]),
-                "explanation": result["explanation"],
-                "status": data.get("status", ""),
-                "created_at": data.get("created_at", ""),
-                "proposer": data.get("proposer", "")
-            }
-
-            new_rows.append(row)
+    pending.sort()
+    print(f"Skipping {total_files - len(pending)} files, processing {len(pending)}")
+
+    new_rows, report = run_chunks(pending, load_json_file, workers, output_dir)
+    write_new_rows(csv_file, new_rows)
+    if pattern_report and report:
+        save_pattern_report(report, pattern_report)
+
+
+def process_store(network, path, output_dir=OUTPUT_DIR, workers=1, pattern_report=None):
+    """Process every referendum in a store that is not yet in the network CSV."""
+    csv_file = os.path.join(output_dir, f"{network}_referendums.csv")
+    existing_ids = read_existing_ids(csv_file)
+
+    with ReferendumStore(path) as store:
+        print(f"Found {len(store)} referendums in {path}")
+        pending = [ref_id for ref_id in store.ids() if ref_id not in existing_ids]
+        print(f"Skipping {len(store) - len(pending)} referendums, processing {len(pending)}")
+
+        # A single sequential read when most of the store is pending
+        if len(pending) > len(store) // 2:
+            pending_ids = set(pending)
+            records = [(ref_id, data) for ref_id, data in store.items() if ref_id in pending_ids]
+        else:
+            records = list(store.items(pending))
+
+    new_rows, report = run_chunks(records, None, workers, output_dir)
+    write_new_rows(csv_file, new_rows)
+    if pattern_report and report:
+        save_pattern_report(report, pattern_report)
+
+
+def stored_records(network="polkadot", json_dir=None, output_dir=OUTPUT_DIR):
+    """(ref_id, data) of every stored referendum, from the network's store or a directory of JSON files."""
+    path = store_path(output_dir, network)
+    if json_dir is None and os.path.exists(path):
+        with ReferendumStore(path) as store:
+            return list(store.items())
+
+    if json_dir is None:
+        json_dir = os.path.join(output_dir, network, "json")
+    records = []
+    if os.path.exists(json_dir):
+        for json_file in os.listdir(json_dir):
+            match = re.search(r'referendum_(\d+)\.json', json_file)
+            if match:
+                with open(os.path.join(json_dir, json_file), 'r', encoding='utf-8') as f:
+                    records.append((int(match.group(1)), json.load(f)))
+    return sorted(records, key=lambda record: record[0])
+
+
+def scan_report(records, budgets=SCAN_REPORT_BUDGETS):
+    """
+    Nay hit rate against body characters scanned, for the first CONTENT_CHARS and for each scan budget.
+
+    Returns:
+        list: One dict per setting, with the referendums labelled nay, those not
+            labelled nay from the first CONTENT_CHARS alone, characters scanned and time taken
+    """
+    titles = [data.get("title") or "" for _, data in records]
+    bodies = [html_to_text(data.get("content") or "", paragraphs=True) for _, data in records]
+    total_chars = sum(len(body) for body in bodies)
+    detector = RejectionPattern(linear=True)
+
+    start = time.perf_counter()
+    heads = [body[:CONTENT_CHARS].replace("\n", " ") for body in bodies]
+    baseline = [bool(is_nay) for is_nay in detector.detect_many(titles, heads)["is_nay_request"]]
+    settings = [{
+        "setting": f"first {CONTENT_CHARS} chars",
+        "nay": sum(baseline),
+        "new_nay": 0,
+        "hit_rate": sum(baseline) / len(records) if records else 0.0,
+        "scanned_chars": sum(len(head) for head in heads),
+        "scanned_fraction": sum(len(head) for head in heads) / total_chars if total_chars else 0.0,
+        "seconds": time.perf_counter() - start
+    }]
+
+    for budget in budgets:
+        scanner = BodyScanner(detector, budget=budget)
+        start = time.perf_counter()
+        is_nay = [bool(nay) for nay in scanner.detect_many(titles, bodies)["is_nay_request"]]
+        report = scanner.report()
+        settings.append({
+            "setting": f"scan {budget} chars" if budget is not None else "scan whole body",
+            "nay": sum(is_nay),
+            "new_nay": sum(nay and not head_nay for nay, head_nay in zip(is_nay, baseline)),
+            "hit_rate": sum(is_nay) / len(records) if records else 0.0,
+            "scanned_chars": report["scanned_chars"],
+            "scanned_fraction": report["scanned_chars"] / total_chars if total_chars else 0.0,
+            "seconds": time.perf_counter() - start,
+            "decisive_stops": report["decisive_stops"],
+            "budget_stops": report["budget_stops"]
+        })
+    return settings
+
+
+def print_scan_report(network="polkadot", json_dir=None, output_dir=OUTPUT_DIR, report_json=None):
+    """Prints scan_report() for a network's stored referendums, optionally saving it as JSON."""
+    records = stored_records(network, json_dir, output_dir)
+    if not records:
+        print(f"No stored referendums for {network} in {output_dir}")
+        return
+
+    open_text_cache(output_dir)
+    settings = scan_report(records)
+    commit_text_cache()
+    print(f"{len(records)} {network} referendums")
+    for setting in settings:
+        print(f"  {setting['setting']:>22}: nay {setting['nay']:>5} ({setting['hit_rate']:.2%}, "
+              f"+{setting['new_nay']}), scanned {setting['scanned_chars']:>10} chars "
+              f"({setting['scanned_fraction']:.1%}), {setting['seconds'] * 1000:.0f} ms")
+
+    if report_json:
+        with open(report_json, "w", encoding="utf-8") as f:
+            json.dump({"network": network, "referendums": len(records), "settings": settings}, f, indent=2)
+        print(f"Saved report to {report_json}")
 
-        except Exception as e:
-            print(f"\nError processing {json_file}: {e}")
 
+def read_existing_ids(csv_file):
+    """Referendum IDs already present in a network CSV."""
+    existing_ids = set()
+    if os.path.exists(csv_file):
+        with open(csv_file, "r", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                if row.get("id") and row["id"].isdigit():
+                    existing_ids.add(int(row["id"]))
+        print(f"Found {len(existing_ids)} existing records in {csv_file}")
+    return existing_ids
+
+
+def run_chunks(items, load=None, workers=1, output_dir=OUTPUT_DIR):
+    """
+    Runs process_chunk() with load over chunks of (ref_id, source) items, in a process pool
+    when workers > 1, keeping input order.
+
+    Returns the rows built in all chunks and their merged pattern reports (None when not instrumenting).
+    """
+    # Several chunks per worker keeps the pool busy when chunk costs are uneven
+    workers = max(1, workers)
+    chunk_size = max(1, -(-len(items) // (workers * 4)))
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+    chunk_function = partial(process_chunk, load=load)
+
+    # Collection of new rows to append
+    new_rows = []
+    reports = []
+
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(output_dir, _scan_bodies, _scan_budget, _instrument)) as executor:
+            for rows, report in executor.map(chunk_function, chunks):
+                new_rows.extend(row for row in rows if row is not None)
+                reports.append(report)
+                print(f"\rProcessed {len(new_rows)}/{len(items)} referendums...", end="")
+    else:
+        open_text_cache(output_dir)
+        for chunk in chunks:
+            rows, report = chunk_function(chunk)
+            new_rows.extend(row for row in rows if row is not None)
+            reports.append(report)
+            print(f"\rProcessed {len(new_rows)}/{len(items)} referendums...", end="")
+
+    return new_rows, merge_pattern_reports(reports)
+
+
+def write_new_rows(csv_file, new_rows):
+    """Appends labelled rows to a network CSV in one write, adding the header to a new file."""
     # Write all new rows to the CSV file
     if new_rows:
         file_exists = os.path.exists(csv_file) and os.path.getsize(csv_file) > 0
 
         with open(csv_file, "a" if file_exists else "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=headers)
+            writer = csv.DictWriter(f, fieldnames=CSV_HEADERS)
 
             if not file_exists:
                 writer.writeheader()
@@ -253,15 +553,51 @@ def main():
     parser.add_argument("--output", default=OUTPUT_DIR, help="Output directory")
     parser.add_argument("--process-json", action="store_true", help="Process existing JSON files instead of downloading")
     parser.add_argument("--json-dir", help="Directory containing JSON files (optional)")
+    parser.add_argument("--migrate", action="store_true", help="Import existing JSON files into the referendum store")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for parsing and detection (default: 1)")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="Maximum API requests in flight")
+    parser.add_argument("--rate", type=float, default=REQUESTS_PER_SECOND, help="Maximum API requests per second")
+    parser.add_argument("--recheck-missing", action="store_true", help="Fetch IDs the checkpoint recorded as missing again")
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE,
+                        help="Items each download stage may queue for the next before it waits")
+    parser.add_argument("--max-pending", type=int, default=MAX_PENDING,
+                        help="Referendums fetched ahead of the one the writer is waiting for")
+    parser.add_argument("--scan-budget", type=int, default=SCAN_BUDGET,
+                        help=f"Characters of each body the detector scans (0: whole body, default: {SCAN_BUDGET})")
+    parser.add_argument("--body-scan", action="store_true",
+                        help=f"Scan whole bodies instead of only the first {CONTENT_CHARS} characters "
+                             "(labels more referendums nay than the checked-in CSVs)")
+    parser.add_argument("--scan-report", action="store_true",
+                        help="Report nay hit rate against characters scanned for several scan budgets")
+    parser.add_argument("--report-json", help="Also save the --scan-report results to this JSON file")
+    parser.add_argument("--pattern-report",
+                        help="Count and time every detector pattern and save the counters to this JSON file")
 
     args = parser.parse_args()
+    configure_detector(args.body_scan, args.scan_budget or None, instrument=bool(args.pattern_report))
 
-    if args.process_json:
+    if args.scan_report:
+        print_scan_report(
+            network=args.network,
+            json_dir=args.json_dir,
+            output_dir=args.output,
+            report_json=args.report_json
+        )
+    elif args.migrate:
+        print(f"Migrating JSON files for {args.network}...")
+        migrate_json_files(
+            network=args.network,
+            json_dir=args.json_dir,
+            output_dir=args.output
+        )
+    elif args.process_json:
         print(f"Processing existing JSON files for {args.network}...")
         process_json_files(
             network=args.network,
             json_dir=args.json_dir,
-            output_dir=args.output
+            output_dir=args.output,
+            workers=args.workers,
+            pattern_report=args.pattern_report
         )
     else:
         print(f"Processing {args.network} network (IDs {args.start}-{args.end})...")
@@ -269,7 +605,14 @@ def main():
             start_id=args.start,
             end_id=args.end,
             network=args.network,
-            output_dir=args.output
+            output_dir=args.output,
+            concurrency=args.concurrency,
+            rate=args.rate,
+            recheck_missing=args.recheck_missing,
+            pattern_report=args.pattern_report,
+            workers=args.workers,
+            queue_size=args.queue_size,
+            max_pending=args.max_pending
         )
 
 
@@ -0,0 +1,246 @@
+import hashlib
+import os
+import re
+import sqlite3
+from html.entities import html5
+from html.parser import HTMLParser
+
+# Tags whose text BeautifulSoup's get_text() leaves out (script, style, template, ruby annotations)
+HIDDEN_TEXT_TAGS = {"script", "style", "template", "rt", "rp"}
+
+# Tags BeautifulSoup treats as empty elements
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "keygen", "link", "menuitem",
+    "meta", "param", "source", "track", "wbr", "basefont", "bgsound", "command", "frame",
+    "image", "isindex", "nextid", "spacer"
+}
+
+# Tags that start or end a paragraph when paragraphs are kept
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "dd", "div", "dl", "dt", "figcaption", "figure", "footer",
+    "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "ol", "p", "pre", "section", "table", "tr", "ul"
+}
+
+# A blank line separates paragraphs in markdown (and in text between tags)
+BLANK_LINE_RE = re.compile(r'\n[^\S\n]*\n')
+
+# html5 maps names like "amp;" and "amp" to characters; BeautifulSoup looks names up without ';'
+ENTITIES = {name.rstrip(";"): char for name, char in html5.items()}
+
+
+class _BudgetReached(Exception):
+    pass
+
+
+class TextExtractor(HTMLParser):
+    """
+    Streaming visible-text extractor built on the stdlib html.parser events.
+
+    Produces the same text as BeautifulSoup(html, "html.parser").get_text(
+    separator=" ", strip=True) followed by whitespace collapsing, without
+    building a tree, and can stop as soon as `max_chars` characters of text
+    have been collected. With `paragraphs`, strings that start a paragraph
+    (after a block tag or a blank line) are joined with a newline instead
+    of a space, so the text keeps its length and, with newlines read as
+    spaces, its characters.
+    """
+
+    def __init__(self, max_chars=None, paragraphs=False):
+        super().__init__(convert_charrefs=False)
+        self.max_chars = max_chars
+        self.paragraphs = paragraphs
+        self.strings = []
+        self.breaks = set()  # Indices of strings that start a new paragraph
+        self._break = False
+        self.length = -1  # Length of " ".join(self.strings)
+        self._pieces = []
+        self._open_tags = []
+        self._already_closed = []
+        self._hidden_depth = 0
+
+    def _end_data(self, visible=None):
+        if not self._pieces:
+            return
+        text = "".join(self._pieces)
+        self._pieces = []
+        if visible is None:
+            visible = self._hidden_depth == 0
+        if not visible:
+            return
+
+        for i, part in enumerate(BLANK_LINE_RE.split(text) if self.paragraphs else [text]):
+            self._break = self._break or i > 0
+            part = re.sub(r'\s+', ' ', part.strip())
+            if not part:
+                continue
+            if self._break and self.strings:
+                self.breaks.add(len(self.strings))
+            self._break = False
+            self.strings.append(part)
+            self.length += len(part) + 1
+            if self.max_chars is not None and self.length >= self.max_chars:
+                raise _BudgetReached()
+
+    def handle_starttag(self, tag, attrs, handle_empty_element=True):
+        self._end_data()
+        self._break = self._break or (self.paragraphs and tag in BLOCK_TAGS)
+        self._open_tags.append(tag)
+        if tag in HIDDEN_TEXT_TAGS:
+            self._hidden_depth += 1
+        if tag in VOID_TAGS and handle_empty_element:
+            # Closed straight away; a later explicit end tag is then ignored once
+            self.handle_endtag(tag, check_already_closed=False)
+            self._already_closed.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs, handle_empty_element=False)
+        self.handle_endtag(tag)
+
+    def handle_endtag(self, tag, check_already_closed=True):
+        if check_already_closed and tag in self._already_closed:
+            self._already_closed.remove(tag)
+            return
+        self._end_data()
+        self._break = self._break or (self.paragraphs and tag in BLOCK_TAGS)
+        if tag not in self._open_tags:
+            return
+        # Like BeautifulSoup, close everything up to the most recent matching tag
+        while True:
+            closed = self._open_tags.pop()
+            if closed in HIDDEN_TEXT_TAGS:
+                self._hidden_depth -= 1
+            if closed == tag:
+                break
+
+    def handle_data(self, data):
+        self._pieces.append(data)
+
+    def handle_charref(self, name):
+        if name[:1] in ("x", "X"):
+            code = int(name.lstrip("xX"), 16)
+        else:
+            code = int(name)
+
+        data = None
+        if code < 256:
+            # Numeric references below 256 are often meant as windows-1252
+            try:
+                data = bytearray([code]).decode("windows-1252")
+            except UnicodeDecodeError:
+                pass
+        if not data:
+            try:
+                data = chr(code)
+            except (ValueError, OverflowError):
+                pass
+        self._pieces.append(data or "\N{REPLACEMENT CHARACTER}")
+
+    def handle_entityref(self, name):
+        self._pieces.append(ENTITIES.get(name, "&" + name))
+
+    def _handle_special(self, data, visible):
+        self._end_data()
+        self._pieces.append(data)
+        self._end_data(visible)
+
+    def handle_comment(self, data):
+        self._handle_special(data, visible=False)
+
+    def handle_decl(self, decl):
+        self._handle_special(decl, visible=False)
+
+    def handle_pi(self, data):
+        self._handle_special(data, visible=False)
+
+    def unknown_decl(self, data):
+        # CDATA sections count as text, other declarations don't
+        if data.upper().startswith("CDATA["):
+            self._handle_special(data[len("CDATA["):], visible=True)
+        else:
+            self._handle_special(data, visible=False)
+
+    def extract(self, html_content):
+        """Parses html_content and returns its visible text, cut to max_chars if set."""
+        try:
+            self.feed(html_content)
+            self.close()
+            self._end_data()
+        except _BudgetReached:
+            pass
+        if self.breaks:
+            text = "".join(("\n" if i in self.breaks else " ") + string if i else string
+                           for i, string in enumerate(self.strings))
+        else:
+            text = " ".join(self.strings)
+        return text if self.max_chars is None else text[:self.max_chars]
+
+
+def extract_text(html_content, max_chars=None, paragraphs=False):
+    """
+    Convert HTML content to plain text.
+
+    Args:
+        html_content (str): HTML (or plain/markdown) text
+        max_chars (int, optional): Stop parsing once this many characters of
+            text have been collected; the result is then the first max_chars
+            characters of the full text
+        paragraphs (bool): Separate paragraphs with a newline instead of a space
+
+    Returns:
+        str: Visible text with whitespace collapsed
+    """
+    if not html_content:
+        return ""
+    return TextExtractor(max_chars, paragraphs).extract(html_content)
+
+
+class HtmlTextCache:
+    """
+    Persistent cache of extracted text keyed by a hash of the HTML, the character budget and the paragraph flag.
+
+    Backed by SQLite so several worker processes can share it and unchanged
+    referendum bodies are never parsed twice across runs.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): SQLite database file, created if missing
+        """
+        self.path = path
+        self._pending = {}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS html_text (key TEXT PRIMARY KEY, text TEXT NOT NULL)")
+        self._db.commit()
+
+    @staticmethod
+    def key(html_content, max_chars, paragraphs=False):
+        digest = hashlib.sha1(html_content.encode("utf-8")).hexdigest()
+        return f"{digest}:{max_chars if max_chars is not None else ''}{':p' if paragraphs else ''}"
+
+    def html_to_text(self, html_content, max_chars=None, paragraphs=False):
+        """extract_text() with lookups and stores going through the cache."""
+        if not html_content:
+            return ""
+        key = self.key(html_content, max_chars, paragraphs)
+        text = self._pending.get(key)
+        if text is None:
+            row = self._db.execute("SELECT text FROM html_text WHERE key = ?", (key,)).fetchone()
+            if row:
+                return row[0]
+            text = extract_text(html_content, max_chars, paragraphs)
+            self._pending[key] = text
+        return text
+
+    def commit(self):
+        """Writes newly extracted texts to the database."""
+        if self._pending:
+            self._db.executemany("INSERT OR REPLACE INTO html_text VALUES (?, ?)", self._pending.items())
+            self._db.commit()
+            self._pending = {}
+
+    def close(self):
+        self.commit()
+        self._db.close()
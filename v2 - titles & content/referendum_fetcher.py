@@ -0,0 +1,155 @@
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+API_URL = "https://api.polkassembly.io/api/v1/posts/on-chain-post"
+CONCURRENCY = 8            # Maximum number of requests in flight
+REQUESTS_PER_SECOND = 4.0  # Sustained request rate allowed by the token bucket
+MAX_RETRIES = 3            # Maximum number of attempts per referendum
+BACKOFF_BASE = 1.0         # First retry waits up to this many seconds
+BACKOFF_MAX = 30.0         # Upper bound for a single backoff wait
+REQUEST_TIMEOUT = 30       # Seconds before a single request is abandoned
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Asyncio token-bucket rate limiter.
+
+    Tokens refill continuously at `rate` per second up to `capacity`; each
+    request takes one token, so short bursts are allowed while the long-run
+    rate never exceeds `rate`.
+    """
+
+    def __init__(self, rate=REQUESTS_PER_SECOND, capacity=None):
+        """
+        Args:
+            rate (float): Tokens added per second
+            capacity (float, optional): Maximum burst size, defaults to max(1, rate)
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Waits until a token is available and takes it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    """Full-jitter exponential backoff: a random wait in [0, min(cap, base * 2**attempt)]."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class ReferendumFetcher:
+    """
+    Concurrent Polkassembly client for downloading many referendums.
+
+    Requests run on a pooled, keep-alive requests.Session from worker threads
+    driven by asyncio. A semaphore bounds the number of requests in flight, a
+    token bucket limits the request rate, and transient failures (connection
+    errors, 429 and 5xx responses) are retried with jittered exponential backoff.
+    """
+
+    def __init__(self, network="polkadot", concurrency=CONCURRENCY, rate=REQUESTS_PER_SECOND,
+                 retries=MAX_RETRIES, api_url=API_URL, timeout=REQUEST_TIMEOUT):
+        """
+        Args:
+            network (str): Value for the x-network header
+            concurrency (int): Maximum number of requests in flight
+            rate (float): Maximum sustained requests per second
+            retries (int): Maximum attempts per referendum
+            api_url (str): on-chain-post endpoint, overridable for testing
+            timeout (float): Per-request timeout in seconds
+        """
+        self.network = network
+        self.concurrency = max(1, concurrency)
+        self.rate = rate
+        self.retries = retries
+        self.api_url = api_url
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"x-network": network})
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency)
+
+    def close(self):
+        """Closes the pooled connections and the request threads."""
+        self._executor.shutdown(wait=False)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _get(self, ref_id):
+        params = {
+            "postId": ref_id,
+            "proposalType": "referendums_v2"
+        }
+        return self.session.get(self.api_url, params=params, timeout=self.timeout)
+
+    async def fetch(self, ref_id, limiter, semaphore):
+        """
+        Fetches one referendum, retrying transient failures.
+
+        Returns:
+            tuple: (status, data) where status is "fetched", "missing" (404 or
+                   empty response) or "failed", and data is the JSON dict or None
+        """
+        for attempt in range(self.retries):
+            async with semaphore:
+                await limiter.acquire()
+                try:
+                    loop = asyncio.get_running_loop()
+                    response = await loop.run_in_executor(self._executor, self._get, ref_id)
+                except requests.exceptions.RequestException as e:
+                    response, error = None, e
+                else:
+                    error = None
+
+            if response is not None:
+                if response.status_code == 404:
+                    return "missing", None
+                if response.status_code not in RETRY_STATUSES:
+                    try:
+                        response.raise_for_status()
+                        data = response.json()
+                    except (requests.exceptions.RequestException, ValueError) as e:
+                        print(f"\nFailed to fetch referendum {ref_id}: {e}")
+                        return "failed", None
+                    if not data:
+                        return "missing", None
+                    return "fetched", data
+                error = f"HTTP {response.status_code}"
+
+            if attempt < self.retries - 1:
+                delay = backoff_delay(attempt)
+                retry_after = response.headers.get("Retry-After") if response is not None else None
+                if retry_after and retry_after.isdigit():
+                    delay = max(delay, float(retry_after))
+                print(f"\nError fetching referendum {ref_id}, retrying ({attempt + 1}/{self.retries}): {error}")
+                await asyncio.sleep(delay)
+
+        print(f"\nFailed to fetch referendum {ref_id} after {self.retries} attempts: {error}")
+        return "failed", None
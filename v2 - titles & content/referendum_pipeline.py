@@ -0,0 +1,206 @@
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+QUEUE_SIZE = 64     # Items a stage may queue for the next one before it has to wait
+MAX_PENDING = 256   # IDs between being taken by a fetcher and written, including reordering
+CHUNK_SIZE = 16     # Most fetched items handed to one process() call
+STAGES = ["fetch", "process", "write"]
+
+
+class StageStats:
+    """
+    Counters for one pipeline stage.
+
+    items and busy seconds are summed over the stage's workers, so busy can
+    exceed the wall time of a concurrent stage. blocked is the time the
+    stage's workers spent waiting for room in the next stage's queue, and the
+    depth figures sample that queue each time an item is put on it.
+    """
+
+    def __init__(self):
+        self.items = 0
+        self.busy = 0.0
+        self.blocked = 0.0
+        self.depth_total = 0
+        self.depth_samples = 0
+        self.max_depth = 0
+
+    def report(self, elapsed):
+        return {
+            "items": self.items,
+            "items_per_second": self.items / elapsed if elapsed else 0.0,
+            "busy_seconds": self.busy,
+            "blocked_seconds": self.blocked,
+            "mean_queue_depth": self.depth_total / self.depth_samples if self.depth_samples else 0.0,
+            "max_queue_depth": self.max_depth
+        }
+
+
+class ReferendumPipeline:
+    """
+    Fetch -> process -> write pipeline over referendum IDs, with bounded queues between the stages.
+
+    Fetch coroutines (I/O bound) hand results to a queue read by coroutines
+    that run process() in a process pool (CPU bound); processed results go
+    to a queue read by a single writer, which calls write() from one thread
+    in the order of the IDs. Full queues make the stage before them wait,
+    and at most max_pending IDs are between a fetcher and the writer, which
+    bounds the writer's reorder buffer when an early ID is slow. The stages
+    overlap, so the network is busy while bodies are parsed and vice versa.
+
+    process() gets everything queued at the time, up to chunk_size items, so
+    its per-call work (cache commits, reports) is shared once processing
+    falls behind, without waiting for a chunk to fill.
+    """
+
+    def __init__(self, fetch, process, write, fetch_workers=8, cpu_workers=1, queue_size=QUEUE_SIZE,
+                 max_pending=MAX_PENDING, chunk_size=CHUNK_SIZE, initializer=None, initargs=(), executor=None,
+                 progress=None):
+        """
+        Args:
+            fetch (coroutine function): fetch(ref_id) -> (status, data), status "fetched",
+                "missing" or "failed"
+            process (callable): process(chunk) -> results, one per data in the chunk (a list of
+                the data of fetched IDs); must be picklable (a module-level function) to run in
+                the process pool
+            write (callable): write(ref_id, status, data, result), called in ID order;
+                result is None for IDs that were not fetched
+            fetch_workers (int): Concurrent fetch coroutines
+            cpu_workers (int): Processes running process()
+            queue_size (int): Capacity of each queue between stages
+            max_pending (int): IDs allowed between fetching and writing
+            chunk_size (int): Most items passed to one process() call
+            initializer (callable, optional): Run in each process of the pool, with initargs
+            executor (Executor, optional): Runs process() instead of a new process pool
+            progress (callable, optional): Called as progress(written, total, pipeline)
+                after each write
+        """
+        self.fetch = fetch
+        self.process = process
+        self.write = write
+        self.fetch_workers = max(1, fetch_workers)
+        self.cpu_workers = max(1, cpu_workers)
+        self.queue_size = max(1, queue_size)
+        self.max_pending = max(1, max_pending)
+        self.chunk_size = max(1, chunk_size)
+        self.initializer = initializer
+        self.initargs = initargs
+        self.executor = executor
+        self.progress = progress
+        self.stats = {stage: StageStats() for stage in STAGES}
+        self.max_reorder = 0
+        self.elapsed = 0.0
+        self._queues = {}
+
+    def queue_depths(self):
+        """Current number of items waiting in each queue, by the stage that reads it."""
+        return {stage: queue.qsize() for stage, queue in self._queues.items()}
+
+    async def _put(self, queue, item, stats):
+        depth = queue.qsize()
+        stats.depth_total += depth
+        stats.depth_samples += 1
+        stats.max_depth = max(stats.max_depth, depth)
+        start = time.perf_counter()
+        await queue.put(item)
+        stats.blocked += time.perf_counter() - start
+
+    async def run(self, ref_ids):
+        """Runs every ID through the three stages; returns when the last one is written."""
+        ref_ids = list(ref_ids)
+        if len(set(ref_ids)) != len(ref_ids):
+            raise ValueError("Referendum IDs must be unique")
+
+        loop = asyncio.get_running_loop()
+        process_queue = asyncio.Queue(self.queue_size)
+        write_queue = asyncio.Queue(self.queue_size)
+        self._queues = {"process": process_queue, "write": write_queue}
+        window = asyncio.Semaphore(self.max_pending)
+        next_ids = iter(ref_ids)
+
+        async def fetch_worker():
+            stats = self.stats["fetch"]
+            for ref_id in next_ids:
+                await window.acquire()
+                start = time.perf_counter()
+                status, data = await self.fetch(ref_id)
+                stats.busy += time.perf_counter() - start
+                stats.items += 1
+                await self._put(process_queue, (ref_id, status, data), stats)
+
+        async def fetch_stage():
+            await asyncio.gather(*(fetch_worker() for _ in range(self.fetch_workers)))
+            for _ in range(2 * self.cpu_workers):
+                await process_queue.put(None)
+
+        async def process_worker(executor):
+            stats = self.stats["process"]
+            while True:
+                # Take one item, plus whatever else is already queued; stop at this worker's sentinel
+                items = [await process_queue.get()]
+                while items[-1] is not None and len(items) < self.chunk_size and not process_queue.empty():
+                    items.append(process_queue.get_nowait())
+                done = items[-1] is None
+                if done:
+                    items.pop()
+
+                chunk = [data for _, status, data in items if status == "fetched"]
+                results = iter(())
+                if chunk:
+                    start = time.perf_counter()
+                    results = iter(await loop.run_in_executor(executor, self.process, chunk))
+                    stats.busy += time.perf_counter() - start
+                    stats.items += len(chunk)
+                for ref_id, status, data in items:
+                    result = next(results) if status == "fetched" else None
+                    await self._put(write_queue, (ref_id, status, data, result), stats)
+                if done:
+                    return
+
+        async def writer(write_executor):
+            stats = self.stats["write"]
+            arrived = {}
+            next_index = 0
+            while next_index < len(ref_ids):
+                ref_id, status, data, result = await write_queue.get()
+                arrived[ref_id] = (status, data, result)
+                self.max_reorder = max(self.max_reorder, len(arrived))
+                while next_index < len(ref_ids) and ref_ids[next_index] in arrived:
+                    done_id = ref_ids[next_index]
+                    start = time.perf_counter()
+                    await loop.run_in_executor(write_executor, self.write, done_id, *arrived.pop(done_id))
+                    stats.busy += time.perf_counter() - start
+                    stats.items += 1
+                    next_index += 1
+                    window.release()
+                    if self.progress:
+                        self.progress(next_index, len(ref_ids), self)
+
+        executor = self.executor or ProcessPoolExecutor(max_workers=self.cpu_workers, initializer=self.initializer,
+                                                        initargs=self.initargs)
+        write_executor = ThreadPoolExecutor(max_workers=1)
+        # Two submitters per process keep each one busy while the other's result is handed on
+        tasks = [asyncio.ensure_future(fetch_stage()), asyncio.ensure_future(writer(write_executor))]
+        tasks += [asyncio.ensure_future(process_worker(executor)) for _ in range(2 * self.cpu_workers)]
+        start = time.perf_counter()
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.elapsed += time.perf_counter() - start
+            write_executor.shutdown(wait=True)
+            if self.executor is None:
+                executor.shutdown(wait=True)
+
+    def run_sync(self, ref_ids):
+        """Runs run() to completion from synchronous code."""
+        asyncio.run(self.run(ref_ids))
+
+    def report(self):
+        """Per-stage items, throughput, busy and blocked time and queue depths, plus the largest reorder buffer."""
+        report = {stage: stats.report(self.elapsed) for stage, stats in self.stats.items()}
+        report["elapsed_seconds"] = self.elapsed
+        report["max_reorder_buffer"] = self.max_reorder
+        return report
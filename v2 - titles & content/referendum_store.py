@@ -0,0 +1,207 @@
+import json
+import os
+import re
+import struct
+import zlib
+
+STORE_FILE = "referendums.store"
+FILE_MAGIC = b"REFSTORE1\n"
+RECORD_HEADER = struct.Struct("<QI")   # referendum id, compressed payload length
+INDEX_ENTRY = struct.Struct("<QQ")     # referendum id, record offset
+INDEX_HEADER = struct.Struct("<8sQ")   # magic, store size covered by the index
+INDEX_MAGIC = b"REFIDX1\n"
+
+
+def store_path(output_dir, network):
+    """Location of a network's store, next to where its json/ directory used to live."""
+    return os.path.join(output_dir, network, STORE_FILE)
+
+
+class ReferendumStore:
+    """
+    Append-only, compressed store of raw referendum API responses for one network.
+
+    Each record is a fixed header (referendum id, payload length) followed by
+    the zlib-compressed compact JSON. An id -> offset index is kept in a
+    sidecar .idx file, so get() is one seek and one read, and items() reads
+    the whole network with a single sequential pass. Writing an id again
+    appends a new record that supersedes the old one.
+    """
+
+    def __init__(self, path):
+        """
+        Opens the store, creating it if needed and recovering from a torn write.
+
+        Args:
+            path (str): Store file path; the index lives at path + ".idx"
+        """
+        self.path = path
+        self.index_path = path + ".idx"
+        self.index = {}
+        self._dirty = False
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            with open(path, "wb") as f:
+                f.write(FILE_MAGIC)
+
+        self._file = open(path, "r+b")
+        if self._file.read(len(FILE_MAGIC)) != FILE_MAGIC:
+            self._file.close()
+            raise ValueError(f"{path} is not a referendum store")
+
+        covered = self._load_index()
+        self._scan(covered)
+
+    def _load_index(self):
+        """Loads the sidecar index and returns the store offset it is valid up to."""
+        size = os.path.getsize(self.path)
+        try:
+            with open(self.index_path, "rb") as f:
+                magic, covered = INDEX_HEADER.unpack(f.read(INDEX_HEADER.size))
+                entries = f.read()
+        except (OSError, struct.error):
+            return len(FILE_MAGIC)
+
+        if magic != INDEX_MAGIC or covered > size or len(entries) % INDEX_ENTRY.size:
+            return len(FILE_MAGIC)
+
+        self.index = {ref_id: offset for ref_id, offset in INDEX_ENTRY.iter_unpack(entries)}
+        return covered
+
+    def _scan(self, offset):
+        """Indexes records from offset to the end, truncating a partially written last record."""
+        f = self._file
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+
+        while offset < size:
+            f.seek(offset)
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                break
+            ref_id, length = RECORD_HEADER.unpack(header)
+            end = offset + RECORD_HEADER.size + length
+            if end > size:
+                break
+            self.index[ref_id] = offset
+            self._dirty = True
+            offset = end
+
+        if offset < size:
+            print(f"Removed a partially written record from {self.path}")
+            f.truncate(offset)
+            self._dirty = True
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, ref_id):
+        return ref_id in self.index
+
+    def ids(self):
+        """All referendum IDs in the store, sorted."""
+        return sorted(self.index)
+
+    def _read_at(self, offset):
+        self._file.seek(offset)
+        ref_id, length = RECORD_HEADER.unpack(self._file.read(RECORD_HEADER.size))
+        return ref_id, json.loads(zlib.decompress(self._file.read(length)))
+
+    def get(self, ref_id):
+        """Returns the stored API data for ref_id, or None if it is not in the store."""
+        offset = self.index.get(ref_id)
+        if offset is None:
+            return None
+        return self._read_at(offset)[1]
+
+    def put(self, ref_id, data):
+        """Appends the API data for ref_id, superseding any earlier record."""
+        payload = zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+        f = self._file
+        offset = f.seek(0, os.SEEK_END)
+        f.write(RECORD_HEADER.pack(ref_id, len(payload)))
+        f.write(payload)
+        self.index[ref_id] = offset
+        self._dirty = True
+
+    def items(self, ref_ids=None):
+        """
+        Yields (ref_id, data) in ID order.
+
+        Without ref_ids the whole file is read in one sequential pass and
+        superseded records are skipped; with ref_ids only those are read.
+        """
+        if ref_ids is not None:
+            for ref_id in sorted(ref_ids):
+                data = self.get(ref_id)
+                if data is not None:
+                    yield ref_id, data
+            return
+
+        self._file.flush()
+        with open(self.path, "rb") as f:
+            buffer = f.read()
+
+        records = []
+        offset = len(FILE_MAGIC)
+        while offset + RECORD_HEADER.size <= len(buffer):
+            ref_id, length = RECORD_HEADER.unpack_from(buffer, offset)
+            if self.index.get(ref_id) == offset:
+                start = offset + RECORD_HEADER.size
+                records.append((ref_id, buffer[start:start + length]))
+            offset += RECORD_HEADER.size + length
+
+        records.sort(key=lambda record: record[0])
+        for ref_id, payload in records:
+            yield ref_id, json.loads(zlib.decompress(payload))
+
+    def flush(self):
+        """Flushes appended records to disk and rewrites the index."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        if not self._dirty:
+            return
+
+        size = self._file.seek(0, os.SEEK_END)
+        temp_path = self.index_path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, size))
+            f.write(b"".join(INDEX_ENTRY.pack(ref_id, offset) for ref_id, offset in self.index.items()))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.index_path)
+        self._dirty = False
+
+    def close(self):
+        """Flushes and closes the store."""
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def migrate_json_dir(json_dir, store):
+    """
+    One-shot import of referendum_<id>.json files into a store.
+
+    Files whose ID is already in the store are skipped, so re-running is safe.
+
+    Returns:
+        int: Number of referendums imported
+    """
+    imported = 0
+    for json_file in sorted(os.listdir(json_dir)):
+        match = re.fullmatch(r'referendum_(\d+)\.json', json_file)
+        if not match or int(match.group(1)) in store:
+            continue
+        with open(os.path.join(json_dir, json_file), "r", encoding="utf-8") as f:
+            store.put(int(match.group(1)), json.load(f))
+        imported += 1
+    store.flush()
+    return imported
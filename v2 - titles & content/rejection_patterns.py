@@ -1,4 +1,704 @@
+import bisect
+import copy
 import re
+import sys
+import time
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Characters str.lower() leaves alone that an IGNORECASE regex matches to an ASCII letter
+CASE_FOLD_TABLE = str.maketrans({"\u0130": "i", "\u0131": "i", "\u017f": "s"})
+
+# Anchors shorter than this are too common to filter on; their patterns are searched directly
+MIN_ANCHOR_LENGTH = 3
+
+NO_MATCH = (False, 0.0, "No pattern matched")
+BUDGET_EXCEEDED = (False, 0.0, "Time budget exceeded")
+CAPITALIZED_NAY = (True, 0.95, "Contains capitalized 'NAY'")
+
+# Texts shorter than this are searched by re even in linear mode: below it the
+# worst backtracking case (cubic, for 'change.*vote.*nay') stays well under a millisecond
+LINEAR_MIN_CHARS = 256
+
+# BodyScanner windows; the overlap is longer than any bounded pattern's match
+SCAN_WINDOW_CHARS = 1024
+SCAN_OVERLAP_CHARS = 128
+SCAN_BUDGET = 16384
+
+# Atomic groups (Python 3.11+) keep whitespace runs and lookahead chains from backtracking;
+# without them LinearPattern leaves the patterns that need them to re
+ATOMIC_GROUPS = sys.version_info >= (3, 11)
+
+GLOBAL_FLAGS_RE = re.compile(r'^\(\?[aiLmsux]+\)')
+SPACE_RUN_RE = re.compile(r'\s*')
+NEWLINE_RE = re.compile('\n')
+
+
+def literal_candidates(pattern):
+    """
+    Derives literal anchors from a regex.
+
+    Returns a list of alternative anchor sets. Each is a set of lowercase
+    strings such that whenever pattern matches a text, at least one of them
+    occurs in the lowercased text. They come from the parts every match
+    must contain: runs of literal characters, groups, branches (the union of
+    their alternatives' anchors) and items repeated at least once. An empty
+    list means the pattern can match without any literal.
+    """
+    return _sequence_candidates(sre_parse.parse(pattern))
+
+
+def _most_selective(candidates):
+    # Longer shortest anchor first, then fewer anchors
+    return max(candidates, key=lambda anchors: (min(map(len, anchors)), -len(anchors)), default=None)
+
+
+def _sequence_candidates(items):
+    candidates, run = [], ""
+    for op, av in items:
+        if op is sre_parse.LITERAL:
+            run += chr(av).lower()
+            continue
+        if run:
+            candidates.append({run})
+            run = ""
+        if op is sre_parse.SUBPATTERN:
+            candidates += _sequence_candidates(av[-1])
+        elif op is sre_parse.BRANCH:
+            alternatives = [_most_selective(_sequence_candidates(branch)) for branch in av[1]]
+            if all(alternatives):
+                candidates.append(set().union(*alternatives))
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and av[0] >= 1:
+            candidates += _sequence_candidates(av[2])
+        elif op is sre_parse.IN and all(item_op is sre_parse.LITERAL for item_op, _ in av):
+            candidates.append({chr(char).lower() for _, char in av})
+    if run:
+        candidates.append({run})
+    return candidates
+
+
+def _covers(anchors, candidate):
+    # An anchor found inside every literal of the candidate is found wherever the candidate is
+    return all(any(anchor in literal for anchor in anchors) for literal in candidate)
+
+
+def choose_anchors(candidate_lists):
+    """
+    Picks one small anchor set covering every pattern, given each pattern's literal_candidates().
+
+    Patterns with the fewest candidates go first. A pattern already covered
+    by the anchors chosen so far adds nothing, otherwise its most selective
+    candidate is added, so common words such as 'proposal' or 'please' are
+    only used by patterns that have nothing else.
+    """
+    anchors = set()
+    for candidates in sorted(candidate_lists, key=len):
+        if not any(_covers(anchors, candidate) for candidate in candidates):
+            anchors |= _most_selective(candidates)
+    return anchors
+
+
+def literal_alternation(words):
+    """
+    Regex source matching any of words, with shared prefixes merged into a trie.
+
+    Each alternative at a node starts with a different character, so a
+    failed position costs one character dispatch rather than one attempt
+    per word. Words extending another word are dropped: the shorter one
+    already matches wherever they do.
+    """
+    trie = {}
+    for word in sorted(words, key=len):
+        node = trie
+        for char in word:
+            if "" in node:
+                break
+            node = node.setdefault(char, {})
+        else:
+            node.clear()
+            node[""] = True
+
+    def build(node):
+        if "" in node:
+            return ""
+        alternatives = [re.escape(char) + build(child) for char, child in sorted(node.items())]
+        return alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+
+    return build(trie)
+
+
+class LiteralPrefilter:
+    """
+    Cheap test for whether any of a set of patterns can match a text.
+
+    Anchors chosen from the patterns' literal_candidates() are searched for
+    in one scan of the lowercased text. Patterns without anchors of at least
+    MIN_ANCHOR_LENGTH characters (such as the '...' placeholder pattern)
+    are kept in a residual alternation searched on the original text.
+    may_match() is False only when no pattern can match.
+    """
+
+    def __init__(self, patterns):
+        anchored, residual = [], []
+        for pattern in patterns:
+            candidates = [c for c in literal_candidates(pattern) if min(map(len, c)) >= MIN_ANCHOR_LENGTH]
+            if candidates:
+                anchored.append(candidates)
+            else:
+                residual.append(pattern)
+        anchors = choose_anchors(anchored)
+
+        self.anchors = sorted(anchors)
+        self.residual = residual
+        self._anchor_re = re.compile(literal_alternation(anchors)) if anchors else None
+        self._residual_re = PatternTier(residual).combined
+
+    def may_match(self, text):
+        folded = text.lower() if text.isascii() else text.translate(CASE_FOLD_TABLE).lower()
+        if self._anchor_re is not None and self._anchor_re.search(folded):
+            return True
+        return self._residual_re is not None and self._residual_re.search(text) is not None
+
+
+class _BudgetExceeded(Exception):
+    """Raised between pattern searches once check_text()'s time_budget has run out."""
+
+
+def _top_level_positions(source):
+    # Indices of the characters of regex source outside groups, classes and escapes,
+    # including the parentheses of the top-level groups themselves
+    positions, depth, in_class, i = [], 0, False, 0
+    while i < len(source):
+        char = source[i]
+        if char == '\\':
+            i += 2
+            continue
+        if in_class:
+            in_class = char != ']'
+        elif char == '[':
+            in_class = True
+        elif char == '(':
+            if depth == 0:
+                positions.append(i)
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth == 0:
+                positions.append(i)
+        elif depth == 0:
+            positions.append(i)
+        i += 1
+    return positions
+
+
+def _split_top_level(source, separator):
+    """Splits regex source at every occurrence of separator outside groups, classes and escapes."""
+    parts, start = [], 0
+    for i in _top_level_positions(source):
+        if i >= start and source.startswith(separator, i):
+            parts.append(source[start:i])
+            start = i + len(separator)
+    parts.append(source[start:])
+    return parts
+
+
+def _split_lookahead(source):
+    """Splits 'head(?!body)' into (head, body); any other source gives (source, None)."""
+    positions = _top_level_positions(source)
+    if not positions or positions[-1] != len(source) - 1 or source[-1] != ')':
+        return source, None
+    opening = max((i for i in positions[:-1] if source[i] == '('), default=-1)
+    if opening < 0 or not source.startswith('(?!', opening):
+        return source, None
+    return source[:opening], source[opening + 3:-1]
+
+
+def _has_unbounded_any(items):
+    # True when a '.' is repeated without an upper bound anywhere in the parsed pattern
+    for op, av in items:
+        if op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            if av[1] == sre_parse.MAXREPEAT and any(o is sre_parse.ANY for o, _ in av[2]):
+                return True
+            if _has_unbounded_any(av[2]):
+                return True
+        elif op is sre_parse.SUBPATTERN and _has_unbounded_any(av[-1]):
+            return True
+        elif op is sre_parse.BRANCH and any(_has_unbounded_any(branch) for branch in av[1]):
+            return True
+        elif op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT) and _has_unbounded_any(av[1]):
+            return True
+    return False
+
+
+def _is_plain(items, bounded=False):
+    # No anchors, lookarounds or backreferences; with bounded, also no unbounded repeats
+    # and nothing that can match a newline, so every match is one short run of a line
+    for op, av in items:
+        if op is sre_parse.LITERAL:
+            if bounded and av == ord('\n'):
+                return False
+        elif op is sre_parse.ANY:
+            continue
+        elif op is sre_parse.SUBPATTERN:
+            if not _is_plain(av[-1], bounded):
+                return False
+        elif op is sre_parse.BRANCH:
+            if not all(_is_plain(branch, bounded) for branch in av[1]):
+                return False
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            if bounded and av[1] == sre_parse.MAXREPEAT or not _is_plain(av[2], bounded):
+                return False
+        elif bounded or op not in (sre_parse.IN, sre_parse.NOT_LITERAL):
+            return False
+    return True
+
+
+def _edge_is_literal(items, index):
+    # True when the first (index 0) or last (index -1) item always matches a non-space literal
+    if not items:
+        return False
+    op, av = items[index]
+    if op is sre_parse.LITERAL:
+        return not chr(av).isspace()
+    if op is sre_parse.SUBPATTERN:
+        return _edge_is_literal(av[-1], index)
+    if op is sre_parse.BRANCH:
+        return all(_edge_is_literal(branch, index) for branch in av[1])
+    return False
+
+
+def _line_end(newlines, position, length):
+    # Index of the first newline at or after position: where a '.*' starting there must stop
+    index = bisect.bisect_left(newlines, position)
+    return newlines[index] if index < len(newlines) else length
+
+
+class _GapPart:
+    """
+    One of the '.*'-separated parts of a LinearPattern.
+
+    A leading or trailing '\\s+'/'\\s*' is split off the part's core: which
+    whitespace it takes decides where the neighbouring gaps may start and
+    end, so occurrences() reports ranges of starts and ends.
+    """
+
+    def __init__(self, source, flags):
+        self.source = source
+        self.lead = self.trail = None
+        if source[:3] in ('\\s+', '\\s*'):
+            self.lead, source = source[2], source[3:]
+        if source[-3:] in ('\\s+', '\\s*') and not source.endswith('\\\\s' + source[-1]):
+            self.trail, source = source[-1], source[:-3]
+        self.core = source
+        self.items = sre_parse.parse(flags + source)
+        self.literal = not self.lead and not self.trail and bool(self.items) and all(
+            op is sre_parse.LITERAL for op, _ in self.items)
+
+        # An atomic whitespace run ends where the greedy one would, without retrying shorter runs
+        core = re.sub(r'\\s([+*])(?![?+])', r'(?>\\s\1)', source) if ATOMIC_GROUPS else source
+        self.finder = re.compile(f'{flags}(?=({core}))')
+
+    def occurrences(self, text):
+        """
+        Every place the part matches, as (first start, last start, first end, last end) tuples in text order.
+
+        Found with a zero-width search, so overlapping occurrences are all reported.
+        """
+        rows = []
+        for match in self.finder.finditer(text):
+            start, end = match.span(1)
+            first_start = last_start = start
+            if self.lead:
+                while first_start and text[first_start - 1].isspace():
+                    first_start -= 1
+                if self.lead == '+':
+                    if first_start == start:
+                        continue
+                    last_start = start - 1
+            first_end = last_end = end
+            if self.trail:
+                last_end = SPACE_RUN_RE.match(text, end).end()
+                if self.trail == '+':
+                    if last_end == end:
+                        continue
+                    first_end = end + 1
+            rows.append((first_start, last_start, first_end, last_end))
+        return rows
+
+
+class LinearPattern:
+    """
+    re.search() for one pattern, in time linear in the length of the text.
+
+    The backtracking engine goes superlinear on two shapes: parts joined by
+    '.*' gaps ('reject.*resubmit', 'change.*vote.*nay'), which it retries from
+    every occurrence of the first part, and a head followed by a negative
+    lookahead of such chains ('(refund|retroactive)(?!.*nay|.*change.*vote)'),
+    which rescans the rest of the line after every occurrence of the head.
+
+    A '.*' gap never crosses a newline, so whether a chain can follow a
+    position only depends on the part occurrences left on its line. Each
+    part is searched for once per text; the leftmost start is then found by
+    walking the occurrence lists with cursors that only move forward (for
+    gaps) or by looking up the last blocking chain on the head's line (for
+    lookaheads). The returned match comes from re itself, run once at that
+    start with the end, or a first-occurrence form of the lookahead, pinned
+    down so it cannot backtrack, so it is exactly re.search()'s match.
+
+    Patterns of any other shape are already linear, or are not supported and
+    left to re; `linear` tells which. Texts shorter than min_chars always
+    go to re.
+    """
+
+    def __init__(self, pattern, min_chars=None):
+        """
+        Args:
+            pattern (str): Regex source, optionally starting with global flags such as '(?i)'
+            min_chars (int, optional): Texts shorter than this are searched with re directly;
+                defaults to LINEAR_MIN_CHARS
+        """
+        self.pattern = pattern
+        self.compiled = re.compile(pattern)
+        self.min_chars = LINEAR_MIN_CHARS if min_chars is None else min_chars
+        self.parts = self.head = self.chains = None
+        self.linear = ATOMIC_GROUPS and self._translate()
+
+    def _translate(self):
+        if not _has_unbounded_any(sre_parse.parse(self.pattern)):
+            return False
+        flags = GLOBAL_FLAGS_RE.match(self.pattern)
+        flags = flags.group(0) if flags else ''
+        head, lookahead = _split_lookahead(self.pattern[len(flags):])
+
+        if lookahead is None:
+            sources = _split_top_level(head, '.*')
+            if any(not source or source[0] in '?+*{' for source in sources):
+                return False
+            parts = [_GapPart(source, flags) for source in sources]
+            if not all(_is_plain(part.items) and _edge_is_literal(part.items, 0) for part in parts):
+                return False
+            if any(part.trail and not _edge_is_literal(part.items, -1) for part in parts):
+                return False
+            # Three or more parts: the earliest occurrence of a middle part is always the best
+            # one to continue from only when it is a literal on a single line
+            if len(parts) > 2 and not all(part.literal for part in parts):
+                return False
+            self.parts = parts
+            return True
+
+        head_items = sre_parse.parse(flags + head)
+        if not head_items or not _is_plain(head_items, bounded=True):
+            return False
+        chains, alternatives = [], []
+        for alternative in _split_top_level(lookahead, '|'):
+            sources = _split_top_level(alternative, '.*')
+            if len(sources) < 2 or sources[0] or any(not source or source[0] in '?+*{' for source in sources[1:]):
+                return False
+            parts = [_GapPart(source, flags) for source in sources[1:]]
+            if not all(_is_plain(part.items) and not part.lead and _edge_is_literal(part.items, 0) for part in parts):
+                return False
+            if len(parts) > 1 and not all(part.literal for part in parts):
+                return False
+            chains.append(parts)
+            # For a yes/no answer the first occurrence of each earlier part is enough
+            alternatives.append(''.join(f'(?>.*?{part.source})' for part in parts[:-1]) + '.*' + parts[-1].source)
+        self.head = re.compile(flags + head)
+        self.head_width = head_items.getwidth()[1]
+        self.chains = chains
+        self._anchored = re.compile(f"{flags}{head}(?!{'|'.join(alternatives)})")
+        return True
+
+    def search(self, text):
+        """Same result as re.search(pattern, text)."""
+        if not self.linear or len(text) < self.min_chars:
+            return self.compiled.search(text)
+        newlines = [m.start() for m in NEWLINE_RE.finditer(text)]
+        if self.head is not None:
+            return self._search_lookahead(text, newlines)
+        return self._search_gaps(text, newlines)
+
+    def _search_gaps(self, text, newlines):
+        length = len(text)
+        occurrences = []
+        for part in reversed(self.parts):
+            rows = part.occurrences(text)
+            if not rows:
+                return None
+            occurrences.append(rows)
+        occurrences.reverse()
+
+        first, rest = occurrences[0], occurrences[1:]
+        cursors = [0] * len(rest)
+        failed_line = None
+        for start, _, first_end, last_end in first:
+            line_end = _line_end(newlines, last_end, length)
+            # A later occurrence on a line where an earlier one failed has fewer options still
+            if line_end == failed_line:
+                continue
+            low, high = first_end, line_end
+            for k, rows in enumerate(rest):
+                c = cursors[k]
+                while c < len(rows) and rows[c][1] < low:
+                    c += 1
+                cursors[k] = c
+                if c == len(rows) or rows[c][0] > high:
+                    break
+                low, high = rows[c][2], _line_end(newlines, rows[c][3], length)
+            else:
+                return self.compiled.match(text, start, self._gaps_end(occurrences[-1], first_end, last_end,
+                                                                       newlines, length))
+            failed_line = line_end
+        return None
+
+    @staticmethod
+    def _gaps_end(last, first_end, last_end, newlines, length):
+        # Where re's match ends: the first part gives back trailing whitespace one character at a
+        # time until a '.*' from its end reaches the last part, whose last reachable occurrence wins
+        starts = [row[0] for row in last]
+        for end in range(last_end, first_end - 1, -1):
+            index = bisect.bisect_right(starts, _line_end(newlines, end, length)) - 1
+            if index >= 0 and last[index][1] >= end:
+                return last[index][3]
+        return length
+
+    def _search_lookahead(self, text, newlines):
+        length = len(text)
+        chains = None
+        blockers = {}
+        position = 0
+        while True:
+            match = self.head.search(text, position)
+            if match is None:
+                return None
+            start = match.start()
+            if chains is None:
+                chains = [[self._columns(part.occurrences(text)) for part in chain] for chain in self.chains]
+            line = bisect.bisect_left(newlines, start)
+            if line not in blockers:
+                blockers[line] = self._last_chain_start(chains, newlines, line, length)
+            # The lookahead fails at every position up to the last chain start on the line
+            blocked = blockers[line]
+            line_end = newlines[line] if line < len(newlines) else length
+            if blocked < start or any(self.head.fullmatch(text, start, end)
+                                      for end in range(blocked + 1, min(start + self.head_width, line_end) + 1)):
+                return self._anchored.match(text, start)
+            position = start + 1
+
+    @staticmethod
+    def _columns(rows):
+        return [row[0] for row in rows], [row[3] for row in rows]
+
+    @staticmethod
+    def _last_chain_start(chains, newlines, line, length):
+        line_start = newlines[line - 1] + 1 if line else 0
+        line_end = newlines[line] if line < len(newlines) else length
+        latest = -1
+        for chain in chains:
+            # Latest occurrence of the last part, then of each earlier part ending before it
+            limit = line_end
+            for i in range(len(chain) - 1, -1, -1):
+                starts, ends = chain[i]
+                index = bisect.bisect_right(starts if i == len(chain) - 1 else ends, limit) - 1
+                if index < 0:
+                    limit = -1
+                    break
+                limit = starts[index]
+            if limit >= line_start:
+                latest = max(latest, limit)
+        return latest
+
+
+class PatternTier:
+    """
+    A priority-ordered list of regex patterns compiled into one alternation.
+
+    search() returns the same result as calling re.search on each pattern in
+    list order and stopping at the first hit, but texts that match none of the
+    patterns (the common case) are rejected with a single scan.
+    """
+
+    def __init__(self, patterns, linear=False, instrument=False):
+        """
+        Compiles the combined alternation and the individual patterns.
+
+        Args:
+            patterns (list): Raw pattern strings, optionally starting with '(?i)'
+            linear (bool): Search the patterns LinearPattern can rewrite with it, and leave
+                them out of the combined alternation, so search() is linear in the text length
+            instrument (bool): Count and time every search in self.stats; search() is
+                only replaced by its instrumented twin then, so the default costs nothing
+        """
+        self.patterns = list(patterns)
+        self.compiled = [re.compile(pattern) for pattern in self.patterns]
+        self.linear_indices = set()
+        if linear:
+            for index, pattern in enumerate(self.patterns):
+                linear_pattern = LinearPattern(pattern)
+                if linear_pattern.linear:
+                    self.compiled[index] = linear_pattern
+                    self.linear_indices.add(index)
+
+        # sre handles a global IGNORECASE flag much faster than scoped (?i:...)
+        # groups, and non-capturing alternatives much faster than named ones.
+        combined = [pattern for index, pattern in enumerate(self.patterns) if index not in self.linear_indices]
+        all_ignorecase = all(pattern.startswith('(?i)') for pattern in combined)
+        alternatives = []
+        for pattern in combined:
+            if pattern.startswith('(?i)'):
+                pattern = pattern[4:] if all_ignorecase else f'(?i:{pattern[4:]})'
+            alternatives.append(f'(?:{pattern})')
+
+        self.combined = None
+        if alternatives:
+            self.combined = re.compile('|'.join(alternatives), re.IGNORECASE if all_ignorecase else 0)
+
+        self.stats = None
+        if instrument:
+            self.stats = TierStats(len(self.patterns))
+            self.search = self._search_instrumented
+
+    def search(self, text, deadline=None):
+        """
+        Finds the highest-priority pattern that matches text.
+
+        Args:
+            text (str): Text to scan
+            deadline (float, optional): time.perf_counter() value after which
+                _BudgetExceeded is raised instead of searching the next pattern
+
+        Returns:
+            tuple: (index, match) for the first pattern in list order that
+                   matches, or None if no pattern matches
+        """
+        combined_hit = self.combined is not None and self.combined.search(text) is not None
+        if not combined_hit and not self.linear_indices:
+            return None
+
+        # The combined match is only the leftmost one; an earlier pattern in
+        # the list may match further along the text and takes precedence.
+        for index, pattern in enumerate(self.compiled):
+            if not combined_hit and index not in self.linear_indices:
+                continue
+            if deadline is not None and time.perf_counter() > deadline:
+                raise _BudgetExceeded
+            match = pattern.search(text)
+            if match:
+                return index, match
+        return None
+
+    def _search_instrumented(self, text, deadline=None):
+        """search(), recording calls, hits and per-pattern evaluations, matches and time in self.stats."""
+        stats = self.stats
+        stats.calls += 1
+        start = time.perf_counter()
+        combined_hit = self.combined is not None and self.combined.search(text) is not None
+        now = time.perf_counter()
+        stats.combined_seconds += now - start
+        if not combined_hit:
+            stats.combined_rejects += 1
+
+        result = None
+        try:
+            for index, pattern in enumerate(self.compiled):
+                if not combined_hit and index not in self.linear_indices:
+                    continue
+                if deadline is not None and now > deadline:
+                    raise _BudgetExceeded
+                match = pattern.search(text)
+                searched = time.perf_counter()
+                stats.evaluations[index] += 1
+                stats.pattern_seconds[index] += searched - now
+                now = searched
+                if match:
+                    stats.matches[index] += 1
+                    stats.hits += 1
+                    result = index, match
+                    break
+        finally:
+            stats.seconds += now - start
+        return result
+
+
+class TierStats:
+    """
+    Counters of an instrumented PatternTier (or of RejectionPattern's keyword stage).
+
+    calls counts searches and hits those that found a pattern; combined_rejects
+    counts searches the combined alternation answered alone. Per pattern,
+    evaluations counts individual searches, matches those that returned it.
+    """
+
+    def __init__(self, size):
+        self.calls = 0
+        self.hits = 0
+        self.combined_rejects = 0
+        self.seconds = 0.0
+        self.combined_seconds = 0.0
+        self.evaluations = [0] * size
+        self.matches = [0] * size
+        self.pattern_seconds = [0.0] * size
+
+    def report(self, patterns):
+        """The counters as a JSON-serializable dict, with one entry per pattern."""
+        return _with_rates({
+            "calls": self.calls,
+            "hits": self.hits,
+            "combined_rejects": self.combined_rejects,
+            "seconds": self.seconds,
+            "combined_seconds": self.combined_seconds,
+            "patterns": [
+                {"pattern": pattern, "evaluations": evaluations, "matches": matches, "seconds": seconds}
+                for pattern, evaluations, matches, seconds
+                in zip(patterns, self.evaluations, self.matches, self.pattern_seconds)
+            ]
+        })
+
+
+def _with_rates(tier):
+    """Adds hit_rate (the tier ended check_text()) and combined_reject_rate to a TierStats.report() dict."""
+    calls = tier["calls"]
+    tier["hit_rate"] = tier["hits"] / calls if calls else 0.0
+    tier["combined_reject_rate"] = tier["combined_rejects"] / calls if calls else 0.0
+    return tier
+
+
+def merge_pattern_reports(reports):
+    """
+    Sums RejectionPattern.pattern_report() dicts, e.g. from several worker processes.
+
+    Returns:
+        dict: A report of the same shape, or None when reports is empty
+    """
+    reports = [report for report in reports if report]
+    if not reports:
+        return None
+    merged = copy.deepcopy(reports[0])
+    for report in reports[1:]:
+        for key in ("texts", "prefilter_skipped", "budget_exceeded"):
+            merged[key] += report[key]
+        for name, tier in report["tiers"].items():
+            total = merged["tiers"][name]
+            for key in ("calls", "hits", "combined_rejects", "seconds", "combined_seconds"):
+                total[key] += tier[key]
+            for total_pattern, pattern in zip(total["patterns"], tier["patterns"]):
+                for key in ("evaluations", "matches", "seconds"):
+                    total_pattern[key] += pattern[key]
+    for tier in merged["tiers"].values():
+        _with_rates(tier)
+    return merged
+
+
+PLACEHOLDER_RE = re.compile(r'^\s*[.-]{1,3}\s*$')
+VOTE_NAY_RE = re.compile(r'(?i)vote\s*nay')
+CHANGE_VOTE_RE = re.compile(r'(?i)change.*vote.*nay')
 
 
 class RejectionPattern:
@@ -9,7 +709,7 @@ class RejectionPattern:
     indicating that the referendum should be rejected or voted against.
     """
 
-    def __init__(self):
+    def __init__(self, linear=False, time_budget=None, instrument=False):
         """
         Initialize detector with pattern lists for identifying 'nay' vote requests.
 
@@ -19,7 +719,17 @@ class RejectionPattern:
         - weak_patterns: Low confidence indicators
         - content_patterns: Patterns specific to content text
         - negative_patterns: Patterns that override positive matches
+
+        Args:
+            linear (bool): Search the '.*' and lookahead patterns with LinearPattern, so
+                check_text() takes time linear in the text length (for full referendum bodies)
+            time_budget (float, optional): Seconds a check_text() call may take; checked
+                between pattern searches, after which it returns BUDGET_EXCEEDED
+            instrument (bool): Count and time every pattern and tier, for pattern_report()
         """
+        self.linear = linear
+        self.time_budget = time_budget
+        self.instrument = instrument
         self.strong_patterns = [
             r'(?i)reject\s+this\s+(referendum|proposal|motion)',         # reject this proposal/referendum/motion
             r'(?i)please\s+reject\s+(this|the)',                         # please reject this or please reject the
@@ -115,6 +825,136 @@ class RejectionPattern:
             r'(?i)(maintenance|development|proposal|funding|proposal).{0,20}(for|of)(?!.*nay|.*vote|.*reject|.*change)',  # Purpose descriptions but not with nay requests
         ]
 
+        self.override_patterns = [
+            (r'(?i)vote\s*nay', 0.95, "Contains 'vote nay'"),
+            (r'(?i)change.*vote.*nay', 0.95, "Contains vote change instruction"),
+            (r'(?i)\bNAY\b', 0.95, "Contains capitalized NAY")
+        ]
+
+        self.keywords_with_context = [
+            (r'\bnay\b', r'vote\s+nay|please\s+nay'),
+            (r'\breject\b', r'reject\s+this|please\s+reject'),
+            (r'\berror\b', r'error\s+in|due\s+to\s+error'),
+            (r'\bwrong\b', r'wrong\s+\w+|is\s+wrong'),
+            (r'\bmistake\b', r'mistake\s+in|by\s+mistake'),
+            (r'\bincorrect\b', r'incorrect\s+\w+|is\s+incorrect'),
+            (r'\bcancel\b', r'cancel\s+this|please\s+cancel'),
+            (r'\bignore\b', r'ignore\s+this|please\s+ignore'),
+            (r'\bagainst\b', r'vote\s+against')
+        ]
+
+        self.simple_keywords = ["nay", "reject", "error", "wrong", "mistake"]
+
+        self.compile_patterns()
+
+    def compile_patterns(self):
+        """
+        Compiles every pattern tier once so check_text() does a single scan per tier.
+
+        Call this again after modifying any of the pattern lists.
+        """
+        self._override_tier = PatternTier([p for p, _, _ in self.override_patterns], self.linear, self.instrument)
+        self._negative_tier = PatternTier(self.negative_patterns, self.linear, self.instrument)
+        self._strong_tier = PatternTier(self.strong_patterns, self.linear, self.instrument)
+        self._medium_tier = PatternTier(self.medium_patterns, self.linear, self.instrument)
+        self._content_tier = PatternTier(self.content_patterns, self.linear, self.instrument)
+        self._change_vote_re = LinearPattern(CHANGE_VOTE_RE.pattern) if self.linear else CHANGE_VOTE_RE
+
+        # Keywords are whole words, so one finditer over the lowercased text
+        # finds every keyword present; context regexes only run for those.
+        keyword_names = [k.strip(r'\b') for k, _ in self.keywords_with_context]
+        for keyword in self.simple_keywords:
+            if keyword not in keyword_names:
+                keyword_names.append(keyword)
+        self._keyword_names = keyword_names
+        self._keyword_re = re.compile(
+            r'\b(?:' + '|'.join(f'(?P<k{i}>{re.escape(k)})' for i, k in enumerate(keyword_names)) + r')\b'
+        )
+        self._keyword_context = [
+            (i, re.compile(context)) for i, (_, context) in enumerate(self.keywords_with_context)
+        ]
+        self._simple_keyword_ids = [keyword_names.index(k) for k in self.simple_keywords]
+        self._keyword_stats = None
+
+        # Everything that can make check_text() report a match; the negative tier
+        # only ever turns a match off, so it is left out.
+        positive = ([p for p, _, _ in self.override_patterns] + [PLACEHOLDER_RE.pattern] + self.strong_patterns +
+                    self.medium_patterns + [self._keyword_re.pattern])
+        self._prefilters = {
+            False: LiteralPrefilter(positive),
+            True: LiteralPrefilter(positive + self.content_patterns)
+        }
+        self.reset_stats()
+
+    def _tiers(self):
+        return {
+            "override": self._override_tier,
+            "negative": self._negative_tier,
+            "strong": self._strong_tier,
+            "medium": self._medium_tier,
+            "content": self._content_tier
+        }
+
+    def reset_stats(self):
+        """Zeroes the prefilter and budget counters and, when instrumented, every pattern's counters."""
+        self.prefilter_checked = 0
+        self.prefilter_skipped = 0
+        self.budget_exceeded = 0
+        if self.instrument:
+            for tier in self._tiers().values():
+                tier.stats = TierStats(len(tier.patterns))
+            self._keyword_stats = TierStats(len(self._keyword_context))
+
+    def pattern_report(self):
+        """
+        Per-tier and per-pattern counters of an instrumented detector (RejectionPattern(instrument=True)).
+
+        Returns:
+            dict: JSON-serializable report containing:
+                - texts, prefilter_skipped, budget_exceeded: texts checked, ruled out by the
+                  literal prefilter, and out of time
+                - tiers: for override, negative, strong, medium, content and keywords (the
+                  keyword context patterns), the searches (calls), those that ended
+                  check_text() (hits, hit_rate), those the combined alternation answered
+                  alone (combined_rejects, combined_reject_rate), seconds spent, and per
+                  pattern its evaluations, matches and seconds
+        """
+        if not self.instrument:
+            raise RuntimeError("pattern_report() needs RejectionPattern(instrument=True)")
+        tiers = {name: tier.stats.report(tier.patterns) for name, tier in self._tiers().items()}
+        tiers["keywords"] = self._keyword_stats.report([context.pattern for _, context in self._keyword_context])
+        return {
+            "texts": self.prefilter_checked,
+            "prefilter_skipped": self.prefilter_skipped,
+            "budget_exceeded": self.budget_exceeded,
+            "tiers": tiers
+        }
+
+    def may_match(self, text, is_content=False):
+        """
+        False when no pattern tier of check_text() can match text, found with one literal scan.
+
+        Counted in prefilter_report().
+        """
+        self.prefilter_checked += 1
+        if self._prefilters[is_content].may_match(text):
+            return True
+        self.prefilter_skipped += 1
+        return False
+
+    def prefilter_report(self):
+        """How many texts check_text()/detect() looked at and how many the literal prefilter skipped."""
+        checked, skipped = self.prefilter_checked, self.prefilter_skipped
+        return {"checked": checked, "skipped": skipped, "skip_rate": skipped / checked if checked else 0.0}
+
+    def keyword_hits(self, text):
+        """
+        Returns the weak keywords ('nay', 'reject', 'error', ...) that appear in text as whole words,
+        whether or not their context patterns match.
+        """
+        found = {int(m.lastgroup[1:]) for m in self._keyword_re.finditer(text.lower())}
+        return [self._keyword_names[i] for i in sorted(found)]
+
     def check_text(self, text, is_content=False):
         """
         Checks text for patterns indicating a rejection or negative vote.
@@ -140,75 +980,129 @@ class RejectionPattern:
                           -> Content patterns
                           -> Contextual keywords
                           -> Simple keywords
+
+        With a time_budget, a call still searching when it runs out returns
+        BUDGET_EXCEEDED (counted in budget_exceeded) instead.
         """
         if not text or not isinstance(text, str):
             return False, 0.0, "Empty or invalid text"
 
-        override_patterns = [
-            (r'(?i)vote\s*nay', 0.95, "Contains 'vote nay'"),
-            (r'(?i)change.*vote.*nay', 0.95, "Contains vote change instruction"),
-            (r'(?i)\bNAY\b', 0.95, "Contains capitalized NAY")
-        ]
+        deadline = self._deadline()
+        try:
+            if not self.may_match(text, is_content):
+                # Only the negative tier can still match; it decides the explanation
+                match = self._negative_tier.search(text, deadline)
+                if match:
+                    return False, 0.0, f"Negative pattern matched: {self.negative_patterns[match[0]]}"
+                return NO_MATCH
+
+            return self._check_tiers(text, is_content, deadline)
+        except _BudgetExceeded:
+            self.budget_exceeded += 1
+            return BUDGET_EXCEEDED
+
+    def _check_fast(self, text, is_content=False):
+        """
+        check_text() for detect(): texts the prefilter rules out skip every tier.
+
+        A non-match's explanation (including which negative pattern fired)
+        never reaches detect()'s result, so it is not worked out here.
+        """
+        if not text or not isinstance(text, str):
+            return False, 0.0, "Empty or invalid text"
+        if not self.may_match(text, is_content):
+            return NO_MATCH
+        try:
+            return self._check_tiers(text, is_content, self._deadline())
+        except _BudgetExceeded:
+            self.budget_exceeded += 1
+            return BUDGET_EXCEEDED
+
+    def _deadline(self):
+        return None if self.time_budget is None else time.perf_counter() + self.time_budget
 
-        for pattern, confidence, explanation in override_patterns:
-            if re.search(pattern, text):
-                return True, confidence, explanation
+    def _check_tiers(self, text, is_content, deadline=None):
+        """The check_text() tiers, in priority order; raises _BudgetExceeded after deadline."""
+        match = self._override_tier.search(text, deadline)
+        if match:
+            _, confidence, explanation = self.override_patterns[match[0]]
+            return True, confidence, explanation
 
-        for pattern in self.negative_patterns:
-            if re.search(pattern, text):
-                return False, 0.0, f"Negative pattern matched: {pattern}"
+        match = self._negative_tier.search(text, deadline)
+        if match:
+            return False, 0.0, f"Negative pattern matched: {self.negative_patterns[match[0]]}"
 
         # Check if this is just a placeholder (single char or dash)
-        is_empty_title = bool(re.match(r'^\s*[.-]{1,3}\s*$', text))
+        is_empty_title = bool(PLACEHOLDER_RE.match(text))
         if is_empty_title:
             return True, 0.95, f"Empty/placeholder referendum: '{text}'"
 
-        for pattern in self.strong_patterns:
-            match = re.search(pattern, text)
-            if match:
-                return True, 0.95, f"Strong indicator: '{match.group(0)}'"
+        match = self._strong_tier.search(text, deadline)
+        if match:
+            return True, 0.95, f"Strong indicator: '{match[1].group(0)}'"
 
-        for pattern in self.medium_patterns:
-            match = re.search(pattern, text)
-            if match:
-                return True, 0.85, f"Medium indicator: '{match.group(0)}'"
+        match = self._medium_tier.search(text, deadline)
+        if match:
+            return True, 0.85, f"Medium indicator: '{match[1].group(0)}'"
 
         if is_content:
-            for pattern in self.content_patterns:
-                match = re.search(pattern, text)
-                if match:
-                    return True, 0.9, f"Content indicator: '{match.group(0)}'"
-
-        keywords_with_context = [
-            (r'\bnay\b', r'vote\s+nay|please\s+nay'),
-            (r'\breject\b', r'reject\s+this|please\s+reject'),
-            (r'\berror\b', r'error\s+in|due\s+to\s+error'),
-            (r'\bwrong\b', r'wrong\s+\w+|is\s+wrong'),
-            (r'\bmistake\b', r'mistake\s+in|by\s+mistake'),
-            (r'\bincorrect\b', r'incorrect\s+\w+|is\s+incorrect'),
-            (r'\bcancel\b', r'cancel\s+this|please\s+cancel'),
-            (r'\bignore\b', r'ignore\s+this|please\s+ignore'),
-            (r'\bagainst\b', r'vote\s+against')
-        ]
-
-        matches = []
+            match = self._content_tier.search(text, deadline)
+            if match:
+                return True, 0.9, f"Content indicator: '{match[1].group(0)}'"
 
-        for keyword, context in keywords_with_context:
-            if re.search(keyword, text.lower()) and re.search(context, text.lower()):
-                matches.append(keyword.strip(r'\b'))
+        text_lower = text.lower()
+        if self._keyword_stats is None:
+            found = {int(m.lastgroup[1:]) for m in self._keyword_re.finditer(text_lower)}
+            matches = [
+                self._keyword_names[i] for i, context in self._keyword_context
+                if i in found and context.search(text_lower)
+            ]
+        else:
+            found, matches = self._keywords_instrumented(text_lower)
 
         if len(matches) >= 2:
             return True, 0.7, f"Multiple weak indicators with context: {', '.join(matches)}"
         elif len(matches) == 1:
             return True, 0.6, f"Weak indicator with context: '{matches[0]}'"
 
-        simple_keywords = ["nay", "reject", "error", "wrong", "mistake"]
-        simple_matches = [k for k in simple_keywords if re.search(rf'\b{k}\b', text.lower())]
+        simple_matches = [self._keyword_names[i] for i in self._simple_keyword_ids if i in found]
 
         if len(simple_matches) >= 2:
             return True, 0.55, f"Multiple weak indicators without context: {', '.join(simple_matches)}"
 
-        return False, 0.0, "No pattern matched"
+        return NO_MATCH
+
+    def _keywords_instrumented(self, text_lower):
+        """
+        The keyword stage of _check_tiers(), counted and timed in _keyword_stats.
+
+        The keyword scan stands in for a tier's combined alternation: texts
+        without any keyword never reach the context patterns.
+        """
+        stats = self._keyword_stats
+        stats.calls += 1
+        start = time.perf_counter()
+        found = {int(m.lastgroup[1:]) for m in self._keyword_re.finditer(text_lower)}
+        now = time.perf_counter()
+        stats.combined_seconds += now - start
+        if not found:
+            stats.combined_rejects += 1
+        matches = []
+        for i, context in self._keyword_context:
+            if i not in found:
+                continue
+            match = context.search(text_lower)
+            searched = time.perf_counter()
+            stats.evaluations[i] += 1
+            stats.pattern_seconds[i] += searched - now
+            now = searched
+            if match:
+                stats.matches[i] += 1
+                matches.append(self._keyword_names[i])
+        stats.seconds += now - start
+        if matches:
+            stats.hits += 1
+        return found, matches
 
     def detect(self, title, content=""):
         """
@@ -227,6 +1121,10 @@ class RejectionPattern:
                 - is_nay_request (bool): Whether text indicates a nay vote request
                 - confidence (float): Score from 0.0-0.95 indicating detection confidence
                 - explanation (str): Description of detection reasoning
+
+        With a time_budget, a referendum whose checks ran out of time before
+        finding a nay indicator is reported as not nay with confidence 0.0
+        and the "Time budget exceeded" explanation.
         """
         title = title.strip() if title else ""
         content = content.strip() if content else ""
@@ -238,23 +1136,38 @@ class RejectionPattern:
                 "explanation": f"Contains capitalized 'NAY'"
             }
 
-        vote_nay_pattern = r'(?i)vote\s*nay'
-        change_vote_pattern = r'(?i)change.*vote.*nay'
-        if re.search(vote_nay_pattern, title) or re.search(change_vote_pattern, title):
+        return self._detect_stripped(title, content, title.lower())
+
+    def _detect_stripped(self, title, content, title_lower, check_content=None):
+        """
+        Runs the detect() checks that follow the capitalized 'NAY' test.
+
+        Args:
+            title (str): Stripped referendum title
+            content (str): Stripped referendum content
+            title_lower (str): title.lower(), computed once by the caller
+            check_content (callable, optional): Used instead of check_text(content, is_content=True),
+                e.g. BodyScanner.check_body; only called when the title is not decisive
+
+        Returns:
+            dict: Detection results, as returned by detect()
+        """
+        if VOTE_NAY_RE.search(title) or self._change_vote_re.search(title):
             return {
                 "is_nay_request": True,
                 "confidence": 0.95,
                 "explanation": f"Title contains direct vote nay instruction"
             }
 
-        if "cancelled" in title.lower() or "[cancelled]" in title.lower():
+        if "cancelled" in title_lower or "[cancelled]" in title_lower:
             return {
                 "is_nay_request": True,
                 "confidence": 0.9,
                 "explanation": f"Cancelled proposal: '{title}'"
             }
 
-        title_is_nay, title_confidence, title_explanation = self.check_text(title)
+        title_result = self._check_fast(title)
+        title_is_nay, title_confidence, title_explanation = title_result
 
         if title_is_nay and title_confidence >= 0.85:
             return {
@@ -264,9 +1177,12 @@ class RejectionPattern:
             }
 
         # Check content if provided
-        content_is_nay, content_confidence, content_explanation = False, 0.0, ""
-        if content:
-            content_is_nay, content_confidence, content_explanation = self.check_text(content, is_content=True)
+        content_result = (False, 0.0, "")
+        if content and check_content is not None:
+            content_result = check_content(content)
+        elif content:
+            content_result = self._check_fast(content, is_content=True)
+        content_is_nay, content_confidence, content_explanation = content_result
 
         if content_is_nay and content_confidence >= 0.7:
             return {
@@ -290,8 +1206,260 @@ class RejectionPattern:
                 "explanation": title_explanation
             }
 
+        # A check that ran out of time found nothing, but that is not evidence of no nay request
+        if BUDGET_EXCEEDED in (title_result, content_result):
+            return {
+                "is_nay_request": False,
+                "confidence": 0.0,
+                "explanation": BUDGET_EXCEEDED[2]
+            }
+
         return {
             "is_nay_request": False,
             "confidence": 0.9,
             "explanation": "No indicators of a 'nay' vote request found"
         }
+
+    def detect_many(self, titles, contents=None):
+        """
+        Runs detect() over whole columns of referendum titles and contents.
+
+        Work shared by the batch is done once: inputs are stripped and checked
+        for capitalized 'NAY' in one pass, titles are lowercased once, and
+        repeated (title, content) pairs are only evaluated once.
+
+        Args:
+            titles (iterable): Referendum titles; lists, NumPy arrays, pandas
+                Series and pyarrow arrays are accepted. Missing values count as ""
+            contents (iterable, optional): Referendum contents, same length as titles
+
+        Returns:
+            dict: Columnar detection results containing:
+                - is_nay_request: bool per referendum
+                - confidence: float per referendum
+                - explanation_code: int per referendum, indexing into explanations
+                - explanations (list): Distinct explanation strings
+              The first three are NumPy arrays when NumPy is installed, lists otherwise.
+        """
+        titles = _to_str_list(titles)
+        contents = _to_str_list(contents) if contents is not None else [""] * len(titles)
+        if len(contents) != len(titles):
+            raise ValueError(f"Got {len(titles)} titles but {len(contents)} contents")
+
+        titles = [t.strip() for t in titles]
+        contents = [c.strip() for c in contents]
+        has_nay = ["NAY" in t or "NAY" in c for t, c in zip(titles, contents)]
+
+        nay_result = CAPITALIZED_NAY
+        results = {}
+        rows = []
+        for title, content, nay in zip(titles, contents, has_nay):
+            if nay:
+                rows.append(nay_result)
+                continue
+            key = (title, content)
+            result = results.get(key)
+            if result is None:
+                detected = self._detect_stripped(title, content, title.lower())
+                result = (detected["is_nay_request"], detected["confidence"], detected["explanation"])
+                results[key] = result
+            rows.append(result)
+
+        return _columnar(rows)
+
+
+class BodyScanner:
+    """
+    Runs a RejectionPattern over whole referendum bodies in overlapping windows, under a character budget.
+
+    Bodies are extracted text with paragraphs on separate lines
+    (html_text.extract_text(..., paragraphs=True)). The first paragraph is
+    scanned first, then the last one, then everything in between, each cut
+    into windows of window_chars that overlap by overlap_chars, so a phrase
+    shorter than the overlap always lies wholly inside one window; the middle
+    windows also overlap the first and last paragraphs. Every window goes
+    through the content checks of check_text(); scanning stops at the first
+    hit at or above decisive_confidence or once budget characters have been
+    scanned, and otherwise the strongest hit wins. A negative pattern only
+    cancels hits in its own window.
+    """
+
+    def __init__(self, detector=None, budget=SCAN_BUDGET, window_chars=SCAN_WINDOW_CHARS,
+                 overlap_chars=SCAN_OVERLAP_CHARS, decisive_confidence=0.9):
+        """
+        Args:
+            detector (RejectionPattern, optional): Detector whose patterns are used;
+                defaults to RejectionPattern(linear=True)
+            budget (int, optional): Characters scanned per body at most; None scans everything
+            window_chars (int): Characters per window
+            overlap_chars (int): Characters consecutive windows share
+            decisive_confidence (float): Confidence of a hit that ends the scan
+        """
+        if not 0 <= overlap_chars < window_chars:
+            raise ValueError(f"overlap_chars must be in [0, {window_chars}), got {overlap_chars}")
+        self.detector = detector or RejectionPattern(linear=True)
+        self.budget = budget
+        self.window_chars = window_chars
+        self.overlap_chars = overlap_chars
+        self.decisive_confidence = decisive_confidence
+        self.bodies = 0
+        self.body_chars = 0
+        self.scanned_chars = 0
+        self.windows_scanned = 0
+        self.hits = 0
+        self.decisive_stops = 0
+        self.budget_stops = 0
+
+    def spans(self, body):
+        """(start, end) of the first paragraph, the last paragraph and the middle, in scan order."""
+        length = len(body)
+        first_end = body.find("\n")
+        head_end = min(length if first_end < 0 else first_end, self.window_chars)
+        tail_start = max(body.rstrip("\n").rfind("\n") + 1, length - self.window_chars, head_end)
+        spans = [(0, head_end)]
+        if tail_start < length:
+            spans.append((tail_start, length))
+            spans.append((max(head_end - self.overlap_chars, 0), min(tail_start + self.overlap_chars, length)))
+        return spans
+
+    def windows(self, body):
+        """Yields (start, end) of every window of body, in scan order, ignoring the budget."""
+        step = self.window_chars - self.overlap_chars
+        for start, end in self.spans(body):
+            position = start
+            while True:
+                window_end = min(position + self.window_chars, end)
+                yield position, window_end
+                if window_end >= end:
+                    break
+                position += step
+
+    def check_body(self, body):
+        """
+        check_text(body, is_content=True) for a whole body, scanned window by window.
+
+        Returns:
+            tuple: (is_match, confidence, explanation), as from check_text()
+        """
+        self.bodies += 1
+        self.body_chars += len(body)
+        remaining = self.budget
+        best = NO_MATCH
+        timed_out = False
+        for start, end in self.windows(body):
+            if remaining is not None:
+                if remaining <= 0:
+                    self.budget_stops += 1
+                    break
+                end = min(end, start + remaining)
+                remaining -= end - start
+            window = body[start:end].replace("\n", " ")
+            self.scanned_chars += end - start
+            self.windows_scanned += 1
+
+            if "NAY" in window:
+                result = CAPITALIZED_NAY
+            else:
+                result = self.detector._check_fast(window, is_content=True)
+            timed_out = timed_out or result == BUDGET_EXCEEDED
+            if result[0] and result[1] > best[1]:
+                best = result
+            if best[1] >= self.decisive_confidence:
+                self.decisive_stops += 1
+                break
+
+        if best[0]:
+            self.hits += 1
+        elif timed_out:
+            return BUDGET_EXCEEDED
+        return best
+
+    def detect(self, title, body=""):
+        """Same result dict as RejectionPattern.detect(), with body scanned by check_body()."""
+        result = self.detect_many([title], [body])
+        return {
+            "is_nay_request": bool(result["is_nay_request"][0]),
+            "confidence": float(result["confidence"][0]),
+            "explanation": result["explanations"][result["explanation_code"][0]]
+        }
+
+    def detect_many(self, titles, bodies=None):
+        """Same columnar result as RejectionPattern.detect_many(), with bodies scanned by check_body()."""
+        titles = [t.strip() for t in _to_str_list(titles)]
+        bodies = [b.strip() for b in _to_str_list(bodies)] if bodies is not None else [""] * len(titles)
+        if len(bodies) != len(titles):
+            raise ValueError(f"Got {len(titles)} titles but {len(bodies)} bodies")
+
+        results = {}
+        rows = []
+        for title, body in zip(titles, bodies):
+            if "NAY" in title:
+                rows.append(CAPITALIZED_NAY)
+                continue
+            key = (title, body)
+            result = results.get(key)
+            if result is None:
+                detected = self.detector._detect_stripped(title, body, title.lower(), self.check_body)
+                result = (detected["is_nay_request"], detected["confidence"], detected["explanation"])
+                results[key] = result
+            rows.append(result)
+
+        return _columnar(rows)
+
+    def keyword_hits(self, text):
+        return self.detector.keyword_hits(text)
+
+    def pattern_report(self):
+        return self.detector.pattern_report()
+
+    def reset_stats(self):
+        self.detector.reset_stats()
+
+    def report(self):
+        """Bodies scanned so far, their hit rate and how much of their text was looked at."""
+        bodies = self.bodies
+        return {
+            "bodies": bodies,
+            "hits": self.hits,
+            "hit_rate": self.hits / bodies if bodies else 0.0,
+            "body_chars": self.body_chars,
+            "scanned_chars": self.scanned_chars,
+            "scanned_fraction": self.scanned_chars / self.body_chars if self.body_chars else 0.0,
+            "windows": self.windows_scanned,
+            "decisive_stops": self.decisive_stops,
+            "budget_stops": self.budget_stops
+        }
+
+
+def _columnar(rows):
+    """Packs (is_nay, confidence, explanation) rows into detect_many()'s columnar result."""
+    explanation_codes = {}
+    is_nay_request, confidence, codes = [], [], []
+    for is_nay, conf, explanation in rows:
+        is_nay_request.append(is_nay)
+        confidence.append(conf)
+        codes.append(explanation_codes.setdefault(explanation, len(explanation_codes)))
+
+    if np is not None:
+        is_nay_request = np.array(is_nay_request, dtype=bool)
+        confidence = np.array(confidence, dtype=np.float64)
+        codes = np.array(codes, dtype=np.int32)
+
+    return {
+        "is_nay_request": is_nay_request,
+        "confidence": confidence,
+        "explanation_code": codes,
+        "explanations": list(explanation_codes)
+    }
+
+
+def _to_str_list(values):
+    """Converts a list, NumPy/pandas column or pyarrow array into a list of str, mapping missing values to ""."""
+    if hasattr(values, "to_pylist"):
+        values = values.to_pylist()
+    elif hasattr(values, "tolist"):
+        values = values.tolist()
+    return [
+        v if isinstance(v, str) else v.decode("utf-8") if isinstance(v, bytes) else ""
+        for v in values
+    ]
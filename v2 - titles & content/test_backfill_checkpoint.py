@@ -0,0 +1,94 @@
+import csv
+import os
+import tempfile
+
+import fetch_referendum_data
+from backfill_checkpoint import BackfillCheckpoint
+from test_referendum_fetcher import MISSING_IDS, StubPolkassembly, run_stub_server
+
+HEADERS = ["id", "title", "content"]
+
+
+def make_row(ref_id):
+    # Even IDs get a quoted title that spans lines
+    title = f"Referendum {ref_id}\nsecond line, \"quoted\"" if ref_id % 2 == 0 else f"Referendum {ref_id}"
+    return {"id": ref_id, "title": title, "content": "body"}
+
+
+def open_checkpoint(tmp):
+    return BackfillCheckpoint(os.path.join(tmp, "net_referendums.csv"), os.path.join(tmp, "net_checkpoint.json"),
+                              HEADERS)
+
+
+def read_rows(tmp):
+    with open(os.path.join(tmp, "net_referendums.csv"), "r", encoding="utf-8", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def test_resume():
+    with tempfile.TemporaryDirectory() as tmp:
+        checkpoint = open_checkpoint(tmp)
+        checkpoint.commit([make_row(1), make_row(2)], fetched_ids=[1, 2], missing_ids=[3], failed_ids=[4])
+        checkpoint.commit([make_row(5)], fetched_ids=[5])
+
+        checkpoint = open_checkpoint(tmp)
+        assert checkpoint.fetched == {1, 2, 5} and checkpoint.missing == {3} and checkpoint.failed == {4}
+        # Failed IDs are retried, missing ones only when asked to
+        assert checkpoint.done_ids() == {1, 2, 3, 5}
+        assert checkpoint.done_ids(skip_missing=False) == {1, 2, 5}
+
+        # A retried ID that now succeeds is no longer failed
+        checkpoint.commit([make_row(4)], fetched_ids=[4])
+        assert open_checkpoint(tmp).failed == set()
+        assert [row["title"] for row in read_rows(tmp)] == [make_row(i)["title"] for i in (1, 2, 5, 4)]
+
+
+def test_torn_row_repair():
+    rows = [make_row(i) for i in range(1, 8)]
+    for use_manifest in (True, False):
+        for torn in ('8,"Referendum 8\n', '8,"Referendum 8\nsecond', "8,Referen", '8,"Referendum 8\n",bo'):
+            with tempfile.TemporaryDirectory() as tmp:
+                checkpoint = open_checkpoint(tmp)
+                checkpoint.commit(rows[:4], fetched_ids=range(1, 5))
+                if not use_manifest:
+                    os.remove(checkpoint.manifest_file)
+                # Rows written after the last checkpoint, then a crash mid-row
+                with open(checkpoint.csv_file, "a", encoding="utf-8", newline="") as f:
+                    csv.DictWriter(f, fieldnames=HEADERS).writerows(rows[4:])
+                    complete_size = f.tell()
+                    f.write(torn)
+
+                checkpoint = open_checkpoint(tmp)
+                assert checkpoint.fetched == set(range(1, 8)), (use_manifest, torn)
+                assert os.path.getsize(checkpoint.csv_file) == complete_size == checkpoint.csv_size
+                assert [row["title"] for row in read_rows(tmp)] == [row["title"] for row in rows]
+
+                # Appending after the repair gives a clean CSV
+                checkpoint.commit([make_row(8)], fetched_ids=[8])
+                assert [int(row["id"]) for row in read_rows(tmp)] == list(range(1, 9))
+
+
+def test_download_skips_missing_ids():
+    server, url = run_stub_server()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            fetch_referendum_data.configure_detector()
+            fetch_referendum_data.download_referendum_data(1, 6, "kusama", tmp, concurrency=2, rate=1000,
+                                                           api_url=url)
+            fetch_referendum_data.download_referendum_data(1, 10, "kusama", tmp, concurrency=2, rate=1000,
+                                                           api_url=url)
+            with open(os.path.join(tmp, "kusama_referendums.csv"), "r", encoding="utf-8") as f:
+                rows = list(csv.DictReader(f))
+    finally:
+        server.shutdown()
+
+    assert [int(row["id"]) for row in rows] == [i for i in range(1, 11) if i not in MISSING_IDS]
+    # The resumed run fetched neither the rows it had nor the known-missing ID
+    assert all(StubPolkassembly.attempts[i] == 1 for i in range(1, 11) if i != 5)
+
+
+if __name__ == "__main__":
+    test_resume()
+    test_torn_row_repair()
+    test_download_skips_missing_ids()
+    print("PASS: backfill checkpoints resume and repair torn rows")
@@ -0,0 +1,96 @@
+import csv
+import os
+import random
+import tempfile
+
+import fetch_referendum_data
+from referendum_store import ReferendumStore, store_path
+from rejection_patterns import BodyScanner, RejectionPattern
+from test_pattern_equivalence import load_referendums
+
+FILLER = "The treasury funds community tooling and documentation. "
+
+
+def test_windows_overlap():
+    rng = random.Random(3)
+    scanner = BodyScanner(window_chars=64, overlap_chars=16)
+    for _ in range(300):
+        body = "".join(rng.choice(["x", " ", "\n"]) for _ in range(rng.randint(1, 600)))
+        windows = list(scanner.windows(body))
+        assert all(end - start <= 64 for start, end in windows)
+        # Every stretch of overlap_chars + 1 characters lies inside one window
+        for position in range(max(len(body) - 16, 1)):
+            end = min(position + 17, len(body))
+            assert any(start <= position and end <= stop for start, stop in windows), (body, position)
+
+
+def test_short_bodies_match_detect():
+    titles, contents = zip(*load_referendums())
+    expected = RejectionPattern().detect_many(titles, contents)
+    scanned = BodyScanner().detect_many(titles, contents)
+    assert scanned["is_nay_request"].tolist() == expected["is_nay_request"].tolist()
+    for i, content in enumerate(contents):
+        if "NAY" not in content:
+            assert scanned["confidence"][i] == expected["confidence"][i], (titles[i], content)
+
+
+def test_finds_late_phrases_within_budget():
+    body = "Summary of the proposal.\n" + FILLER * 40 + "Please reject this proposal. " + FILLER * 40 + "\nThanks"
+    assert not RejectionPattern().detect("Tooling", body[:100])["is_nay_request"]
+
+    scanner = BodyScanner(window_chars=256, overlap_chars=32)
+    result = scanner.detect("Tooling", body)
+    assert result["is_nay_request"] and result["confidence"] == 0.95
+    assert scanner.report()["decisive_stops"] == 1
+    assert scanner.report()["scanned_chars"] < len(body)
+
+    scanner = BodyScanner(budget=1024, window_chars=256, overlap_chars=32)
+    assert not scanner.detect("Tooling", body)["is_nay_request"]
+    assert scanner.report()["scanned_chars"] == 1024 and scanner.report()["budget_stops"] == 1
+
+
+def test_last_paragraph_first():
+    body = "Intro.\n" + FILLER * 200 + "\nUpdate: please vote nay, a corrected version follows."
+    scanner = BodyScanner(budget=300, window_chars=256, overlap_chars=32)
+    assert scanner.check_body(body)[0]
+    assert scanner.report()["windows"] == 2
+
+
+def test_phrase_across_window_boundary():
+    for offset in range(200, 260):
+        body = "a" * offset + " please reject this " + "b" * 400
+        assert BodyScanner(window_chars=256, overlap_chars=32).check_body(body)[0], offset
+
+
+def test_fetch_scans_bodies():
+    with tempfile.TemporaryDirectory() as tmp:
+        with ReferendumStore(store_path(tmp, "moonbeam")) as store:
+            for ref_id in range(1, 4):
+                body = f"<p>Intro {ref_id}</p><p>{FILLER * 20}</p>"
+                if ref_id == 2:
+                    body += "<p>We made a mistake, please reject this referendum.</p>"
+                store.put(ref_id, {"post_id": ref_id, "title": f"Proposal {ref_id}", "content": body})
+
+        fetch_referendum_data.configure_detector(scan_bodies=True)
+        try:
+            fetch_referendum_data.process_json_files("moonbeam", output_dir=tmp)
+        finally:
+            fetch_referendum_data.configure_detector()
+        with open(os.path.join(tmp, "moonbeam_referendums.csv"), "r", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        assert [row["is_nay_request"] for row in rows] == ["0", "1", "0"]
+        assert rows[1]["content"] == f"Intro 2 {FILLER * 2}"[:100]
+
+        settings = fetch_referendum_data.scan_report(fetch_referendum_data.stored_records("moonbeam", output_dir=tmp))
+        assert settings[0]["nay"] == 0
+        assert settings[-1]["nay"] == settings[-1]["new_nay"] == 1
+
+
+if __name__ == "__main__":
+    test_windows_overlap()
+    test_short_bodies_match_detect()
+    test_finds_late_phrases_within_budget()
+    test_last_paragraph_first()
+    test_phrase_across_window_boundary()
+    test_fetch_scans_bodies()
+    print("PASS: windowed body scanner")
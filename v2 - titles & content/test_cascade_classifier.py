@@ -0,0 +1,61 @@
+import numpy as np
+
+from cascade_classifier import CascadeClassifier
+from rejection_patterns import RejectionPattern
+
+
+class StubModel:
+    """Stands in for LiteModel: every title containing 'wrong' is a nay request."""
+
+    def __init__(self):
+        self.seen = []
+
+    def predict_proba(self, titles):
+        self.seen.extend(titles)
+        p1 = np.array([0.8 if "wrong" in t.lower() else 0.1 for t in titles])
+        return np.stack([1 - p1, p1], axis=1)
+
+
+def make_cascade(detector=None, **thresholds):
+    cascade = CascadeClassifier(model_path="unused", detector=detector, **thresholds)
+    cascade._model = StubModel()
+    return cascade
+
+
+TITLES = ["Please vote NAY", "Treasury proposal for wallet", "Wrong beneficiary on this one", "Weekly tips"]
+
+
+def test_routes_only_ambiguous_titles_to_model():
+    cascade = make_cascade()
+    result = cascade.classify(TITLES)
+
+    assert result["is_nay_request"].tolist() == [True, False, True, False]
+    assert result["stage"].tolist() == [0, 0, 1, 0]
+    assert cascade._model.seen == ["Wrong beneficiary on this one"]
+    assert result["confidence"][2] == 0.8
+    assert cascade.routing_report() == {"regex": 0.75, "model": 0.25}
+
+
+def test_thresholds_control_routing():
+    cascade = make_cascade(positive_threshold=1.0, negative_threshold=1.0)
+    result = cascade.classify(TITLES)
+    assert result["stage"].tolist() == [1, 1, 1, 1]
+    assert cascade._model.seen == TITLES
+    assert result["is_nay_request"].tolist() == [False, False, True, False]
+
+
+def test_timed_out_checks_go_to_model():
+    # With no time at all, the regex tiers give up on texts that contain a trigger literal
+    cascade = make_cascade(RejectionPattern(time_budget=0))
+    result = cascade.classify(["Weekly tips", "Weekly tips", "Please vote NAY"], ["", "please vote no", ""])
+
+    assert result["stage"].tolist() == [0, 1, 0]
+    assert cascade._model.seen == ["Weekly tips"]
+    assert result["confidence"][1] == 0.9 and not result["is_nay_request"][1]
+
+
+if __name__ == "__main__":
+    test_routes_only_ambiguous_titles_to_model()
+    test_thresholds_control_routing()
+    test_timed_out_checks_go_to_model()
+    print("PASS: cascade classifier")
@@ -0,0 +1,56 @@
+import os
+import tempfile
+
+import numpy as np
+import tensorflow as tf
+
+from content_model import TITLE_TOKENS, ContentAwareClassifier, build_model, export_string_model, make_vectorizer
+
+TITLES = ["Treasury proposal for tooling", "Please vote nay on this referendum", "Small tipper", ""]
+CONTENTS = ["We fund documentation and community tooling.", "", "A tip for the wiki", "Vote nay, a fix follows"]
+CONTENT_TOKENS = 8
+
+
+def tiny_model(content_tokens):
+    vectorizer = tf.keras.layers.TextVectorization(standardize="lower_and_strip_punctuation")
+    vectorizer.adapt(TITLES + CONTENTS)
+    vocabulary = vectorizer.get_vocabulary()
+    tf.keras.utils.set_random_seed(7)
+    return build_model(len(vocabulary), content_tokens), vocabulary
+
+
+def test_string_model_matches_int_model():
+    for content_tokens in (0, CONTENT_TOKENS):
+        int_model, vocabulary = tiny_model(content_tokens)
+        inputs = [make_vectorizer(vocabulary, TITLE_TOKENS, "title_vectorizer")(tf.constant(TITLES))]
+        strings = [tf.constant([[t] for t in TITLES])]
+        if content_tokens:
+            inputs.append(make_vectorizer(vocabulary, content_tokens, "content_vectorizer")(tf.constant(CONTENTS)))
+            strings.append(tf.constant([[c] for c in CONTENTS]))
+
+        expected = int_model(inputs, training=False).numpy()
+        string_model = export_string_model(int_model, vocabulary, content_tokens)
+        assert np.allclose(string_model(strings, training=False).numpy(), expected, atol=1e-6), content_tokens
+
+
+def test_saved_model_matches_classifier():
+    int_model, vocabulary = tiny_model(CONTENT_TOKENS)
+    string_model = export_string_model(int_model, vocabulary, CONTENT_TOKENS)
+    expected = tf.nn.softmax(string_model([tf.constant([[t] for t in TITLES]), tf.constant([[c] for c in CONTENTS])],
+                                          training=False), axis=1).numpy()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "content_model.keras")
+        string_model.save(path)
+        classifier = ContentAwareClassifier(path)
+        ref_ids = [f"kusama/{i}" for i in range(len(TITLES))]
+        assert np.allclose(classifier.predict_proba(ref_ids, TITLES, CONTENTS), expected, atol=1e-6)
+        # Cached content vectors give the same result
+        assert np.allclose(classifier.predict_proba(ref_ids, TITLES, CONTENTS), expected, atol=1e-6)
+        assert classifier.hits == len(TITLES)
+
+
+if __name__ == "__main__":
+    test_string_model_matches_int_model()
+    test_saved_model_matches_classifier()
+    print("PASS: exported content model matches the int model")
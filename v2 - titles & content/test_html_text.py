@@ -0,0 +1,94 @@
+import glob
+import json
+import os
+import random
+import re
+import tempfile
+import warnings
+
+from bs4 import BeautifulSoup, MarkupResemblesLocatorWarning
+
+from html_text import HtmlTextCache, extract_text
+from referendum_store import ReferendumStore
+from test_pattern_equivalence import DATA_DIR, load_referendums
+
+FRAGMENTS = [
+    "<p>", "</p>", "<div class='x'>", "</div>", "<br>", "<br/>", "</br>", "<hr />", "<b>", "</b>",
+    "<script>var a = '<p>';</script>", "<style>p { color: red }</style>", "<template><i>hidden</i>",
+    "</template>", "<ruby>漢<rt>kan</rt></ruby>", "<!-- comment -->", "<![CDATA[cdata text]]>",
+    "<!DOCTYPE html>", "<?php echo 1 ?>", "&amp;", "&nbsp;", "&lt;tag&gt;", "&foo;", "&amp", "&#150;",
+    "&#x2014;", "&#0;", "&#xFFFFFFF;", "Please reject this proposal", "vote NAY", "  \n\t ", "a < b",
+    "x > y", "[link](https://example.com)", "**bold**", "Résumé", "</unopened>", "<img src=a>", "text",
+]
+
+
+def reference_html_to_text(html_content):
+    """The BeautifulSoup implementation html_to_text() used before the streaming extractor."""
+    if not html_content:
+        return ""
+    warnings.filterwarnings("ignore", category=MarkupResemblesLocatorWarning)
+    soup = BeautifulSoup(html_content, "html.parser")
+    text = soup.get_text(separator=" ", strip=True)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def stored_bodies():
+    """Raw referendum bodies from any local referendum stores or JSON directories."""
+    bodies = []
+    for path in glob.glob(os.path.join(DATA_DIR, "*", "referendums.store")):
+        with ReferendumStore(path) as store:
+            bodies.extend(data.get("content") or "" for _, data in store.items())
+    for path in glob.glob(os.path.join(DATA_DIR, "*", "json", "referendum_*.json")):
+        with open(path, "r", encoding="utf-8") as f:
+            bodies.append(json.load(f).get("content") or "")
+    return bodies
+
+
+def corpus():
+    rng = random.Random(7)
+    generated = ["".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 40))) for _ in range(2000)]
+    texts = [t for pair in load_referendums() for t in pair]
+    return texts + generated + stored_bodies()
+
+
+def test_matches_beautifulsoup():
+    for html_content in corpus():
+        assert extract_text(html_content) == reference_html_to_text(html_content), html_content
+
+
+def test_budget_returns_prefix():
+    for html_content in corpus()[::7]:
+        full = reference_html_to_text(html_content)
+        for max_chars in (1, 20, 100):
+            assert extract_text(html_content, max_chars) == full[:max_chars], html_content
+
+
+def test_paragraphs_keep_text():
+    html_content = "<p>One <b>two</b></p><div>three</div>four<br>five\n\n \nsix<ul><li>seven</li></ul>"
+    assert extract_text(html_content, paragraphs=True) == "One two\nthree\nfour five\nsix\nseven"
+    for html_content in corpus()[::3]:
+        text = extract_text(html_content, paragraphs=True)
+        assert text.replace("\n", " ") == extract_text(html_content), html_content
+        assert extract_text(html_content, 20, paragraphs=True) == text[:20], html_content
+
+
+def test_cache_persists_across_instances():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "html_text_cache.sqlite")
+        cache = HtmlTextCache(path)
+        assert cache.html_to_text("<p>Please <b>reject</b></p>", 100) == "Please reject"
+        cache.close()
+
+        cache = HtmlTextCache(path)
+        assert cache._db.execute("SELECT COUNT(*) FROM html_text").fetchone()[0] == 1
+        assert cache.html_to_text("<p>Please <b>reject</b></p>", 100) == "Please reject"
+        assert cache.html_to_text("<p>Please <b>reject</b></p>", 6) == "Please"
+        cache.close()
+
+
+if __name__ == "__main__":
+    test_matches_beautifulsoup()
+    test_budget_returns_prefix()
+    test_paragraphs_keep_text()
+    test_cache_persists_across_instances()
+    print("PASS: streaming extractor matches BeautifulSoup")
@@ -0,0 +1,323 @@
+import csv
+import glob
+import os
+import random
+import re
+import time
+
+import rejection_patterns
+from rejection_patterns import (BUDGET_EXCEEDED, LinearPattern, LiteralPrefilter, RejectionPattern, literal_candidates,
+                                merge_pattern_reports)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "referendum_data")
+
+EXTRA_TEXTS = [
+    "",
+    " - ",
+    "...",
+    "reject",
+    "Please vote NAY",
+    "Wrong track\nplease vote nay",
+    "Change of plan: vote for nay",
+    "Refunding deposit\nvote nay later",
+    "error in submission, wrong preimage used",
+    "This is an error and a mistake",
+    "İstanbul mistake error",
+    # IGNORECASE matches these to ASCII letters that str.lower() does not produce
+    "Please İgnore this proposal",
+    "please ıgnore this",
+    "We will reſubmit the proposal",
+    " . ",
+    "-\n",
+]
+
+
+class ReferenceRejectionPattern(RejectionPattern):
+    """Original one-regex-at-a-time implementation, kept as the equivalence oracle."""
+
+    def check_text(self, text, is_content=False):
+        if not text or not isinstance(text, str):
+            return False, 0.0, "Empty or invalid text"
+
+        override_patterns = [
+            (r'(?i)vote\s*nay', 0.95, "Contains 'vote nay'"),
+            (r'(?i)change.*vote.*nay', 0.95, "Contains vote change instruction"),
+            (r'(?i)\bNAY\b', 0.95, "Contains capitalized NAY")
+        ]
+
+        for pattern, confidence, explanation in override_patterns:
+            if re.search(pattern, text):
+                return True, confidence, explanation
+
+        for pattern in self.negative_patterns:
+            if re.search(pattern, text):
+                return False, 0.0, f"Negative pattern matched: {pattern}"
+
+        is_empty_title = bool(re.match(r'^\s*[.-]{1,3}\s*$', text))
+        if is_empty_title:
+            return True, 0.95, f"Empty/placeholder referendum: '{text}'"
+
+        for pattern in self.strong_patterns:
+            match = re.search(pattern, text)
+            if match:
+                return True, 0.95, f"Strong indicator: '{match.group(0)}'"
+
+        for pattern in self.medium_patterns:
+            match = re.search(pattern, text)
+            if match:
+                return True, 0.85, f"Medium indicator: '{match.group(0)}'"
+
+        if is_content:
+            for pattern in self.content_patterns:
+                match = re.search(pattern, text)
+                if match:
+                    return True, 0.9, f"Content indicator: '{match.group(0)}'"
+
+        keywords_with_context = [
+            (r'\bnay\b', r'vote\s+nay|please\s+nay'),
+            (r'\breject\b', r'reject\s+this|please\s+reject'),
+            (r'\berror\b', r'error\s+in|due\s+to\s+error'),
+            (r'\bwrong\b', r'wrong\s+\w+|is\s+wrong'),
+            (r'\bmistake\b', r'mistake\s+in|by\s+mistake'),
+            (r'\bincorrect\b', r'incorrect\s+\w+|is\s+incorrect'),
+            (r'\bcancel\b', r'cancel\s+this|please\s+cancel'),
+            (r'\bignore\b', r'ignore\s+this|please\s+ignore'),
+            (r'\bagainst\b', r'vote\s+against')
+        ]
+
+        matches = []
+
+        for keyword, context in keywords_with_context:
+            if re.search(keyword, text.lower()) and re.search(context, text.lower()):
+                matches.append(keyword.strip(r'\b'))
+
+        if len(matches) >= 2:
+            return True, 0.7, f"Multiple weak indicators with context: {', '.join(matches)}"
+        elif len(matches) == 1:
+            return True, 0.6, f"Weak indicator with context: '{matches[0]}'"
+
+        simple_keywords = ["nay", "reject", "error", "wrong", "mistake"]
+        simple_matches = [k for k in simple_keywords if re.search(rf'\b{k}\b', text.lower())]
+
+        if len(simple_matches) >= 2:
+            return True, 0.55, f"Multiple weak indicators without context: {', '.join(simple_matches)}"
+
+        return False, 0.0, "No pattern matched"
+
+    def detect(self, title, content=""):
+        title = title.strip() if title else ""
+        content = content.strip() if content else ""
+
+        if "NAY" in title or "NAY" in content:
+            return {"is_nay_request": True, "confidence": 0.95, "explanation": "Contains capitalized 'NAY'"}
+
+        if re.search(r'(?i)vote\s*nay', title) or re.search(r'(?i)change.*vote.*nay', title):
+            return {"is_nay_request": True, "confidence": 0.95,
+                    "explanation": "Title contains direct vote nay instruction"}
+
+        if "cancelled" in title.lower() or "[cancelled]" in title.lower():
+            return {"is_nay_request": True, "confidence": 0.9, "explanation": f"Cancelled proposal: '{title}'"}
+
+        title_is_nay, title_confidence, title_explanation = self.check_text(title)
+        if title_is_nay and title_confidence >= 0.85:
+            return {"is_nay_request": True, "confidence": title_confidence, "explanation": title_explanation}
+
+        content_is_nay, content_confidence, content_explanation = False, 0.0, ""
+        if content:
+            content_is_nay, content_confidence, content_explanation = self.check_text(content, is_content=True)
+
+        if content_is_nay and content_confidence >= 0.7:
+            return {"is_nay_request": True, "confidence": content_confidence, "explanation": content_explanation}
+
+        if title_is_nay and content_is_nay:
+            combined_confidence = max(title_confidence, content_confidence) + 0.1
+            return {"is_nay_request": True, "confidence": min(combined_confidence, 0.9),
+                    "explanation": f"Combined evidence: {title_explanation}; {content_explanation}"}
+
+        if title_is_nay:
+            return {"is_nay_request": True, "confidence": title_confidence, "explanation": title_explanation}
+
+        return {"is_nay_request": False, "confidence": 0.9,
+                "explanation": "No indicators of a 'nay' vote request found"}
+
+
+def load_referendums():
+    """Loads (title, content) pairs from every referendum_data/*.csv file."""
+    rows = []
+    for csv_file in sorted(glob.glob(os.path.join(DATA_DIR, "*_referendums.csv"))):
+        with open(csv_file, "r", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                rows.append((row["title"], row["content"]))
+    return rows
+
+
+def test_check_text_matches_reference():
+    detector = RejectionPattern()
+    reference = ReferenceRejectionPattern()
+
+    texts = [t for pair in load_referendums() for t in pair] + EXTRA_TEXTS
+    assert len(texts) > 2000
+
+    for text in texts:
+        for is_content in (False, True):
+            expected = reference.check_text(text, is_content=is_content)
+            assert detector.check_text(text, is_content=is_content) == expected, text
+
+
+def test_detect_matches_reference():
+    detector = RejectionPattern()
+    reference = ReferenceRejectionPattern()
+
+    pairs = load_referendums() + [(t, t) for t in EXTRA_TEXTS]
+    for title, content in pairs:
+        assert detector.detect(title, content) == reference.detect(title, content), title
+
+
+def test_detect_many_matches_detect():
+    detector = RejectionPattern()
+
+    pairs = load_referendums() + [(t, t) for t in EXTRA_TEXTS] + [(None, None)]
+    titles = [title for title, _ in pairs]
+    contents = [content for _, content in pairs]
+
+    batch = detector.detect_many(titles, contents)
+    for i, (title, content) in enumerate(pairs):
+        expected = detector.detect(title, content)
+        assert bool(batch["is_nay_request"][i]) == expected["is_nay_request"], title
+        assert float(batch["confidence"][i]) == expected["confidence"], title
+        assert batch["explanations"][batch["explanation_code"][i]] == expected["explanation"], title
+
+
+def test_literal_candidates():
+    assert literal_candidates(r'(?i)reject\s+.*referendum\s+#?\d+') == [{"reject"}, {"referendum"}]
+    assert literal_candidates(r'(?i)(incorrect|wrong)\s+(preimage|hash)') == [{"incorrect", "wrong"},
+                                                                          {"preimage", "hash"}]
+    assert literal_candidates(r'(?i)test\s+.*\s+vote\s+(for|)\s*nay') == [{"test"}, {"vote"}, {"nay"}]
+    assert literal_candidates(r'\s*\d+') == []
+
+    prefilter = LiteralPrefilter([r'(?i)please\s+vote\s+nay\b', r'(?i)\bvote\s+no\b', r'(?i)^\s*[.-]{1,3}\s*$'])
+    assert prefilter.anchors == ["vote"]
+    assert prefilter.may_match("Please VOTE no") and prefilter.may_match(" .. ")
+    assert not prefilter.may_match("Treasury proposal")
+
+
+def test_prefilter_skip_rate():
+    detector = RejectionPattern()
+    pairs = load_referendums()
+    detector.detect_many([title for title, _ in pairs], [content for _, content in pairs])
+    report = detector.prefilter_report()
+    print(f"Prefilter skipped {report['skipped']}/{report['checked']} texts ({report['skip_rate']:.1%})")
+    assert report["skip_rate"] > 0.5
+
+
+def test_linear_mode_matches_reference():
+    # Below LINEAR_MIN_CHARS linear mode defers to re; lift that so every text goes through LinearPattern
+    min_chars = rejection_patterns.LINEAR_MIN_CHARS
+    rejection_patterns.LINEAR_MIN_CHARS = 0
+    try:
+        detector = RejectionPattern(linear=True)
+    finally:
+        rejection_patterns.LINEAR_MIN_CHARS = min_chars
+    reference = ReferenceRejectionPattern()
+
+    assert len(detector._strong_tier.linear_indices) == 3 and len(detector._negative_tier.linear_indices) == 4
+    texts = [t for pair in load_referendums() for t in pair] + EXTRA_TEXTS
+    for text in texts:
+        for is_content in (False, True):
+            expected = reference.check_text(text, is_content=is_content)
+            assert detector.check_text(text, is_content=is_content) == expected, text
+    for title, content in load_referendums():
+        assert detector.detect(title, content) == reference.detect(title, content), title
+
+
+def test_linear_pattern_matches_re_on_random_texts():
+    detector = RejectionPattern()
+    patterns = ([p for p, _, _ in detector.override_patterns] + detector.negative_patterns +
+                detector.strong_patterns + detector.content_patterns)
+    linear = [LinearPattern(p, min_chars=0) for p in patterns]
+    linear = [p for p in linear if p.linear]
+    assert {p.pattern for p in linear} >= {r'(?i)reject.*resubmit', r'(?i)resubmit.*proposal', r'(?i)change.*vote.*nay'}
+
+    words = ["reject", "resubmit", "proposal", "referendum", "change", "vote", "nay", "test", "for", "refund",
+             "retry", "bond", "return", "maintenance", "of", "this", " ", "  ", "\n", " \n ", "#", "12", "x", "İ"]
+    rng = random.Random(0)
+    for _ in range(3000):
+        text = "".join(rng.choice(words) + rng.choice(["", " ", "\n"]) for _ in range(rng.randint(0, 14)))
+        for pattern in linear:
+            expected = pattern.compiled.search(text)
+            match = pattern.search(text)
+            assert (match and match.span()) == (expected and expected.span()), (pattern.pattern, text)
+
+
+def test_linear_mode_worst_case():
+    # re takes minutes on each of these
+    texts = ["change vote " * 6000, "reject referendum " * 4000, "test " + " " * 30000 + "vote for",
+             "refund nay " * 6000, "bond return change " * 4000]
+    detector = RejectionPattern(linear=True)
+    for text in texts:
+        start = time.perf_counter()
+        detector.check_text(text, is_content=True)
+        detector.detect(text, text)
+        assert time.perf_counter() - start < 5.0, text[:30]
+
+
+def test_time_budget():
+    detector = RejectionPattern(time_budget=0.0)
+    assert detector.check_text("Please vote nay") == BUDGET_EXCEEDED
+    result = detector.detect("Treasury proposal", "please vote nay on this")
+    assert result == {"is_nay_request": False, "confidence": 0.0, "explanation": "Time budget exceeded"}
+    assert detector.budget_exceeded == 2
+    batch = detector.detect_many(["Treasury proposal"], ["please vote nay on this"])
+    assert batch["confidence"][0] == 0.0 and batch["explanations"] == ["Time budget exceeded"]
+    # A nay found before the budget ran out is still reported
+    assert detector.detect("Vote NAY", "")["is_nay_request"]
+    assert RejectionPattern(time_budget=1.0).check_text("Please vote nay")[0]
+
+
+def test_pattern_report():
+    detector = RejectionPattern(instrument=True)
+    reference = ReferenceRejectionPattern()
+    texts = [t for pair in load_referendums() for t in pair] + EXTRA_TEXTS
+    for text in texts:
+        assert detector.check_text(text, is_content=True) == reference.check_text(text, is_content=True), text
+
+    report = detector.pattern_report()
+    assert report["texts"] == len([text for text in texts if text])
+    assert set(report["tiers"]) == {"override", "negative", "strong", "medium", "content", "keywords"}
+    for name, tier in report["tiers"].items():
+        matches = sum(pattern["matches"] for pattern in tier["patterns"])
+        assert tier["calls"] > 0 and 0 < tier["hits"] <= tier["calls"], name
+        assert all(pattern["evaluations"] >= pattern["matches"] for pattern in tier["patterns"]), name
+        assert matches == tier["hits"] or name == "keywords", name
+    # Texts the prefilter rules out only go through the negative tier
+    assert report["tiers"]["override"]["calls"] == report["texts"] - report["prefilter_skipped"]
+    assert report["tiers"]["override"]["patterns"][0]["matches"] > 0
+
+    merged = merge_pattern_reports([report, None, report])
+    assert merged["texts"] == 2 * report["texts"]
+    strong, merged_strong = report["tiers"]["strong"], merged["tiers"]["strong"]
+    assert merged_strong["patterns"][0]["evaluations"] == 2 * strong["patterns"][0]["evaluations"]
+    assert merged_strong["hit_rate"] == strong["hit_rate"]
+
+    detector.reset_stats()
+    assert detector.pattern_report()["tiers"]["strong"]["calls"] == 0
+    try:
+        RejectionPattern().pattern_report()
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("pattern_report() without instrument=True")
+
+
+if __name__ == "__main__":
+    test_check_text_matches_reference()
+    test_detect_matches_reference()
+    test_detect_many_matches_detect()
+    test_literal_candidates()
+    test_prefilter_skip_rate()
+    test_linear_mode_matches_reference()
+    test_linear_pattern_matches_re_on_random_texts()
+    test_linear_mode_worst_case()
+    test_time_budget()
+    test_pattern_report()
+    print("PASS: compiled engine matches the reference implementation")
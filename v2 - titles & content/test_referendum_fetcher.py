@@ -0,0 +1,119 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from referendum_fetcher import ReferendumFetcher, TokenBucket
+
+MISSING_IDS = {3}
+FLAKY_IDS = {5}
+BROKEN_IDS = {50}  # Content that is not HTML, so no CSV row can be built
+
+
+class StubPolkassembly(BaseHTTPRequestHandler):
+    """Stands in for the Polkassembly on-chain-post endpoint."""
+
+    protocol_version = "HTTP/1.1"
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+    attempts = {}
+    connections = set()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        post_id = int(parse_qs(url.query)["postId"][0])
+        cls = type(self)
+
+        with cls.lock:
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+            cls.attempts[post_id] = cls.attempts.get(post_id, 0) + 1
+            cls.connections.add(self.client_address)
+            attempt = cls.attempts[post_id]
+
+        time.sleep(0.02)
+
+        if url.path != "/api/v1/posts/on-chain-post" or self.headers.get("x-network") != "kusama":
+            status, body = 400, {}
+        elif post_id in MISSING_IDS:
+            status, body = 404, {}
+        elif post_id in FLAKY_IDS and attempt == 1:
+            status, body = 503, {}
+        else:
+            status, body = 200, {"post_id": post_id, "title": f"Referendum {post_id}", "content": "<p>body</p>"}
+            if post_id in BROKEN_IDS:
+                body["content"] = ["<p>body</p>"]
+
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+        with cls.lock:
+            cls.in_flight -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+def run_stub_server():
+    StubPolkassembly.max_in_flight = 0
+    StubPolkassembly.attempts = {}
+    StubPolkassembly.connections = set()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubPolkassembly)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/api/v1/posts/on-chain-post"
+
+
+def fetch_with(fetcher, ids):
+    """Fetches ids the way download_referendum_data() does: one shared rate limiter and concurrency window."""
+    async def run():
+        limiter = TokenBucket(fetcher.rate)
+        semaphore = asyncio.Semaphore(fetcher.concurrency)
+        results = await asyncio.gather(*(fetcher.fetch(ref_id, limiter, semaphore) for ref_id in ids))
+        return dict(zip(ids, results))
+
+    return asyncio.run(run())
+
+
+def test_fetch_against_stub_server():
+    server, url = run_stub_server()
+    try:
+        ids = list(range(1, 41))
+        with ReferendumFetcher("kusama", concurrency=4, rate=1000, api_url=url) as fetcher:
+            results = fetch_with(fetcher, ids)
+    finally:
+        server.shutdown()
+
+    assert sorted(results) == ids
+    assert results[3] == ("missing", None)
+    assert results[5][0] == "fetched" and StubPolkassembly.attempts[5] == 2
+    assert all(results[i] == ("fetched", {"post_id": i, "title": f"Referendum {i}", "content": "<p>body</p>"})
+               for i in ids if i not in MISSING_IDS)
+
+    # Bounded concurrency window and pooled keep-alive connections
+    assert StubPolkassembly.max_in_flight <= 4
+    assert len(StubPolkassembly.connections) <= 4
+
+
+def test_token_bucket_limits_rate():
+    async def take(n):
+        bucket = TokenBucket(rate=50, capacity=1)
+        start = time.monotonic()
+        for _ in range(n):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    # The first token is available immediately, the other 10 refill at 50/s
+    assert asyncio.run(take(11)) >= 0.19
+
+
+if __name__ == "__main__":
+    test_fetch_against_stub_server()
+    test_token_bucket_limits_rate()
+    print("PASS: fetcher works against the stub Polkassembly server")
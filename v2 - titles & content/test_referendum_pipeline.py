@@ -0,0 +1,142 @@
+import asyncio
+import csv
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import fetch_referendum_data
+from backfill_checkpoint import BackfillCheckpoint
+from referendum_pipeline import ReferendumPipeline
+from referendum_store import ReferendumStore, store_path
+from test_referendum_fetcher import BROKEN_IDS, MISSING_IDS, run_stub_server
+
+
+def slow_squares(chunk):
+    time.sleep(0.02 * len(chunk))
+    return [data * data for data in chunk]
+
+
+def test_order_and_backpressure():
+    rng = random.Random(5)
+    written = []
+
+    async def fetch(ref_id):
+        await asyncio.sleep(rng.uniform(0, 0.01))
+        return ("missing", None) if ref_id % 7 == 0 else ("fetched", ref_id)
+
+    def write(ref_id, status, data, result):
+        written.append((ref_id, status, result))
+
+    ids = list(range(100, 0, -1))
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        pipeline = ReferendumPipeline(fetch, slow_squares, write, fetch_workers=6, cpu_workers=2, queue_size=3,
+                                      max_pending=10, executor=executor)
+        pipeline.run_sync(ids)
+
+    assert [ref_id for ref_id, _, _ in written] == ids
+    assert all(result == (None if ref_id % 7 == 0 else ref_id * ref_id) for ref_id, _, result in written)
+    report = pipeline.report()
+    assert report["fetch"]["items"] == 100 and report["write"]["items"] == 100
+    assert report["process"]["items"] == 100 - len([i for i in ids if i % 7 == 0])
+    assert report["max_reorder_buffer"] <= 10
+    # Processing is the bottleneck, so fetchers found its queue full and had to wait
+    assert report["fetch"]["max_queue_depth"] <= 3 and report["fetch"]["blocked_seconds"] > 0
+
+
+def test_chunks_take_queued_items():
+    chunks = []
+
+    async def fetch(ref_id):
+        return ("missing", None) if ref_id == 3 else ("fetched", ref_id)
+
+    def process(chunk):
+        chunks.append(list(chunk))
+        return [-data for data in chunk]
+
+    written = []
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        pipeline = ReferendumPipeline(fetch, process, lambda *args: written.append(args), fetch_workers=4,
+                                      cpu_workers=1, chunk_size=4, executor=executor)
+        pipeline.run_sync(range(1, 21))
+
+    assert [(ref_id, result) for ref_id, _, _, result in written] == [(i, None if i == 3 else -i) for i in range(1, 21)]
+    assert sorted(data for chunk in chunks for data in chunk) == [i for i in range(1, 21) if i != 3]
+    # Fetching outpaces processing here, so items are handed over several at a time
+    assert max(len(chunk) for chunk in chunks) == 4 and len(chunks) < 19
+
+
+def test_stages_overlap():
+    events = []
+
+    async def fetch(ref_id):
+        events.append(("fetch start", ref_id))
+        await asyncio.sleep(0.01)
+        events.append(("fetch end", ref_id))
+        return "fetched", ref_id
+
+    def process(chunk):
+        events.append(("process start", chunk[0]))
+        result = slow_squares(chunk)
+        events.append(("process end", chunk[0]))
+        return result
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        pipeline = ReferendumPipeline(fetch, process, lambda *args: None, fetch_workers=1, cpu_workers=1,
+                                      executor=executor)
+        pipeline.run_sync(range(25))
+
+    kinds = [kind for kind, _ in events]
+    # Processing starts while later referendums are still being fetched, and fetches go on during it
+    assert kinds.index("process start") < len(kinds) - 1 - kinds[::-1].index("fetch end")
+    first_process = kinds.index("process start"), kinds.index("process end")
+    assert "fetch start" in kinds[first_process[0]:first_process[1]]
+
+
+def test_download_against_stub_server():
+    server, url = run_stub_server()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            fetch_referendum_data.configure_detector()
+            fetch_referendum_data.download_referendum_data(1, 30, "kusama", tmp, concurrency=4, rate=1000,
+                                                           api_url=url, workers=2, queue_size=2, max_pending=4)
+            with open(os.path.join(tmp, "kusama_referendums.csv"), "r", encoding="utf-8") as f:
+                rows = list(csv.DictReader(f))
+            with ReferendumStore(store_path(tmp, "kusama")) as store:
+                stored = store.ids()
+    finally:
+        server.shutdown()
+
+    expected = [i for i in range(1, 31) if i not in MISSING_IDS]
+    assert [int(row["id"]) for row in rows] == expected
+    assert sorted(stored) == expected
+    assert all(row["content"] == "body" and row["is_nay_request"] == "0" for row in rows)
+
+
+def test_unbuildable_rows_are_failed():
+    server, url = run_stub_server()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            fetch_referendum_data.configure_detector()
+            fetch_referendum_data.download_referendum_data(48, 51, "kusama", tmp, concurrency=2, rate=1000,
+                                                           api_url=url)
+            with open(os.path.join(tmp, "kusama_referendums.csv"), "r", encoding="utf-8") as f:
+                rows = list(csv.DictReader(f))
+            checkpoint = BackfillCheckpoint(os.path.join(tmp, "kusama_referendums.csv"),
+                                            os.path.join(tmp, "kusama_checkpoint.json"), list(rows[0]))
+    finally:
+        server.shutdown()
+
+    assert [int(row["id"]) for row in rows] == [48, 49, 51]
+    # Retried on the next run instead of counting as done
+    assert checkpoint.failed == BROKEN_IDS and not BROKEN_IDS & checkpoint.done_ids()
+
+
+if __name__ == "__main__":
+    test_order_and_backpressure()
+    test_chunks_take_queued_items()
+    test_stages_overlap()
+    test_download_against_stub_server()
+    test_unbuildable_rows_are_failed()
+    print("PASS: pipelined download keeps order and bounds its queues")
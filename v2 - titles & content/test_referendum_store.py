@@ -0,0 +1,67 @@
+import json
+import os
+import tempfile
+
+from referendum_store import ReferendumStore, migrate_json_dir
+
+
+def referendum(ref_id):
+    return {"post_id": ref_id, "title": f"Referendum {ref_id}", "content": "<p>" + "body " * 50 + "</p>"}
+
+
+def test_put_get_and_reopen():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "polkadot", "referendums.store")
+        with ReferendumStore(path) as store:
+            for ref_id in (5, 1, 3):
+                store.put(ref_id, referendum(ref_id))
+            store.put(3, {"post_id": 3, "title": "Updated"})
+            assert store.get(3)["title"] == "Updated"
+            assert store.get(2) is None
+
+        with ReferendumStore(path) as store:
+            assert store.ids() == [1, 3, 5]
+            assert store.get(5) == referendum(5)
+            assert [ref_id for ref_id, _ in store.items()] == [1, 3, 5]
+            assert dict(store.items())[3]["title"] == "Updated"
+            assert [ref_id for ref_id, _ in store.items([5, 1])] == [1, 5]
+
+
+def test_recovers_from_torn_write_and_stale_index():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "referendums.store")
+        with ReferendumStore(path) as store:
+            store.put(1, referendum(1))
+
+        # Records appended after the index was written, then a torn record
+        with ReferendumStore(path) as store:
+            store.put(2, referendum(2))
+            store._file.flush()
+            with open(path, "ab") as f:
+                f.write(b"\x07\x00\x00")
+            store._file.close()
+
+        with ReferendumStore(path) as store:
+            assert store.ids() == [1, 2]
+            assert store.get(2) == referendum(2)
+
+
+def test_migrate_json_dir():
+    with tempfile.TemporaryDirectory() as tmp:
+        json_dir = os.path.join(tmp, "json")
+        os.makedirs(json_dir)
+        for ref_id in range(10):
+            with open(os.path.join(json_dir, f"referendum_{ref_id}.json"), "w", encoding="utf-8") as f:
+                json.dump(referendum(ref_id), f, indent=2)
+
+        with ReferendumStore(os.path.join(tmp, "referendums.store")) as store:
+            assert migrate_json_dir(json_dir, store) == 10
+            assert migrate_json_dir(json_dir, store) == 0
+            assert dict(store.items()) == {ref_id: referendum(ref_id) for ref_id in range(10)}
+
+
+if __name__ == "__main__":
+    test_put_get_and_reopen()
+    test_recovers_from_torn_write_and_stale_index()
+    test_migrate_json_dir()
+    print("PASS: referendum store")